@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# chat-service / embedding-service 가 같은 경로를 쓰면 디스크 캐시를 공유
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+# OrderedDict 항목 / key 문자열 등 벡터 외 부가 메모리 추정치
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class EmbeddingCache:
+    """
+    (model name, 정규화된 텍스트 hash) 기준 임베딩 캐시.
+    1차: byte 크기 기준으로 evict 하는 in-memory LRU
+    2차: (선택) SQLite 디스크 캐시
+    """
+
+    def __init__(self, model_name: str, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES,
+                 disk_path: str = EMBEDDING_CACHE_PATH):
+        """
+        :param model_name: 캐시 key 에 포함할 모델 이름
+        :param max_bytes: 메모리 캐시 최대 크기
+        :param disk_path: SQLite 파일 경로. 빈 문자열이면 디스크 캐시 미사용
+        """
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._disk.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str, memory_only: bool = False):
+        """
+        :return: float32 벡터 또는 None
+        """
+        return self.get_many([text], memory_only=memory_only)[0]
+
+    def get_many(self, texts: list, memory_only: bool = False) -> list:
+        """
+        :param memory_only: 메모리 캐시만 조회 (event loop 에서 호출하는 fast path). miss 는 집계하지 않음
+        :return: texts 와 같은 순서의 벡터 리스트. 캐시에 없으면 None
+        """
+        keys = [self.key(text) for text in texts]
+        results = [None] * len(texts)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = vector
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing and self._disk is not None and not memory_only:
+            for key, vector in self._disk_get(list(missing)).items():
+                self._memory_put(key, vector)
+                for i in missing.pop(key):
+                    results[i] = vector
+                    with self._lock:
+                        self.disk_hits += 1
+
+        if not memory_only:
+            with self._lock:
+                self.misses += sum(len(indexes) for indexes in missing.values())
+        return results
+
+    def put(self, text: str, vector: np.ndarray):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: list, vectors):
+        entries = []
+        for text, vector in zip(texts, vectors):
+            key = self.key(text)
+            vector = np.array(vector, dtype=np.float32)
+            vector.setflags(write=False)
+            self._memory_put(key, vector)
+            entries.append((key, vector.tobytes()))
+
+        if self._disk is not None and entries:
+            with self._lock:
+                self._disk.executemany("INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)", entries)
+                self._disk.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "memoryBytes": self._memory_bytes,
+                "maxBytes": self.max_bytes,
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "diskEnabled": self._disk is not None,
+            }
+
+    def _memory_put(self, key: str, vector: np.ndarray):
+        entry_bytes = vector.nbytes + _ENTRY_OVERHEAD_BYTES
+        if entry_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous.nbytes + _ENTRY_OVERHEAD_BYTES
+            self._memory[key] = vector
+            self._memory_bytes += entry_bytes
+
+            # 오래 사용하지 않은 항목부터 제거
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes + _ENTRY_OVERHEAD_BYTES
+
+    def _disk_get(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            # SQLite 파라미터 개수 제한 때문에 나눠서 조회
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._disk.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
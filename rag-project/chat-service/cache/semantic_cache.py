@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1024"))
+
+
+class SemanticCache:
+    """
+    질문 임베딩의 cosine 유사도 기준 검색 결과 캐시.
+    비슷한 질문이 threshold 이상이면 이전 검색 결과 / 프롬프트를 재사용.
+    TTL + LRU 로 evict 하고, category 단위로 무효화 가능.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        """
+        :param threshold: 캐시 hit 으로 판단할 최소 cosine 유사도
+        :param ttl_seconds: 항목 유효 시간
+        :param max_entries: 최대 항목 수. 넘으면 가장 오래 사용하지 않은 항목 제거
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self._embeddings = None  # (max_entries, dim) 정규화된 질문 임베딩
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._categories = [None] * max_entries
+        self._values = [None] * max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, embedding: list, categories: list):
+        """
+        :param embedding: 질문 임베딩
+        :param categories: 검색 filter 에 사용한 category 목록
+        :return: 저장된 값 또는 None
+        """
+        query = self._normalize(embedding)
+        category_key = self._category_key(categories)
+        now = time.time()
+
+        with self._lock:
+            if self._embeddings is not None:
+                self._valid &= self._expires_at > now
+                candidates = np.flatnonzero(self._valid)
+                if candidates.size:
+                    scores = self._embeddings[candidates] @ query
+                    for position in np.argsort(scores)[::-1]:
+                        if scores[position] < self.threshold:
+                            break
+                        slot = candidates[position]
+                        if self._categories[slot] == category_key:
+                            self._last_used[slot] = now
+                            self.hits += 1
+                            return self._values[slot]
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding: list, categories: list, value):
+        query = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+
+            self._valid &= self._expires_at > now
+            free = np.flatnonzero(~self._valid)
+            # 빈 자리가 없으면 LRU 항목 교체
+            slot = free[0] if free.size else int(np.argmin(self._last_used))
+
+            self._embeddings[slot] = query
+            self._valid[slot] = True
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+            self._categories[slot] = self._category_key(categories)
+            self._values[slot] = value
+
+    def invalidate(self, categories: list = None) -> int:
+        """
+        새 벡터가 upsert 된 category 를 검색 범위에 포함하는 항목 제거.
+        :param categories: None 이면 전체 제거
+        :return: 제거된 항목 수
+        """
+        with self._lock:
+            removed = 0
+            for slot in np.flatnonzero(self._valid):
+                if categories is None or set(self._categories[slot]) & set(categories):
+                    self._valid[slot] = False
+                    self._values[slot] = None
+                    removed += 1
+            self.invalidations += removed
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": int(self._valid.sum()),
+                "maxEntries": self.max_entries,
+                "threshold": self.threshold,
+                "ttlSeconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _normalize(embedding: list) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _category_key(categories: list) -> tuple:
+        return tuple(sorted(categories))
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from utils.metadata_filter_util import MetadataFilterUtil
+
+logger = logging.getLogger("uvicorn.error")
+
+# BM25 corpus: embedding-service 의 ingest manifest (SQLite) 경로. /ingest 와 upsert 작업 모두 index 와 같게 유지됨.
+# chat-service 의 작업 디렉토리 기준 상대 경로로는 찾을 수 없으므로 기본값 없이 (embedding-service 의
+# INGEST_MANIFEST_PATH 와 같은 파일을) 명시해야 함
+BM25_MANIFEST_PATH = os.getenv("BM25_MANIFEST_PATH", "")
+BM25_REFRESH_INTERVAL = float(os.getenv("BM25_REFRESH_INTERVAL", "30"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# 한글 단어 / 영문 단어 / 숫자(소수점, 천 단위 구분 포함)
+_TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z]+|\d+(?:[.,]\d+)*')
+
+
+class _Postings:
+    """
+    한 번 build 한 뒤 바뀌지 않는 BM25 index (CSR postings).
+    term t 의 posting 은 doc_ids[offsets[t]:offsets[t+1]], 같은 위치의 weights 는 BM25 tf 가중치.
+    """
+
+    def __init__(self, vocabulary: dict, offsets: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray,
+                 idf: np.ndarray, ids: list, metadata: list):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.idf = idf
+        self.ids = ids
+        self.metadata = metadata
+        self._columns = {}
+
+    def column(self, field: str) -> np.ndarray:
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = MetadataFilterUtil.column(self.metadata, field)
+        return column
+
+
+class BM25Index:
+    """
+    chunk 텍스트(metadata.text) 로 만든 로컬 BM25 역색인.
+    한글은 형태소 분석기 없이 단어 + 음절 bigram 으로 색인해서 조사가 붙은 고유명사도 매칭되고,
+    숫자는 통째로 색인. query / aquery 는 VectorStore 와 같은 {"matches": [...]} 형태를 반환.
+    """
+
+    def __init__(self, manifest_path: str = BM25_MANIFEST_PATH, k1: float = BM25_K1, b: float = BM25_B,
+                 refresh_interval: float = BM25_REFRESH_INTERVAL):
+        """
+        :param manifest_path: embedding-service 의 ingest manifest (SQLite) 경로
+        :param k1: BM25 tf saturation
+        :param b: BM25 문서 길이 정규화 정도
+        :param refresh_interval: manifest 변경 확인 간격 (초)
+        """
+        self.manifest_path = manifest_path
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = refresh_interval
+
+        self._postings = None
+        self._manifest_connection = None
+        self._loaded_data_version = None
+        self._refresh_task = None
+
+    @staticmethod
+    def tokenize(text: str) -> list:
+        tokens = []
+        for word in _TOKEN_PATTERN.findall(text.lower()):
+            tokens.append(word)
+            if len(word) > 2 and "가" <= word[0] <= "힣":
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        return tokens
+
+    def build(self, entries) -> _Postings:
+        """
+        :param entries: {"id", "metadata"} iterable
+        """
+        vocabulary = {}
+        term_ids = array("i")
+        doc_ids = array("i")
+        term_freqs = array("f")
+        doc_lengths = array("f")
+        ids = []
+        metadata = []
+
+        for doc_id, entry in enumerate(entries):
+            entry_metadata = entry.get("metadata", {})
+            counts = Counter(self.tokenize(entry_metadata.get("text", "")))
+            for term, count in counts.items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(doc_id)
+                term_freqs.append(count)
+            doc_lengths.append(sum(counts.values()))
+            ids.append(entry["id"])
+            metadata.append(entry_metadata)
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        doc_ids = np.frombuffer(doc_ids, dtype=np.int32)
+        term_freqs = np.frombuffer(term_freqs, dtype=np.float32)
+        doc_lengths = np.frombuffer(doc_lengths, dtype=np.float32)
+
+        # term 순으로 정렬해서 CSR 로 변환 (같은 term 안에서는 doc 순서 유지)
+        order = np.argsort(term_ids, kind="stable")
+        doc_ids = doc_ids[order]
+        term_freqs = term_freqs[order]
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)), out=offsets[1:])
+
+        # query 시에는 idf * weight 합만 계산하도록 tf 부분을 미리 계산
+        average_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_ids] / (average_length or 1.0))
+        weights = (term_freqs * (self.k1 + 1) / (term_freqs + norm)).astype(np.float32)
+
+        document_count = len(ids)
+        document_freqs = np.diff(offsets).astype(np.float32)
+        idf = np.log(1 + (document_count - document_freqs + 0.5) / (document_freqs + 0.5)).astype(np.float32)
+
+        return _Postings(vocabulary, offsets, doc_ids, weights, idf, ids, metadata)
+
+    def load(self) -> bool:
+        """
+        manifest 에서 다시 build 후 교체. 없거나 바뀌지 않았으면 False.
+        """
+        postings = self._load_manifest()
+        if postings is None:
+            return False
+        # 검색 중인 요청은 이전 index 를 계속 사용 (참조 교체만 하므로 lock 불필요)
+        self._postings = postings
+        logger.info("BM25 index loaded: %s (%d chunks, %d terms)",
+                    self.manifest_path, len(postings.ids), len(postings.vocabulary))
+        return True
+
+    def _load_manifest(self) -> _Postings:
+        if self._manifest_connection is None:
+            if not self.manifest_path or not os.path.exists(self.manifest_path):
+                return None
+            self._manifest_connection = sqlite3.connect(
+                f"file:{self.manifest_path}?mode=ro", uri=True, check_same_thread=False
+            )
+
+        # data_version 은 다른 connection (embedding-service) 이 commit 할 때마다 바뀜
+        (data_version,) = self._manifest_connection.execute("PRAGMA data_version").fetchone()
+        if data_version == self._loaded_data_version:
+            return None
+
+        rows = self._manifest_connection.execute("SELECT chunk_id, metadata FROM chunks").fetchall()
+        postings = self.build({"id": chunk_id, "metadata": json.loads(metadata)} for chunk_id, metadata in rows)
+        self._loaded_data_version = data_version
+        return postings
+
+    def query(self, text: str, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        postings = self._postings
+        if postings is None or not postings.ids:
+            return {"matches": []}
+
+        scores = np.zeros(len(postings.ids), dtype=np.float32)
+        for term in set(self.tokenize(text)):
+            term_id = postings.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = postings.offsets[term_id], postings.offsets[term_id + 1]
+            scores[postings.doc_ids[start:end]] += postings.idf[term_id] * postings.weights[start:end]
+
+        if filter:
+            scores[~MetadataFilterUtil.mask(filter, postings.column, len(postings.ids))] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size == 0:
+            return {"matches": []}
+
+        k = min(top_k, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+
+        matches = []
+        for doc_id in top:
+            match = {"id": postings.ids[doc_id], "score": float(scores[doc_id])}
+            if include_metadata:
+                match["metadata"] = postings.metadata[doc_id]
+            matches.append(match)
+        return {"matches": matches}
+
+    async def aquery(self, text: str, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        return await asyncio.to_thread(
+            self.query, text=text, top_k=top_k, include_metadata=include_metadata, filter=filter, **kwargs
+        )
+
+    async def start(self):
+        """
+        lifespan 시작 시 호출. 최초 build 후 manifest 변경을 주기적으로 확인.
+        manifest 경로가 설정되지 않았으면 ValueError (hybrid 검색을 쓰지 않으면 HYBRID_SEARCH_ENABLED=false).
+        """
+        if not self.manifest_path:
+            raise ValueError("BM25_MANIFEST_PATH must point to the embedding-service ingest manifest "
+                             "(INGEST_MANIFEST_PATH) when HYBRID_SEARCH_ENABLED=true")
+        await asyncio.to_thread(self.load)
+        if not os.path.exists(self.manifest_path):
+            # lexical 검색 결과가 없으면 hybrid 검색이 dense 검색과 같아지므로 분명하게 남김
+            logger.warning("BM25 manifest %s does not exist, lexical search returns nothing until "
+                           "embedding-service creates it", self.manifest_path)
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._manifest_connection is not None:
+            self._manifest_connection.close()
+            self._manifest_connection = None
+
+    def stats(self) -> dict:
+        postings = self._postings
+        return {
+            "manifestPath": self.manifest_path,
+            "manifestExists": bool(self.manifest_path) and os.path.exists(self.manifest_path),
+            "chunks": 0 if postings is None else len(postings.ids),
+            "terms": 0 if postings is None else len(postings.vocabulary),
+            "postings": 0 if postings is None else int(postings.doc_ids.size),
+        }
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.load)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.warning("BM25 index reload failed: %s", ex)
+
+
+bm25_index = BM25Index()
+
+__all__ = ["bm25_index", "BM25Index"]
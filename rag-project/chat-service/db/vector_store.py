@@ -0,0 +1,722 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from utils.metadata_filter_util import MetadataFilterUtil
+from utils.vector_quantization_util import VectorQuantizationUtil
+
+logger = logging.getLogger("uvicorn.error")
+
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")  # pinecone / local / fake
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "local_vector_store")
+LOCAL_INDEX_TYPE = os.getenv("LOCAL_INDEX_TYPE", "auto")  # auto / flat / ivf
+LOCAL_IVF_MIN_ROWS = int(os.getenv("LOCAL_IVF_MIN_ROWS", "50000"))
+LOCAL_IVF_NPROBE = int(os.getenv("LOCAL_IVF_NPROBE", "8"))
+LOCAL_VECTOR_QUANTIZATION = os.getenv("LOCAL_VECTOR_QUANTIZATION", "none")  # none / int8
+# 변경 로그가 저장된 row 수의 이 비율 (최소 LOCAL_CHECKPOINT_MIN_ROWS) 을 넘으면 전체 파일을 다시 씀
+LOCAL_CHECKPOINT_RATIO = float(os.getenv("LOCAL_CHECKPOINT_RATIO", "0.25"))
+LOCAL_CHECKPOINT_MIN_ROWS = int(os.getenv("LOCAL_CHECKPOINT_MIN_ROWS", "10000"))
+# fake backend (Pinecone 없이 upsert 경로 실험 / 테스트) 의 지연 / 실패 주입
+FAKE_INDEX_FAILURE_RATE = float(os.getenv("FAKE_INDEX_FAILURE_RATE", "0"))
+FAKE_INDEX_LATENCY_MS = float(os.getenv("FAKE_INDEX_LATENCY_MS", "0"))
+
+
+class VectorStore:
+    """
+    벡터 저장소 인터페이스. Pinecone Index 와 같은 메서드 이름 / 반환 형태를 사용.
+    """
+
+    def upsert(self, vectors: list, **kwargs):
+        raise NotImplementedError
+
+    def query(self, vector: list, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        """
+        :return: {"matches": [{"id", "score", "metadata"}, ...]}
+        """
+        raise NotImplementedError
+
+    def delete(self, ids: list, **kwargs):
+        raise NotImplementedError
+
+    def describe_index_stats(self, **kwargs):
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        bulk upsert / delete 후 호출. 저장이 필요한 backend 만 구현.
+        """
+
+    async def aquery(self, vector: list, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        """
+        async handler 용 query. 기본 구현은 worker thread 에서 query 실행.
+        """
+        return await asyncio.to_thread(
+            self.query, vector=vector, top_k=top_k, include_metadata=include_metadata, filter=filter, **kwargs
+        )
+
+    async def aupsert(self, vectors: list, **kwargs):
+        return await asyncio.to_thread(self.upsert, vectors=vectors, **kwargs)
+
+    async def start(self):
+        """
+        lifespan 시작 시 호출.
+        """
+
+    async def close(self):
+        """
+        lifespan 종료 시 호출.
+        """
+
+    def stats(self) -> dict:
+        return {}
+
+
+class PineconeVectorStore(VectorStore):
+    """
+    Pinecone 위임. 동기 호출은 Index 를 직접, async 호출은 AsyncPineconeClient 를 사용.
+    query 결과 (QueryResponse / ScoredVector 모델 객체) 는 다른 backend 와 같은 dict 로 변환해서 반환.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @property
+    def index(self):
+        return self.client.index
+
+    async def aquery(self, vector: list, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        result = await self.client.query(
+            vector=vector, top_k=top_k, include_metadata=include_metadata, filter=filter, **kwargs
+        )
+        return self._to_dict(result)
+
+    async def aupsert(self, vectors: list, **kwargs):
+        return await self.client.upsert(vectors=vectors, **kwargs)
+
+    async def start(self):
+        self.client.start_health_check()
+
+    async def close(self):
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return self.client.stats()
+
+    def upsert(self, vectors: list, **kwargs):
+        return self.index.upsert(vectors=vectors, **kwargs)
+
+    def query(self, vector: list, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        result = self.index.query(vector=vector, top_k=top_k, include_metadata=include_metadata, filter=filter, **kwargs)
+        return self._to_dict(result)
+
+    def delete(self, ids: list, **kwargs):
+        return self.index.delete(ids=ids, **kwargs)
+
+    def describe_index_stats(self, **kwargs):
+        return self.index.describe_index_stats(**kwargs)
+
+    @staticmethod
+    def _to_dict(result) -> dict:
+        """
+        QueryResponse -> {"matches": [{"id", "score", "metadata"}, ...]}. 이후 단계 (RRF / rerank) 는 dict 만 다룸.
+        """
+        if hasattr(result, "to_dict"):
+            result = result.to_dict()
+        return {
+            **result,
+            "matches": [
+                {"id": match["id"], "score": match.get("score"), "metadata": match.get("metadata") or {}}
+                for match in result.get("matches") or []
+            ],
+        }
+
+
+class LocalVectorStore(VectorStore):
+    """
+    프로세스 내 벡터 저장소 (cosine 유사도).
+    작은 corpus 는 NumPy brute-force, 큰 corpus 는 IVF (k-means coarse quantizer) 근사 검색.
+    int8 quantization 을 켜면 벡터를 row 별 scale + int8 로 보관해서 메모리 / 파일 크기를 약 1/4 로 줄임.
+    {path}.npy (+ int8 이면 {path}.scales.npy) + {path}.meta.jsonl 에 checkpoint 를 저장하고,
+    그 이후의 upsert / delete 는 {path}.log.jsonl 에 append (flush 마다 전체 파일을 다시 쓰지 않음).
+    로그가 커지거나 close 할 때 checkpoint. 다른 프로세스는 checkpoint 가 바뀌면 다시 로드하고, 로그는 늘어난 부분만 반영.
+    """
+
+    def __init__(self, path: str = LOCAL_VECTOR_STORE_PATH, index_type: str = LOCAL_INDEX_TYPE,
+                 ivf_min_rows: int = LOCAL_IVF_MIN_ROWS, nprobe: int = LOCAL_IVF_NPROBE,
+                 quantization: str = LOCAL_VECTOR_QUANTIZATION):
+        """
+        :param path: 확장자를 제외한 저장 경로. 빈 문자열이면 메모리에만 유지
+        :param index_type: flat / ivf / auto (ivf_min_rows 이상이면 ivf)
+        :param ivf_min_rows: auto 일 때 IVF 를 사용하기 시작하는 row 수
+        :param nprobe: IVF 검색 시 조회할 cluster 수
+        :param quantization: none / int8
+        """
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown vector quantization: {quantization}")
+        self.path = path
+        self.index_type = index_type
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self._lock = threading.RLock()
+        self._reset()
+
+        self._loaded_mtime = None
+        self._last_refresh_check = 0.0
+        # 변경 로그: 반영한 byte 위치 / checkpoint 이후 row 수 / 이 프로세스가 쓴 변경이 있는지
+        self._log_file = None
+        self._log_offset = 0
+        self._log_rows = 0
+        self._dirty = False
+        if path and (os.path.exists(self._meta_path) or os.path.exists(self._log_path)):
+            self._load()
+
+    @property
+    def _matrix_path(self) -> str:
+        return f"{self.path}.npy"
+
+    @property
+    def _meta_path(self) -> str:
+        return f"{self.path}.meta.jsonl"
+
+    @property
+    def _scales_path(self) -> str:
+        return f"{self.path}.scales.npy"
+
+    @property
+    def _log_path(self) -> str:
+        return f"{self.path}.log.jsonl"
+
+    def upsert(self, vectors: list, **kwargs):
+        if not vectors:
+            return {"upserted_count": 0}
+        with self._lock:
+            self._apply_upsert(vectors)
+            self._append_log({"op": "upsert", "id": vector["id"], "values": list(map(float, vector["values"])),
+                              "metadata": vector.get("metadata", {})} for vector in vectors)
+        return {"upserted_count": len(vectors)}
+
+    def _apply_upsert(self, vectors: list):
+        values = self._normalize(np.asarray([vector["values"] for vector in vectors], dtype=np.float32))
+        scales = None
+        if self.quantization == "int8":
+            values, scales = VectorQuantizationUtil.quantize_int8(values)
+        with self._lock:
+            if self._matrix is not None and values.shape[1] != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Vector dimension {values.shape[1]} does not match store dimension {self._matrix.shape[1]}"
+                )
+            self._reserve(len(vectors), values.shape[1])
+            for i, (vector, row_values) in enumerate(zip(vectors, values)):
+                previous = self._rows.get(vector["id"])
+                if previous is not None:
+                    self._deleted[previous] = True
+
+                row = self._size
+                self._matrix[row] = row_values
+                if scales is not None:
+                    self._scales[row] = scales[i]
+                self._deleted[row] = False
+                self._ids.append(vector["id"])
+                self._metadata.append(vector.get("metadata", {}))
+                self._rows[vector["id"]] = row
+                self._size += 1
+            self._columns.clear()
+
+    def delete(self, ids: list = None, delete_all: bool = False, **kwargs):
+        with self._lock:
+            self._apply_delete(ids, delete_all)
+            if delete_all:
+                self._append_log([{"op": "delete_all"}])
+            elif ids:
+                self._append_log([{"op": "delete", "ids": list(ids)}])
+        return {}
+
+    def _apply_delete(self, ids: list = None, delete_all: bool = False):
+        if delete_all:
+            self._reset()
+            return
+        for vector_id in ids or []:
+            row = self._rows.pop(vector_id, None)
+            if row is not None:
+                self._deleted[row] = True
+
+    def query(self, vector: list, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        self.refresh()
+        query = self._normalize(np.asarray(vector, dtype=np.float32)[None, :])[0]
+
+        with self._lock:
+            if self._size == 0:
+                return {"matches": []}
+
+            if self._use_ivf():
+                # probe 한 cluster 의 row 안에서만 삭제 / filter 조건 확인
+                candidates = self._candidates(query)
+                live = ~self._deleted[candidates]
+                if filter:
+                    live &= self._filter_mask(filter)[candidates]
+                candidates = candidates[live]
+                count = candidates.size
+                if count:
+                    scores = self._scores(candidates, query)
+            else:
+                # flat 검색은 행렬 view 로 전체 점수를 한 번 계산하고, 삭제 / filter 된 row 는 -inf 로 제외
+                # (filter 에 맞는 row 를 fancy index 로 복사하지 않음)
+                candidates = None
+                live = ~self._deleted[:self._size]
+                if filter:
+                    live &= self._filter_mask(filter)
+                count = int(np.count_nonzero(live))
+                if count:
+                    scores = self._scores(slice(0, self._size), query)
+                    scores[~live] = -np.inf
+            if count == 0:
+                return {"matches": []}
+            k = min(top_k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            matches = []
+            for position in top:
+                row = position if candidates is None else candidates[position]
+                match = {"id": self._ids[row], "score": float(scores[position])}
+                if include_metadata:
+                    match["metadata"] = self._metadata[row]
+                matches.append(match)
+        return {"matches": matches}
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            return {
+                "dimension": 0 if self._matrix is None else int(self._matrix.shape[1]),
+                "total_vector_count": len(self._rows),
+                "index_type": "ivf" if self._centroids is not None else "flat",
+                "quantization": self.quantization,
+                "matrix_bytes": 0 if self._matrix is None else int(
+                    self._size * (self._matrix.itemsize * self._matrix.shape[1] + (4 if self._scales is not None else 0))
+                ),
+            }
+
+    def stats(self) -> dict:
+        return self.describe_index_stats()
+
+    def flush(self):
+        """
+        bulk upsert / delete 후 호출. 변경 로그를 디스크에 내보내고, 로그가 커졌으면 checkpoint.
+        """
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.flush()
+            if self._log_rows > max(LOCAL_CHECKPOINT_MIN_ROWS, len(self._rows) * LOCAL_CHECKPOINT_RATIO):
+                self.checkpoint()
+
+    def checkpoint(self):
+        """
+        삭제된 row 를 정리하고 전체 상태를 저장한 뒤 변경 로그를 비움.
+        """
+        with self._lock:
+            self._compact()
+            if not self.path:
+                return
+            matrix = self._matrix[:self._size] if self._matrix is not None else np.zeros((0, 0), dtype=np.float32)
+            np.save(self._matrix_path + ".tmp.npy", matrix)
+            if self._scales is not None:
+                np.save(self._scales_path + ".tmp.npy", self._scales[:self._size])
+            with open(self._meta_path + ".tmp", "w", encoding="utf-8") as f:
+                for vector_id, metadata in zip(self._ids, self._metadata):
+                    f.write(json.dumps({"id": vector_id, "metadata": metadata}, ensure_ascii=False, separators=(",", ":")))
+                    f.write("\n")
+            # 읽는 쪽이 중간 상태를 보지 않도록 rename 으로 교체 (meta 를 마지막에 교체)
+            os.replace(self._matrix_path + ".tmp.npy", self._matrix_path)
+            if self._scales is not None:
+                os.replace(self._scales_path + ".tmp.npy", self._scales_path)
+            os.replace(self._meta_path + ".tmp", self._meta_path)
+            self._loaded_mtime = os.path.getmtime(self._meta_path)
+
+            # 로그 내용은 모두 checkpoint 에 반영됨. 읽는 쪽이 새 checkpoint 와 이전 로그를 함께 보더라도
+            # 로그를 순서대로 다시 적용한 결과는 같음
+            self._close_log()
+            with open(self._log_path + ".tmp", "wb"):
+                pass
+            os.replace(self._log_path + ".tmp", self._log_path)
+            self._log_offset = 0
+            self._log_rows = 0
+            self._dirty = False
+
+    async def close(self):
+        # 이 프로세스가 쓴 변경이 로그에만 있으면 checkpoint
+        if self._dirty:
+            await asyncio.to_thread(self.checkpoint)
+        with self._lock:
+            self._close_log()
+
+    def refresh(self, min_interval: float = 1.0):
+        """
+        다른 프로세스(embedding-service)가 저장한 파일이 바뀌었으면 반영.
+        checkpoint 가 바뀌었으면 다시 로드하고, 로그만 늘어났으면 늘어난 부분만 적용.
+        """
+        if not self.path or time.time() - self._last_refresh_check < min_interval:
+            return
+        self._last_refresh_check = time.time()
+        try:
+            mtime = os.path.getmtime(self._meta_path)
+        except OSError:
+            mtime = None
+        try:
+            log_size = os.path.getsize(self._log_path)
+        except OSError:
+            log_size = 0
+
+        if mtime != self._loaded_mtime or log_size < self._log_offset:
+            self._load()
+        elif log_size > self._log_offset:
+            with self._lock:
+                self._replay_log()
+
+    def _reset(self):
+        self._matrix = None
+        self._scales = None
+        self._deleted = np.zeros(0, dtype=bool)
+        self._ids = []
+        self._metadata = []
+        self._rows = {}
+        self._size = 0
+        self._columns = {}
+        self._centroids = None
+        self._ivf_lists = None
+        self._ivf_rows = 0
+
+    def _load(self):
+        with self._lock:
+            self._close_log()
+            self._reset()
+            self._loaded_mtime = None
+            if os.path.exists(self._meta_path):
+                matrix = np.load(self._matrix_path)
+                with open(self._meta_path, "r", encoding="utf-8") as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+
+                if entries:
+                    self._set_matrix(matrix)
+                    self._deleted = np.zeros(len(entries), dtype=bool)
+                    self._ids = [entry["id"] for entry in entries]
+                    self._metadata = [entry["metadata"] for entry in entries]
+                    self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+                    self._size = len(entries)
+                self._loaded_mtime = os.path.getmtime(self._meta_path)
+            self._log_offset = 0
+            self._log_rows = 0
+            self._replay_log()
+            logger.info("LocalVectorStore loaded: %s (%d vectors, %d logged changes)",
+                        self.path, len(self._rows), self._log_rows)
+
+    def _append_log(self, entries):
+        """
+        변경 내용을 로그 파일에 append (메모리 전용 store 는 기록하지 않음).
+        """
+        if not self.path:
+            return
+        if self._log_file is None:
+            self._log_file = open(self._log_path, "ab")
+        for entry in entries:
+            line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            self._log_file.write(line)
+            self._log_offset += len(line)
+            self._log_rows += len(entry["ids"]) if entry["op"] == "delete" else 1
+        self._dirty = True
+
+    def _replay_log(self):
+        """
+        _log_offset 이후의 로그 적용. 아직 다 쓰지 않은 마지막 줄은 다음 refresh 때 적용.
+        """
+        try:
+            with open(self._log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except OSError:
+            return
+        complete = data.rfind(b"\n") + 1
+        vectors = []
+        for line in data[:complete].splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["op"] == "upsert":
+                vectors.append(entry)
+                continue
+            # 순서를 지키기 위해 delete 전에 모아둔 upsert 먼저 적용
+            if vectors:
+                self._apply_upsert(vectors)
+                self._log_rows += len(vectors)
+                vectors = []
+            self._apply_delete(entry.get("ids"), entry["op"] == "delete_all")
+            self._log_rows += len(entry.get("ids") or [None])
+        if vectors:
+            self._apply_upsert(vectors)
+            self._log_rows += len(vectors)
+        self._log_offset += complete
+
+    def _close_log(self):
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    def _set_matrix(self, matrix: np.ndarray):
+        """
+        파일에서 읽은 행렬을 현재 quantization 설정에 맞춰 보관 (저장한 쪽과 설정이 달라도 로드 가능).
+        """
+        if matrix.dtype == np.int8:
+            scales = np.load(self._scales_path)
+            if self.quantization == "int8":
+                self._matrix, self._scales = np.ascontiguousarray(matrix), scales.astype(np.float32)
+            else:
+                self._matrix = VectorQuantizationUtil.dequantize_int8(matrix, scales)
+        elif self.quantization == "int8":
+            self._matrix, self._scales = VectorQuantizationUtil.quantize_int8(matrix)
+        else:
+            self._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def _reserve(self, count: int, dimension: int):
+        dtype = np.int8 if self.quantization == "int8" else np.float32
+        if self._matrix is None:
+            capacity = max(1024, count)
+            self._matrix = np.zeros((capacity, dimension), dtype=dtype)
+            self._deleted = np.ones(capacity, dtype=bool)
+            if self.quantization == "int8":
+                self._scales = np.zeros(capacity, dtype=np.float32)
+        elif self._size + count > self._matrix.shape[0]:
+            # capacity 2배씩 확장
+            capacity = max(self._matrix.shape[0] * 2, self._size + count)
+            matrix = np.zeros((capacity, dimension), dtype=dtype)
+            matrix[:self._size] = self._matrix[:self._size]
+            deleted = np.ones(capacity, dtype=bool)
+            deleted[:self._size] = self._deleted[:self._size]
+            self._matrix = matrix
+            self._deleted = deleted
+            if self._scales is not None:
+                scales = np.zeros(capacity, dtype=np.float32)
+                scales[:self._size] = self._scales[:self._size]
+                self._scales = scales
+
+    def _compact(self):
+        if self._size == 0:
+            return
+        keep = np.flatnonzero(~self._deleted[:self._size])
+        if keep.size == self._size:
+            return
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        self._deleted = np.zeros(keep.size, dtype=bool)
+        self._ids = [self._ids[row] for row in keep]
+        self._metadata = [self._metadata[row] for row in keep]
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        self._size = keep.size
+        self._columns.clear()
+        self._centroids = None
+        self._ivf_lists = None
+        self._ivf_rows = 0
+
+    def _dense(self, rows) -> np.ndarray:
+        """
+        rows (index 배열 또는 slice) 의 float32 벡터. int8 이면 dequantize.
+        """
+        if self._scales is None:
+            return self._matrix[rows]
+        return VectorQuantizationUtil.dequantize_int8(self._matrix[rows], self._scales[rows])
+
+    def _scores(self, rows, query: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """
+        rows (index 배열 또는 slice) 의 점수. slice 면 행렬 view 에서 바로 계산.
+        """
+        if self._scales is None:
+            return self._matrix[rows] @ query
+        # int8 -> float32 변환 임시 메모리를 block 크기로 제한하고, 내적 후 row scale 곱
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(self._size)
+            blocks = [slice(offset, min(offset + block_size, stop)) for offset in range(start, stop, block_size)]
+        else:
+            blocks = [rows[offset:offset + block_size] for offset in range(0, rows.size, block_size)]
+        scores = np.empty(sum(len(self._scales[block]) for block in blocks), dtype=np.float32)
+        offset = 0
+        for block in blocks:
+            block_scores = (self._matrix[block].astype(np.float32) @ query) * self._scales[block]
+            scores[offset:offset + len(block_scores)] = block_scores
+            offset += len(block_scores)
+        return scores
+
+    def _use_ivf(self) -> bool:
+        if self.index_type == "ivf":
+            return True
+        return self.index_type == "auto" and self._size >= self.ivf_min_rows
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        # 마지막 build 이후 50% 이상 늘어나면 다시 build
+        if self._centroids is None or self._size > self._ivf_rows * 1.5:
+            self._build_ivf()
+
+        centroid_scores = self._centroids @ query
+        nprobe = min(self.nprobe, len(self._ivf_lists))
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        # build 이후 추가된 row 는 전부 확인
+        tail = np.arange(self._ivf_rows, self._size)
+        return np.concatenate([self._ivf_lists[probe] for probe in probes] + [tail])
+
+    def _build_ivf(self, iterations: int = 10, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        nlist = max(1, int(np.sqrt(self._size)))
+
+        sample = self._dense(rng.choice(self._size, min(self._size, nlist * 64), replace=False))
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = self._normalize(sums[filled])
+
+        labels = np.empty(self._size, dtype=np.int64)
+        for start in range(0, self._size, 65536):
+            block = self._dense(slice(start, min(start + 65536, self._size)))
+            labels[start:start + 65536] = np.argmax(block @ centroids.T, axis=1)
+
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        self._centroids = centroids
+        self._ivf_lists = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+        self._ivf_rows = self._size
+        logger.info("LocalVectorStore IVF built: %d rows, %d lists", self._size, nlist)
+
+    def _filter_mask(self, filter: dict) -> np.ndarray:
+        return MetadataFilterUtil.mask(filter, self._column, self._size)
+
+    def _column(self, field: str) -> np.ndarray:
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = MetadataFilterUtil.column(self._metadata, field)
+        return column
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class FakeIndexException(Exception):
+    def __init__(self, message: str, status: int):
+        self.status = status
+        super().__init__(message)
+
+
+class FakeIndex(VectorStore):
+    """
+    Pinecone Index 대신 사용할 메모리 index (VECTOR_STORE_BACKEND=fake).
+    upsert / query / delete / describe_index_stats 만 흉내내고, 지연 / 실패를 주입할 수 있음.
+    """
+
+    def __init__(self, failure_rate: float = FAKE_INDEX_FAILURE_RATE, latency_ms: float = FAKE_INDEX_LATENCY_MS,
+                 max_request_bytes: int = 2 * 1024 * 1024, fail_calls: int = 0):
+        """
+        :param failure_rate: upsert 호출이 503 으로 실패할 확률
+        :param latency_ms: 호출당 인위적 지연
+        :param max_request_bytes: 이 크기를 넘는 upsert 는 400 으로 실패
+        :param fail_calls: 처음 N 번의 upsert 호출은 항상 503 으로 실패 (재시도 확인용)
+        """
+        self.failure_rate = failure_rate
+        self.fail_calls = fail_calls
+        self.latency_ms = latency_ms
+        self.max_request_bytes = max_request_bytes
+        self.vectors = {}
+        self.upsert_calls = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors: list, namespace: str = None):
+        self._simulate_latency()
+        with self._lock:
+            self.upsert_calls += 1
+            call_number = self.upsert_calls
+
+        payload_bytes = len(json.dumps({"vectors": vectors}, ensure_ascii=False).encode("utf-8"))
+        if payload_bytes > self.max_request_bytes:
+            raise FakeIndexException(f"Request size {payload_bytes} exceeds {self.max_request_bytes}", status=400)
+        if call_number <= self.fail_calls or random.random() < self.failure_rate:
+            raise FakeIndexException("Service unavailable", status=503)
+
+        with self._lock:
+            for vector in vectors:
+                self.vectors[vector["id"]] = vector
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: list, top_k: int = 10, include_metadata: bool = False, filter: dict = None, **kwargs):
+        self._simulate_latency()
+        with self._lock:
+            candidates = list(self.vectors.values())
+
+        query_norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        matches = []
+        for candidate in candidates:
+            if filter and not self._match_filter(candidate.get("metadata", {}), filter):
+                continue
+            values = candidate["values"]
+            norm = math.sqrt(sum(v * v for v in values)) or 1.0
+            score = sum(a * b for a, b in zip(vector, values)) / (query_norm * norm)
+            match = {"id": candidate["id"], "score": score}
+            if include_metadata:
+                match["metadata"] = candidate.get("metadata", {})
+            matches.append(match)
+
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return {"matches": matches[:top_k]}
+
+    def delete(self, ids: list, **kwargs):
+        self._simulate_latency()
+        with self._lock:
+            for vector_id in ids:
+                self.vectors.pop(vector_id, None)
+        return {}
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            return {"total_vector_count": len(self.vectors)}
+
+    def _simulate_latency(self):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    @staticmethod
+    def _match_filter(metadata: dict, filter: dict) -> bool:
+        for field, condition in filter.items():
+            value = metadata.get(field)
+            if isinstance(condition, dict):
+                if "$in" in condition and value not in condition["$in"]:
+                    return False
+                if "$eq" in condition and value != condition["$eq"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+
+def create_vector_store(backend: str = VECTOR_STORE_BACKEND) -> VectorStore:
+    if backend == "local":
+        return LocalVectorStore()
+    if backend == "pinecone":
+        from db.pinecone_client import pinecone_client
+        return PineconeVectorStore(pinecone_client)
+    if backend == "fake":
+        return FakeIndex()
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+vector_store = create_vector_store()
+
+__all__ = ["vector_store", "VectorStore", "PineconeVectorStore", "LocalVectorStore", "FakeIndex", "create_vector_store"]
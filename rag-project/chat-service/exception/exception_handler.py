@@ -1,24 +1,24 @@
 from fastapi import Request, FastAPI
-from fastapi.responses import JSONResponse
 from common.service_type_enum import ServiceTypeEnum
 from exception.business_exception import BusinessException
 from response.error_response import ErrorResponse
+from response.fast_json_response import FastJSONResponse, PrerenderedErrorResponse
 import logging
 from fastapi import HTTPException
 
 logger = logging.getLogger("uvicorn.error")
 
+_server_error_response = PrerenderedErrorResponse(
+    status_code=500, service_type=ServiceTypeEnum.SERVER, message="관리자 확인 필요"
+)
+
 def add_exception_handlers(app: FastAPI):
 
 
     @app.exception_handler(Exception)
     async def exception_handler(request: Request, ex: Exception):
         logger.warning("Unhandled Exception", exc_info=ex)
-        error_response = ErrorResponse.with_message(
-            service_type=ServiceTypeEnum.SERVER,
-            message="관리자 확인 필요"
-        )
-        return JSONResponse(status_code=500, content=error_response.dict())
+        return _server_error_response()
 
     
     @app.exception_handler(BusinessException)
@@ -28,6 +28,6 @@ def add_exception_handlers(app: FastAPI):
             service_type=ex.service_type,
             message=ex.message
         )
-        return JSONResponse(status_code=401, content=error_response.dict())
+        return FastJSONResponse(status_code=401, content=error_response)
 
 
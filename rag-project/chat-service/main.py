@@ -1,15 +1,80 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from contextlib import asynccontextmanager, aclosing
+from typing import List, Optional
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
 
+from cache.embedding_cache import EmbeddingCache
+from cache.semantic_cache import SemanticCache
 from common.service_type_enum import ServiceTypeEnum
 from exception.exception_handler import add_exception_handlers
+from model.embedding_batcher import EmbeddingBatcher
+from model.llm_backend import llm_backend
+from model.model_registry import model_registry, EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+from model.reranker import CrossEncoderReranker
+from model.vector_compressor import vector_compressor
+from response.error_response import ErrorResponse
+from response.fast_json_response import FastJSONResponse, FastResponseRoute
 from response.success_response import SuccessResponse
 from security.security_config import GlobalAuthMiddleware
-from db.pinecone_client import index
+from db.bm25_index import bm25_index
+from db.vector_store import vector_store
+from utils.prompt_builder import prompt_builder
+from utils.rank_fusion_util import RankFusionUtil
+from utils.sse_util import SseUtil
+
+logger = logging.getLogger("uvicorn.error")
+
+# onnx-int8 벡터는 torch 결과와 조금 다르므로 backend 별로 캐시 key 분리 (torch 는 기존 key 유지)
+embedding_cache = EmbeddingCache(
+    model_name=EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"
+)
+embedding_batcher = EmbeddingBatcher(model_provider=model_registry.get, cache=embedding_cache,
+                                     compressor=vector_compressor)
+semantic_cache = SemanticCache()
+reranker = CrossEncoderReranker()
+
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+# 1차 검색(dense / BM25 각각 + fusion 결과)에서 가져올 후보 수
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "50"))
+# rerank 후 프롬프트에 넣을 chunk 수
+RETRIEVAL_TOP_N = int(os.getenv("RETRIEVAL_TOP_N", "5"))
+# /ask/batch: 한 번에 임베딩할 질문 수 / 동시에 검색, 답변 생성할 질문 수
+ASK_BATCH_ENCODE_SIZE = int(os.getenv("ASK_BATCH_ENCODE_SIZE", "256"))
+ASK_BATCH_CONCURRENCY = int(os.getenv("ASK_BATCH_CONCURRENCY", "32"))
+
+ASK_CATEGORIES = ["news", "blog"]
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 임베딩 모델은 서버 시작 시 1회만 로드
+    model_registry.warm_up()
+    if RERANK_ENABLED:
+        reranker.warm_up()
+    embedding_batcher.start()
+    await vector_store.start()
+    await llm_backend.start()
+    if HYBRID_SEARCH_ENABLED:
+        await bm25_index.start()
+    yield
+    await embedding_batcher.stop()
+    await vector_store.close()
+    await bm25_index.close()
+    await llm_backend.close()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.router.route_class = FastResponseRoute
 add_exception_handlers(app)
 app.add_middleware(GlobalAuthMiddleware)
 
@@ -24,64 +89,228 @@ app.add_middleware(
 
 class QuestionRequest(BaseModel):
     question: str
+    rerankBudgetMs: Optional[float] = None
+    stream: bool = True
+
+
+class CacheInvalidateRequest(BaseModel):
+    categories: Optional[List[str]] = None
+
+
+@app.get("/metrics")
+async def metrics():
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data={
+            "models": model_registry.stats(),
+            "embeddingBatcher": embedding_batcher.stats(),
+            "vectorCompressor": vector_compressor.stats(),
+            "embeddingCache": embedding_cache.stats(),
+            "semanticCache": semantic_cache.stats(),
+            "vectorStore": vector_store.stats(),
+            "bm25Index": bm25_index.stats(),
+            "reranker": reranker.stats(),
+            "llmBackend": llm_backend.stats(),
+        }
+    )
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(req: CacheInvalidateRequest):
+    # embedding-service 가 새 벡터를 upsert 하면 해당 category 의 캐시 제거
+    removed = semantic_cache.invalidate(req.categories)
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data={"removed": removed}
+    )
 
-@app.post("/ask")
-async def ask_question(req: QuestionRequest):
 
-    # [1] 질문 임베딩
-    model = SentenceTransformer('jhgan/ko-sroberta-multitask')  # 한국어 예시 모델
-    embedding = model.encode(req.question)
-    embedding_list = embedding.tolist()
+async def search_candidates(question: str, embedding_list: list, categories: list) -> list:
+    search_filter = {
+        "category": {"$in": categories}
+    }
 
-    # [2] Pinecone에서 검색
-    result = index.query(
+    if HYBRID_SEARCH_ENABLED:
+        # vector store (dense) 와 BM25 (lexical) 를 동시에 검색 후 reciprocal rank fusion
+        dense_result, lexical_result = await asyncio.gather(
+            vector_store.aquery(
+                vector=embedding_list,
+                top_k=RETRIEVAL_CANDIDATES,
+                include_metadata=True,
+                filter=search_filter
+            ),
+            bm25_index.aquery(
+                text=question,
+                top_k=RETRIEVAL_CANDIDATES,
+                include_metadata=True,
+                filter=search_filter
+            ),
+        )
+        return RankFusionUtil.reciprocal_rank_fusion([dense_result, lexical_result], top_k=RETRIEVAL_CANDIDATES)
+
+    # vector store (Pinecone / local) 에서 검색. event loop 를 막지 않음
+    result = await vector_store.aquery(
         vector=embedding_list,
-        top_k=5,
+        top_k=RETRIEVAL_CANDIDATES,
         include_metadata=True,
-        filter={
-            "category": {"$in": ["news", "blog"]}
-        }
+        filter=search_filter
     )
 
     # matches 리스트 가져오기
-    matches = result.get('matches', [])
-
-    # text만 리스트로 추출
-    texts = [match['metadata'].get('text', '') for match in matches]
-
-    # 만약 검색 결과가 부족하면 빈 문자열로 채움
-    if len(texts) < 2:
-        texts += [""] * (2 - len(texts))
-
-    # [3] 문서 내용을 하나의 문자열로 합치기
-    document_content = "\n".join(texts)
-
-    # [4] LLM 프롬프트 생성
-    prompt = f"""
-    너는 전문 뉴스 분석가야.
-    주어진 뉴스 문서를 분석하고 아래 질문에 객관적이고 정확하게 답변해줘.
-    또한, 문서의 핵심 내용을 이해하기 쉽게 요약하고 추가 분석도 포함시켜줘.
-    
-    다음 형식을 지켜줘:
-    
-    * 요약: 문서의 핵심 내용을 한 문단으로 요약.
-    * 배경 설명: 기사의 맥락과 배경 정보를 포함.
-    * 추가 분석: 전문가 시각에서의 분석 및 의미 해석.
-    * 향후 전망: 앞으로의 영향이나 가능성.
-    
-    문서 내용:
-    {document_content}
-    
-    질문: {req.question}
-    
-    출력은 한글로 작성하고, 정보 왜곡이나 과도한 추측은 피할 것.
-    모든 답변은 간결하면서도 핵심적인 내용을 담아야 하며, 불필요한 반복은 하지 마.
+    return result.get('matches', [])
+
+
+async def search_texts(question: str, embedding_list: list, categories: list, rerank_budget_ms: float = None) -> tuple:
     """
+    후보를 넉넉히 가져온 뒤 cross-encoder 로 재정렬해서 상위 RETRIEVAL_TOP_N 개 텍스트 반환.
+    :return: (텍스트 리스트, rerank 통계 또는 None)
+    """
+    matches = await search_candidates(question, embedding_list, categories)
+
+    rerank_stats = None
+    if RERANK_ENABLED and matches:
+        matches, rerank_stats = await reranker.arerank(
+            question, matches, top_n=RETRIEVAL_TOP_N, budget_ms=rerank_budget_ms
+        )
+    else:
+        matches = matches[:RETRIEVAL_TOP_N]
 
-    # 디버깅용 출력
-    print(prompt)
+    # text만 리스트로 추출 (결과가 부족해도 빈 문자열로 채우지 않음)
+    texts = [match['metadata']['text'] for match in matches if match.get('metadata', {}).get('text')]
+    return texts, rerank_stats
 
-    return SuccessResponse.with_message(
+
+async def prepare_prompt(question: str, embedding_list: list, categories: list,
+                         rerank_budget_ms: float = None) -> tuple:
+    """
+    검색 -> rerank -> 프롬프트 생성. 비슷한 질문의 검색 결과가 캐시에 있으면 검색을 건너뜀.
+    (캐시에는 검색된 텍스트만 두고, 프롬프트는 항상 지금 질문으로 다시 생성)
+    :return: (프롬프트, 응답 헤더 dict)
+    """
+    headers = {}
+    cached = semantic_cache.get(embedding_list, categories)
+    if cached is not None:
+        prompt, _ = prompt_builder.build(question, cached["texts"])
+        return prompt, headers
+
+    # vector store 에서 검색 후 LLM 프롬프트 생성
+    texts, rerank_stats = await search_texts(question, embedding_list, categories, rerank_budget_ms)
+    prompt, _ = prompt_builder.build(question, texts)
+    semantic_cache.put(embedding_list, categories, {"texts": texts})
+
+    # 요청별 rerank 시간 (Server-Timing 헤더)
+    if rerank_stats is not None:
+        headers["Server-Timing"] = (
+            f'rerank;dur={rerank_stats["elapsedMs"]:.1f};'
+            f'desc="{rerank_stats["scored"]}/{rerank_stats["candidates"]} candidates"'
+        )
+    return prompt, headers
+
+
+async def stream_answer(request: Request, prompt: str):
+    """
+    LLM 답변을 SSE 로 전송. client 연결이 끊기면 생성 요청도 취소.
+    """
+    try:
+        async with aclosing(llm_backend.stream(prompt)) as deltas:
+            async for delta in deltas:
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, answer generation cancelled")
+                    return
+                yield SseUtil.event({"delta": delta})
+        yield SseUtil.event({}, event="done")
+    except Exception as ex:
+        logger.warning("Answer generation failed", exc_info=ex)
+        yield SseUtil.event({"message": "답변 생성에 실패했습니다."}, event="error")
+
+
+@app.post("/ask")
+async def ask_question(req: QuestionRequest, request: Request, response: Response):
+
+    # [1] 질문 임베딩 (동시 요청은 batch 로 묶어서 encode)
+    embedding_list = await embedding_batcher.encode(req.question)
+    categories = ASK_CATEGORIES
+
+    # [2] 검색 / rerank / 프롬프트 생성 (비슷한 질문이면 캐시 재사용)
+    prompt, headers = await prepare_prompt(req.question, embedding_list, categories, req.rerankBudgetMs)
+
+    # [3] LLM 답변 생성. stream 이면 생성되는 대로 SSE 로 전송
+    if req.stream:
+        return StreamingResponse(
+            stream_answer(request, prompt),
+            media_type="text/event-stream",
+            headers={**headers, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    answer = await llm_backend.complete(prompt)
+    response.headers.update(headers)
+    return SuccessResponse.with_data(
         service_type=ServiceTypeEnum.SERVER,
-        message="프롬프트 생성이 완료되었습니다."
-    )
\ No newline at end of file
+        data={"answer": answer}
+    )
+
+
+async def read_batch_questions(request: Request) -> list:
+    """
+    JSON 배열 또는 NDJSON (1줄 = QuestionRequest 1개) 본문 파싱.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    body = await request.body()
+    if content_type in NDJSON_CONTENT_TYPES:
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        items = json.loads(body)
+        if not isinstance(items, list):
+            raise ValueError("JSON 배열이어야 합니다.")
+    return [QuestionRequest.model_validate(item) for item in items]
+
+
+async def answer_batch_item(index: int, item: QuestionRequest, embedding_list: list, generate: bool) -> dict:
+    try:
+        prompt, _ = await prepare_prompt(item.question, embedding_list, ASK_CATEGORIES, item.rerankBudgetMs)
+        if not generate:
+            return {"index": index, "question": item.question, "prompt": prompt}
+        answer = await llm_backend.complete(prompt)
+        return {"index": index, "question": item.question, "answer": answer}
+    except Exception as ex:
+        logger.warning("Batch question %d failed", index, exc_info=ex)
+        return {"index": index, "question": item.question, "error": str(ex)}
+
+
+async def stream_batch_answers(items: list, generate: bool):
+    """
+    ASK_BATCH_ENCODE_SIZE 개씩 한 번에 임베딩하고, 검색 / 답변 생성은 ASK_BATCH_CONCURRENCY 개까지 동시에 실행.
+    결과는 입력 순서대로 NDJSON 한 줄씩 전송.
+    """
+    pending = deque()
+    try:
+        for chunk_start in range(0, len(items), ASK_BATCH_ENCODE_SIZE):
+            chunk = items[chunk_start:chunk_start + ASK_BATCH_ENCODE_SIZE]
+            embeddings = await embedding_batcher.encode_many([item.question for item in chunk])
+
+            for index, (item, embedding_list) in enumerate(zip(chunk, embeddings), start=chunk_start):
+                pending.append(asyncio.create_task(answer_batch_item(index, item, embedding_list, generate)))
+                if len(pending) >= ASK_BATCH_CONCURRENCY:
+                    yield json.dumps(await pending.popleft(), ensure_ascii=False) + "\n"
+
+        while pending:
+            yield json.dumps(await pending.popleft(), ensure_ascii=False) + "\n"
+    finally:
+        # client 연결이 끊기면 남은 질문 처리 취소
+        for task in pending:
+            task.cancel()
+
+
+@app.post("/ask/batch")
+async def ask_batch(request: Request, generate: bool = True):
+    # 질문 목록 (JSON 배열 또는 NDJSON). generate=false 면 답변 대신 프롬프트만 반환 (검색 평가용)
+    try:
+        items = await read_batch_questions(request)
+    except ValueError as ex:
+        error_response = ErrorResponse.with_message(
+            service_type=ServiceTypeEnum.SERVER,
+            message=f"잘못된 요청 본문입니다: {ex}"
+        )
+        return FastJSONResponse(status_code=400, content=error_response)
+
+    return StreamingResponse(stream_batch_answers(items, generate), media_type="application/x-ndjson")
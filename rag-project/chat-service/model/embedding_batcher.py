@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger("uvicorn.error")
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    """
+    동시에 들어온 질문들을 모아서 한 번의 batch encode 로 처리하는 micro-batching 큐.
+    max_batch_size 만큼 모이거나 max_wait_ms 가 지나면 worker thread 에서 encode 실행.
+    """
+
+    def __init__(self, model_provider, max_batch_size: int = EMBEDDING_BATCH_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS, cache=None, compressor=None):
+        """
+        :param model_provider: encode 를 가진 모델을 반환하는 callable (ex. model_registry.get)
+        :param max_batch_size: 한 번에 encode 할 최대 질문 수
+        :param max_wait_ms: 첫 질문 이후 batch 를 채우기 위해 기다리는 최대 시간
+        :param cache: (선택) EmbeddingCache. 같은 질문은 encode 하지 않음
+        :param compressor: (선택) VectorCompressor. embedding-service 와 같은 투영을 질문 임베딩에 적용
+        """
+        self.model_provider = model_provider
+        self.cache = cache
+        self.compressor = compressor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = None
+        self._worker = None
+
+        # metrics
+        self._batch_count = 0
+        self._item_count = 0
+        self._queue_wait_ms_total = 0.0
+        self._queue_wait_ms_max = 0.0
+        self._encode_ms_total = 0.0
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+            # 아직 queue 에 남아 있는 요청은 기다리지 않도록 실패 처리
+            error = RuntimeError("EmbeddingBatcher is stopped.")
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def encode(self, text: str) -> list:
+        """
+        질문 1건 임베딩. batch 처리 결과 중 자기 몫을 돌려받음.
+        """
+        if self._worker is None:
+            raise RuntimeError("EmbeddingBatcher is not started.")
+
+        # 메모리 캐시 hit 은 queue 를 거치지 않고 바로 반환
+        if self.cache is not None:
+            cached = self.cache.get(text, memory_only=True)
+            if cached is not None:
+                return self._project([cached])[0].tolist()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def encode_many(self, texts: list) -> list:
+        """
+        이미 모여 있는 질문 여러 건 (ex. /ask/batch) 을 queue 를 거치지 않고 한 번의 batch encode 로 처리.
+        """
+        embeddings = await asyncio.to_thread(self._encode_with_cache, texts)
+        return [embedding.tolist() for embedding in self._project(embeddings)]
+
+    def stats(self) -> dict:
+        batch_count = self._batch_count or 1
+        item_count = self._item_count or 1
+        return {
+            "maxBatchSize": self.max_batch_size,
+            "maxWaitMs": self.max_wait_ms,
+            "batchCount": self._batch_count,
+            "itemCount": self._item_count,
+            "avgBatchFill": round(self._item_count / batch_count / self.max_batch_size, 4),
+            "avgQueueWaitMs": round(self._queue_wait_ms_total / item_count, 3),
+            "maxQueueWaitMs": round(self._queue_wait_ms_max, 3),
+            "avgEncodeMs": round(self._encode_ms_total / batch_count, 3),
+        }
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+
+            try:
+                # max_batch_size 또는 max_wait_ms 까지 batch 채우기
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._encode_batch(batch)
+            except asyncio.CancelledError:
+                # stop() 으로 취소되면 이미 꺼낸 batch 도 실패 처리
+                error = RuntimeError("EmbeddingBatcher is stopped.")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                raise
+
+    async def _encode_batch(self, batch: list):
+        texts = [text for text, _, _ in batch]
+        started = time.perf_counter()
+
+        for _, _, enqueued in batch:
+            wait_ms = (started - enqueued) * 1000
+            self._queue_wait_ms_total += wait_ms
+            self._queue_wait_ms_max = max(self._queue_wait_ms_max, wait_ms)
+
+        try:
+            # event loop 를 막지 않도록 worker thread 에서 encode
+            embeddings = await asyncio.to_thread(self._encode_with_cache, texts)
+            # 투영 오류 (ex. 차원 불일치) 도 같은 경로로 실패 처리해야 worker 가 죽지 않음
+            embeddings = self._project(embeddings)
+        except Exception as ex:
+            logger.warning("Batch encode failed", exc_info=ex)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+
+        self._batch_count += 1
+        self._item_count += len(batch)
+        self._encode_ms_total += (time.perf_counter() - started) * 1000
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            # 클라이언트가 끊겨 취소된 요청은 건너뜀
+            if not future.done():
+                future.set_result(embedding.tolist())
+
+    def _encode_with_cache(self, texts: list) -> list:
+        """
+        디스크 캐시까지 확인하고 miss 난 질문만 encode.
+        """
+        embeddings = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            model = self.model_provider()
+            missing_texts = [texts[i] for i in missing]
+            encoded = model.encode(missing_texts, batch_size=len(missing_texts))
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+            if self.cache is not None:
+                self.cache.put_many(missing_texts, encoded)
+
+        return embeddings
+
+    def _project(self, embeddings: list):
+        """
+        캐시에는 원본 차원을 두고, 반환 직전에 축소 차원으로 투영.
+        """
+        if self.compressor is None or not self.compressor.enabled:
+            return embeddings
+        return self.compressor.project(np.stack(embeddings))
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+
+import httpx
+
+logger = logging.getLogger("uvicorn.error")
+
+# openai / echo. echo 는 프롬프트(검색된 문서 포함)를 그대로 돌려주므로 테스트에서만 LLM_BACKEND=echo 로 지정
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+# OpenAI 호환 서버 (OpenAI, vLLM, Ollama 등). openai backend 에서는 필수 (기본값이 서비스 자신의 포트와 겹치지 않도록 비워둠)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "1024"))
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_ECHO_DELAY_MS = float(os.getenv("LLM_ECHO_DELAY_MS", "0"))
+
+_ECHO_TOKEN_PATTERN = re.compile(r'\S+\s*|\s+')
+
+
+class LLMBackend:
+    """
+    LLM 답변 생성 인터페이스. 구현체는 _stream 만 작성.
+    동시에 생성 중인 요청 수를 max_concurrency 로 제한하고, 첫 token 까지 걸린 시간을 기록.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+        # metrics
+        self.in_flight = 0
+        self.waiting = 0
+        self._request_count = 0
+        self._cancelled_count = 0
+        self._error_count = 0
+        self._first_token_ms_total = 0.0
+
+    async def stream(self, prompt: str):
+        """
+        답변을 생성되는 대로 조각(str) 단위로 반환하는 async generator.
+        소비하는 쪽이 중간에 멈추면(client 연결 종료 등) 생성 요청도 취소됨.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self._request_count += 1
+        started = time.perf_counter()
+        first_token = True
+        try:
+            async for delta in self._stream(prompt):
+                if first_token:
+                    first_token = False
+                    self._first_token_ms_total += (time.perf_counter() - started) * 1000
+                yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            self._cancelled_count += 1
+            raise
+        except Exception:
+            self._error_count += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def complete(self, prompt: str) -> str:
+        """
+        stream 결과를 모두 모아서 반환.
+        """
+        return "".join([delta async for delta in self.stream(prompt)])
+
+    async def start(self):
+        """
+        lifespan 시작 시 호출.
+        """
+
+    async def close(self):
+        """
+        lifespan 종료 시 호출.
+        """
+
+    def stats(self) -> dict:
+        requests = self._request_count
+        return {
+            "backend": type(self).__name__,
+            "maxConcurrency": self.max_concurrency,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": requests,
+            "cancelled": self._cancelled_count,
+            "errors": self._error_count,
+            "avgFirstTokenMs": round(self._first_token_ms_total / requests, 3) if requests else 0.0,
+        }
+
+    async def _stream(self, prompt: str):
+        raise NotImplementedError
+        yield
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    OpenAI 호환 /chat/completions (stream=true) 서버 호출.
+    """
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: str = LLM_API_KEY, model: str = LLM_MODEL,
+                 max_tokens: int = LLM_MAX_TOKENS, temperature: float = LLM_TEMPERATURE,
+                 timeout_seconds: float = LLM_TIMEOUT_SECONDS, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        """
+        :param base_url: ex. https://api.openai.com/v1, http://vllm:8000/v1. 비어 있으면 start() 에서 ValueError
+        :param timeout_seconds: 연결 / token 사이 대기 timeout
+        """
+        super().__init__(max_concurrency=max_concurrency)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout_seconds = timeout_seconds
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+        return self._client
+
+    async def start(self):
+        # 설정 없이 뜨면 첫 /ask 에서야 실패하므로 서버 시작 시 바로 실패
+        if not self.base_url:
+            raise ValueError("LLM_BASE_URL is required for LLM_BACKEND=openai (ex. https://api.openai.com/v1)")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {**super().stats(), "baseUrl": self.base_url, "model": self.model}
+
+    async def _stream(self, prompt: str):
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        # async with 를 벗어나면 (취소 포함) 연결을 닫아서 서버 쪽 생성도 중단됨
+        async with self.client.stream("POST", "/chat/completions", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    yield delta
+
+
+class EchoBackend(LLMBackend):
+    """
+    LLM 서버 없이 사용하는 테스트용 backend. 프롬프트를 단어 단위로 그대로 돌려줌.
+    """
+
+    def __init__(self, delay_ms: float = LLM_ECHO_DELAY_MS, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        """
+        :param delay_ms: 조각 사이 인위적 지연 (token 생성 속도 흉내)
+        """
+        super().__init__(max_concurrency=max_concurrency)
+        self.delay_ms = delay_ms
+
+    async def _stream(self, prompt: str):
+        for token in _ECHO_TOKEN_PATTERN.findall(prompt):
+            if self.delay_ms > 0:
+                await asyncio.sleep(self.delay_ms / 1000)
+            yield token
+
+
+def create_llm_backend(backend: str = LLM_BACKEND) -> LLMBackend:
+    if backend == "openai":
+        return OpenAICompatibleBackend()
+    if backend == "echo":
+        return EchoBackend()
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+
+llm_backend = create_llm_backend()
+
+__all__ = ["llm_backend", "LLMBackend", "OpenAICompatibleBackend", "EchoBackend", "create_llm_backend"]
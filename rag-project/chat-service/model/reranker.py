@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from sentence_transformers import CrossEncoder
+
+logger = logging.getLogger("uvicorn.error")
+
+# CPU 에서도 budget 안에 채점할 수 있는 작은 다국어(한국어 포함) cross-encoder.
+# GPU 가 있으면 BAAI/bge-reranker-v2-m3 처럼 큰 모델로 바꿔서 사용
+RERANKER_MODEL_NAME = os.getenv("RERANKER_MODEL_NAME", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANKER_DEVICE = os.getenv("RERANKER_DEVICE", os.getenv("EMBEDDING_DEVICE", "cpu"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "200"))
+RERANK_MIN_CANDIDATES = int(os.getenv("RERANK_MIN_CANDIDATES", "8"))
+
+
+class CrossEncoderReranker:
+    """
+    (질문, chunk) 쌍을 cross-encoder 로 batch 채점해서 재정렬.
+    요청별 latency budget 안에서 채점할 수 있는 후보 수를 최근 pair 당 채점 시간으로 추정해서 미리 줄이고,
+    채점 중 budget 을 넘기면 남은 batch 는 1차 검색 순서 그대로 뒤에 붙임.
+    budget 으로 min_candidates 개도 채점할 수 없으면 rerank 하지 않고 1차 검색 순서를 그대로 반환.
+    """
+
+    def __init__(self, model_name: str = RERANKER_MODEL_NAME, device: str = RERANKER_DEVICE,
+                 batch_size: int = RERANK_BATCH_SIZE, budget_ms: float = RERANK_BUDGET_MS,
+                 min_candidates: int = RERANK_MIN_CANDIDATES):
+        """
+        :param model_name: HuggingFace cross-encoder 모델 이름
+        :param device: cpu / cuda / mps
+        :param batch_size: 한 번에 채점할 pair 수
+        :param budget_ms: 요청당 기본 rerank 시간 예산
+        :param min_candidates: rerank 할 가치가 있는 최소 후보 수. budget 이 이보다 적게 허용하면 rerank 생략
+        """
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.min_candidates = min_candidates
+
+        self._model = None
+        self._lock = threading.Lock()
+        self._ms_per_pair = None  # pair 당 채점 시간 (EWMA)
+
+        # metrics
+        self.load_seconds = None
+        self._request_count = 0
+        self._pair_count = 0
+        self._trimmed_count = 0
+        self._elapsed_ms_total = 0.0
+
+    @property
+    def model(self) -> CrossEncoder:
+        """
+        최초 사용 시 1회 로드.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+                    self.load_seconds = round(time.perf_counter() - started, 3)
+                    logger.info("Reranker loaded: %s (%s) in %.2fs", self.model_name, self.device, self.load_seconds)
+        return self._model
+
+    def warm_up(self):
+        """
+        lifespan 에서 호출. 모델 로드 + 더미 채점으로 첫 요청 지연 제거 및 채점 시간 초기값 측정.
+        """
+        self._score([("warm up", "warm up")] * self.batch_size)
+
+    def rerank(self, query: str, matches: list, top_n: int = 5, budget_ms: float = None) -> tuple:
+        """
+        :param query: 질문
+        :param matches: 1차 검색 결과 dict (순위 순) [{"id", "score", "metadata": {"text"}}]
+        :param top_n: 반환할 match 수
+        :param budget_ms: 이번 요청의 시간 예산. None 이면 기본값
+        :return: (재정렬된 match 리스트, 요청 통계 dict)
+        """
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        started = time.perf_counter()
+        matches = [match for match in matches if match.get("metadata", {}).get("text")]
+
+        # budget 안에 채점할 수 있는 후보 수만큼 미리 자름 (1차 순위가 높은 후보 우선)
+        limit = len(matches)
+        if budget_ms <= 0:
+            limit = 0
+        elif self._ms_per_pair:
+            limit = min(limit, int(budget_ms / self._ms_per_pair))
+        # budget 이 min_candidates 개도 허용하지 않으면 budget 을 지키고 rerank 생략
+        if limit < min(self.min_candidates, len(matches)):
+            limit = 0
+
+        scores = []
+        for start in range(0, limit, self.batch_size):
+            batch = matches[start:min(start + self.batch_size, limit)]
+            scores.extend(self._score([(query, match["metadata"]["text"]) for match in batch]))
+            if (time.perf_counter() - started) * 1000 >= budget_ms:
+                break
+
+        scored = sorted(
+            ({**match, "score": score} for match, score in zip(matches, scores)),
+            key=lambda match: match["score"],
+            reverse=True,
+        )
+        # 채점하지 못한 후보는 1차 검색 순서 그대로
+        reranked = (scored + matches[len(scores):])[:top_n]
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._request_count += 1
+        self._pair_count += len(scores)
+        self._trimmed_count += len(matches) - len(scores)
+        self._elapsed_ms_total += elapsed_ms
+        return reranked, {
+            "candidates": len(matches),
+            "scored": len(scores),
+            "budgetMs": budget_ms,
+            "elapsedMs": round(elapsed_ms, 3),
+        }
+
+    async def arerank(self, query: str, matches: list, top_n: int = 5, budget_ms: float = None) -> tuple:
+        return await asyncio.to_thread(self.rerank, query, matches, top_n, budget_ms)
+
+    def stats(self) -> dict:
+        requests = self._request_count
+        return {
+            "modelName": self.model_name,
+            "device": self.device,
+            "loadSeconds": self.load_seconds,
+            "budgetMs": self.budget_ms,
+            "msPerPair": None if self._ms_per_pair is None else round(self._ms_per_pair, 3),
+            "requests": requests,
+            "scoredPairs": self._pair_count,
+            "trimmedCandidates": self._trimmed_count,
+            "avgElapsedMs": round(self._elapsed_ms_total / requests, 3) if requests else 0.0,
+        }
+
+    def _score(self, pairs: list) -> list:
+        started = time.perf_counter()
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        ms_per_pair = (time.perf_counter() - started) * 1000 / len(pairs)
+        self._ms_per_pair = ms_per_pair if self._ms_per_pair is None else 0.8 * self._ms_per_pair + 0.2 * ms_per_pair
+        return [float(score) for score in scores]
+
+
+__all__ = ["CrossEncoderReranker", "RERANKER_MODEL_NAME"]
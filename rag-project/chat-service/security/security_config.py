@@ -1,24 +1,45 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from security.auth_entry_point import unauthorized_response
 
 
-class GlobalAuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class GlobalAuthMiddleware:
+    """
+    pure ASGI 인증 middleware. BaseHTTPMiddleware 처럼 요청마다 task / stream 을 감싸지 않고,
+    Request 객체도 만들지 않고 scope 의 header 를 바로 읽음 (StreamingResponse 도 그대로 전달).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/login"):
+            await self.app(scope, receive, send)
+            return
 
         # 토큰 검사
-        if request.url.path.startswith("/login"):
-            return await call_next(request)
-        # token = request.headers.get("Authorization")
+        # token = _header(scope, b"authorization")
         # if not token:
-        #     return unauthorized_response()
+        #     await unauthorized_response()(scope, receive, send)
+        #     return
 
         # User 정보
-        user_id = request.headers.get("X-User-Id", "test-user")
-        user_role = request.headers.get("X-User-Role", "test-role")
+        user_id = _header(scope, b"x-user-id", "test-user")
+        user_role = _header(scope, b"x-user-role", "test-role")
 
         if not user_id or not user_role:
-            return unauthorized_response()
+            await unauthorized_response()(scope, receive, send)
+            return
+
+        # request.state.user 로 조회됨
+        scope.setdefault("state", {})["user"] = {"user_id": user_id, "user_role": user_role}
+        await self.app(scope, receive, send)
+
 
-        request.state.user = {"user_id": user_id, "user_role": user_role}
-        return await call_next(request)
+def _header(scope, name: bytes, default: str = None) -> str:
+    """
+    :param name: 소문자 header 이름 (ASGI scope 의 header 이름은 소문자)
+    :return: 같은 이름이 여러 개면 첫 번째 값 (Request.headers.get 과 동일)
+    """
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return default
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+
+import tiktoken
+
+logger = logging.getLogger("uvicorn.error")
+
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "2000"))
+PROMPT_DEDUP_THRESHOLD = float(os.getenv("PROMPT_DEDUP_THRESHOLD", "0.8"))
+PROMPT_MIN_TRUNCATED_TOKENS = int(os.getenv("PROMPT_MIN_TRUNCATED_TOKENS", "64"))
+
+# LLM 프롬프트 템플릿 ({document_content}, {question} 위치에 값이 들어감)
+PROMPT_TEMPLATE = """
+    너는 전문 뉴스 분석가야.
+    주어진 뉴스 문서를 분석하고 아래 질문에 객관적이고 정확하게 답변해줘.
+    또한, 문서의 핵심 내용을 이해하기 쉽게 요약하고 추가 분석도 포함시켜줘.
+    
+    다음 형식을 지켜줘:
+    
+    * 요약: 문서의 핵심 내용을 한 문단으로 요약.
+    * 배경 설명: 기사의 맥락과 배경 정보를 포함.
+    * 추가 분석: 전문가 시각에서의 분석 및 의미 해석.
+    * 향후 전망: 앞으로의 영향이나 가능성.
+    
+    문서 내용:
+    {document_content}
+    
+    질문: {question}
+    
+    출력은 한글로 작성하고, 정보 왜곡이나 과도한 추측은 피할 것.
+    모든 답변은 간결하면서도 핵심적인 내용을 담아야 하며, 불필요한 반복은 하지 마.
+    """
+
+
+class PromptBuilder:
+    """
+    검색된 chunk 를 token 예산 안에 담아서 LLM 프롬프트를 만드는 클래스.
+    tokenizer 는 embedding-service 의 DocumentUtil 과 같은 tiktoken encoding 을 사용.
+    템플릿은 고정 부분으로 미리 나눠두고 고정 부분의 token 수도 한 번만 계산.
+    """
+
+    def __init__(self, max_context_tokens: int = PROMPT_CONTEXT_TOKENS, encoding_name: str = "cl100k_base",
+                 dedup_threshold: float = PROMPT_DEDUP_THRESHOLD,
+                 min_truncated_tokens: int = PROMPT_MIN_TRUNCATED_TOKENS, template: str = PROMPT_TEMPLATE):
+        """
+        :param max_context_tokens: 문서 내용에 사용할 최대 token 수
+        :param encoding_name: tiktoken encoding 이름
+        :param dedup_threshold: 이미 넣은 chunk 와 token 이 이 비율 이상 겹치면 제외
+        :param min_truncated_tokens: 남은 예산이 이 이상이면 넘치는 chunk 를 잘라서라도 넣음
+        :param template: {document_content}, {question} 을 포함한 템플릿
+        """
+        self.max_context_tokens = max_context_tokens
+        self.encoding_name = encoding_name
+        self.dedup_threshold = dedup_threshold
+        self.min_truncated_tokens = min_truncated_tokens
+
+        head, _, rest = template.partition("{document_content}")
+        middle, _, tail = rest.partition("{question}")
+        self._parts = (head, middle, tail)
+        self._parts_tokens = None
+        self._separator = "\n"
+
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def tokenizer(self):
+        """
+        최초 사용 시 tokenizer 로드 + 템플릿 고정 부분 token 수 계산.
+        """
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    tokenizer = tiktoken.get_encoding(self.encoding_name)
+                    self._parts_tokens = sum(len(tokens) for tokens in tokenizer.encode_batch(list(self._parts)))
+                    self._tokenizer = tokenizer
+        return self._tokenizer
+
+    def build(self, question: str, texts: list) -> tuple:
+        """
+        :param question: 질문
+        :param texts: 검색 순위 순 chunk 텍스트
+        :return: (프롬프트, 구성 정보 dict)
+        """
+        tokenizer = self.tokenizer
+        selected, info = self.pack(texts)
+        document_content = self._separator.join(selected)
+
+        head, middle, tail = self._parts
+        prompt = head + document_content + middle + question + tail
+        info["promptTokens"] = self._parts_tokens + info["contextTokens"] + len(tokenizer.encode(question))
+
+        logger.debug("Prompt built: %s", info)
+        logger.debug("Prompt: %s", prompt)
+        return prompt, info
+
+    def pack(self, texts: list) -> tuple:
+        """
+        중복 chunk 를 제외하고 순위 순으로 max_context_tokens 안에 들어가는 만큼 선택.
+        """
+        texts = [text for text in texts if text and text.strip()]
+        token_lists = self.tokenizer.encode_batch(texts) if texts else []
+
+        selected = []
+        selected_token_sets = []
+        used = 0
+        duplicates = 0
+        truncated = False
+
+        for text, tokens in zip(texts, token_lists):
+            token_set = set(tokens)
+            if self._is_duplicate(token_set, selected_token_sets):
+                duplicates += 1
+                continue
+
+            # chunk 사이 구분자 token 포함
+            separator_tokens = 1 if selected else 0
+            remaining = self.max_context_tokens - used - separator_tokens
+            if len(tokens) <= remaining:
+                selected.append(text)
+                selected_token_sets.append(token_set)
+                used += len(tokens) + separator_tokens
+            elif remaining >= self.min_truncated_tokens:
+                # 예산이 꽤 남았으면 잘라서 넣고 종료 (잘린 한글 byte 는 제거)
+                selected.append(self.tokenizer.decode(tokens[:remaining]).rstrip("\ufffd"))
+                used += remaining + separator_tokens
+                truncated = True
+                break
+
+        return selected, {
+            "chunks": len(selected),
+            "candidates": len(texts),
+            "duplicates": duplicates,
+            "truncated": truncated,
+            "contextTokens": used,
+        }
+
+    def _is_duplicate(self, token_set: set, selected_token_sets: list) -> bool:
+        """
+        이미 선택한 chunk 에 token 대부분이 포함되어 있으면 중복 (같은 문장을 공유하는 overlap chunk 포함).
+        """
+        if not token_set:
+            return True
+        for other in selected_token_sets:
+            if len(token_set & other) / len(token_set) >= self.dedup_threshold:
+                return True
+        return False
+
+
+prompt_builder = PromptBuilder()
+
+__all__ = ["prompt_builder", "PromptBuilder", "PROMPT_TEMPLATE"]
@@ -0,0 +1,21 @@
+class RankFusionUtil:
+
+    @staticmethod
+    def reciprocal_rank_fusion(results: list, top_k: int = 5, k: int = 60) -> list:
+        """
+        여러 검색 결과의 순위를 reciprocal rank fusion 으로 합침.
+        점수 scale 이 다른 결과(cosine / BM25)도 순위만 사용하므로 그대로 합칠 수 있음.
+        :param results: {"matches": [{"id", "score", "metadata"}, ...]} 리스트
+        :param top_k: 반환할 match 수
+        :param k: 상위 순위 가중치 완화 상수 (보통 60)
+        :return: score 가 RRF 점수인 match 리스트
+        """
+        scores = {}
+        matches = {}
+        for result in results:
+            for rank, match in enumerate(result.get("matches", [])):
+                scores[match["id"]] = scores.get(match["id"], 0.0) + 1.0 / (k + rank + 1)
+                matches.setdefault(match["id"], match)
+
+        fused = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [{**matches[match_id], "score": scores[match_id]} for match_id in fused]
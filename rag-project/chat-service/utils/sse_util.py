@@ -0,0 +1,16 @@
+import json
+
+
+class SseUtil:
+
+    @staticmethod
+    def event(data: dict, event: str = None) -> str:
+        """
+        Server-Sent Events 메시지 1개.
+        :param data: JSON 으로 보낼 값
+        :param event: 이벤트 이름 (없으면 기본 message 이벤트)
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        if event:
+            return f"event: {event}\ndata: {payload}\n\n"
+        return f"data: {payload}\n\n"
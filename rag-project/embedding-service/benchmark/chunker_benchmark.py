@@ -0,0 +1,91 @@
+"""
+DocumentUtil chunking 처리량 측정.
+
+    python -m benchmark.chunker_benchmark --size-mb 5
+    python -m benchmark.chunker_benchmark --korean ko_corpus.txt --english en_corpus.txt
+"""
+import argparse
+import random
+import time
+
+from utils.document_util import DocumentUtil
+
+KOREAN_WORDS = ["정부는", "오늘", "발표한", "경제", "정책에서", "금리를", "동결하기로", "했다", "시장은", "반응했다",
+                "전문가들은", "물가", "상승을", "우려하며", "추가", "조치가", "필요하다고", "밝혔다"]
+ENGLISH_WORDS = ["the", "government", "announced", "today", "that", "interest", "rates", "will", "remain",
+                 "unchanged", "markets", "reacted", "analysts", "expect", "further", "measures"]
+
+
+def synthetic_corpus(words: list, size_mb: float, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    size = 0
+    while size < target:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(5, 40))) + rng.choice([".", "!", "?"])
+        parts.append(sentence)
+        size += len(sentence.encode("utf-8")) + 1
+    return " ".join(parts)
+
+
+def legacy_chunk_sentences(util: DocumentUtil, sentences: list) -> list:
+    """
+    이전 구현 (문장마다 encode + 문자열 이어붙이기). 비교용.
+    """
+    chunks = []
+    current_chunk = ""
+    current_tokens = 0
+    for sentence in sentences:
+        sentence_tokens = len(util.tokenizer.encode(sentence))
+        if current_tokens + sentence_tokens <= util.max_tokens:
+            current_chunk += " " + sentence
+            current_tokens += sentence_tokens
+        else:
+            if current_chunk.strip():
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence
+            current_tokens = sentence_tokens
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def measure(label: str, func, size_bytes: int, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<28} {best * 1000:10.1f} ms  {size_bytes / 1024 / 1024 / best:8.2f} MB/s  ({len(result)} chunks)")
+
+
+def run(name: str, text: str, max_tokens: int, repeat: int):
+    util = DocumentUtil(max_tokens=max_tokens)
+    size_bytes = len(text.encode("utf-8"))
+    cleaned = util.clean_text(text)
+    sentences = util.split_into_sentences(cleaned)
+
+    print(f"[{name}] {size_bytes / 1024 / 1024:.2f} MB, {len(sentences)} sentences, max_tokens={max_tokens}")
+    measure("chunk (legacy)", lambda: legacy_chunk_sentences(util, sentences), size_bytes, repeat)
+    measure("chunk (encode_batch)", lambda: util.chunk_sentences(sentences), size_bytes, repeat)
+    measure("chunk_with_spans", lambda: util.chunk_with_spans(sentences, cleaned), size_bytes, repeat)
+    measure("preprocess (end to end)", lambda: util.preprocess(text), size_bytes, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DocumentUtil chunking benchmark")
+    parser.add_argument("--korean", help="한국어 corpus 파일 (없으면 합성 데이터)")
+    parser.add_argument("--english", help="영어 corpus 파일 (없으면 합성 데이터)")
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--max-tokens", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, path, words in (("korean", args.korean, KOREAN_WORDS), ("english", args.english, ENGLISH_WORDS)):
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                corpus = f.read()
+        else:
+            corpus = synthetic_corpus(words, args.size_mb)
+        run(name, corpus, args.max_tokens, args.repeat)
@@ -0,0 +1,110 @@
+"""
+VectorCompressor (PCA / truncate) + int8 quantization 조합별 recall@k 비교.
+압축 전 float32 cosine 검색의 top-k 를 정답으로, LocalVectorStore(flat) 검색 결과가 얼마나 겹치는지 측정.
+질문은 corpus 에서 빼둔 행(held-out) 을 사용.
+
+    python -m benchmark.compression_recall_benchmark vector_chunks.npy --dimensions 128,256,384
+    python -m benchmark.compression_recall_benchmark --synthetic 50000 --k 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from db.vector_store import LocalVectorStore
+from model.vector_compressor import VectorCompressor, COMPRESSION_METHODS
+
+
+def synthetic_embeddings(count: int, dimension: int = 768, rank: int = 64, seed: int = 42) -> np.ndarray:
+    """
+    문장 임베딩처럼 소수의 주요 방향에 에너지가 몰린 (저랭크 + 잡음) 벡터.
+    """
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((rank, dimension)).astype(np.float32)
+    weights = (1.0 / np.arange(1, rank + 1) ** 0.5).astype(np.float32)
+    latent = rng.standard_normal((count, rank)).astype(np.float32) * weights
+    return latent @ basis + 0.3 * rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, block_size: int = 64) -> np.ndarray:
+    """
+    압축 전 float32 brute-force 검색 결과 (정답).
+    """
+    top = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), block_size):
+        scores = queries[start:start + block_size] @ corpus.T
+        top[start:start + block_size] = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top
+
+
+def evaluate(corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, quantization: str) -> tuple:
+    """
+    :return: (recall@k, 평균 query ms, 벡터당 byte)
+    """
+    store = LocalVectorStore(path="", index_type="flat", quantization=quantization)
+    for start in range(0, len(corpus), 10000):
+        store.upsert([{"id": str(row), "values": values}
+                      for row, values in enumerate(corpus[start:start + 10000].tolist(), start=start)])
+
+    hits = 0
+    started = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        matches = store.query(vector=query.tolist(), top_k=k)["matches"]
+        hits += len({int(match["id"]) for match in matches} & set(expected.tolist()))
+    query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    bytes_per_vector = store.describe_index_stats()["matrix_bytes"] / len(corpus)
+    return hits / (len(queries) * k), query_ms, bytes_per_vector
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("matrix_path", nargs="?", help="압축 전 (N, dim) float32 .npy (ex. vector spool)")
+    parser.add_argument("--synthetic", type=int, default=20000, help="matrix_path 가 없을 때 만들 합성 벡터 수")
+    parser.add_argument("--dimensions", default="128,256,384")
+    parser.add_argument("--methods", default=",".join(COMPRESSION_METHODS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=20000, help="fit 에 사용할 corpus sample 수")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    source = np.load(args.matrix_path, mmap_mode="r") if args.matrix_path else synthetic_embeddings(args.synthetic)
+    rng = np.random.default_rng(42)
+    order = rng.permutation(len(source))
+    queries = normalize(np.asarray(source[np.sort(order[:args.queries])], dtype=np.float32))
+    corpus = normalize(np.asarray(source[np.sort(order[args.queries:])], dtype=np.float32))
+    truth = exact_top_k(corpus, queries, args.k)
+    sample = corpus[rng.choice(len(corpus), min(args.sample, len(corpus)), replace=False)]
+
+    print(f"corpus={len(corpus)} queries={len(queries)} dim={corpus.shape[1]} k={args.k}")
+    print(f"  {'method':<9} {'dim':>5} {'quant':>6} {'energy':>7} {'bytes/vec':>10} {'query ms':>9} {'recall@k':>9}")
+
+    configs = [(None, corpus.shape[1])]
+    for method in args.methods.split(","):
+        for dimension in args.dimensions.split(","):
+            configs.append((method.strip(), int(dimension)))
+
+    for method, dimension in configs:
+        if method is None:
+            projected_corpus, projected_queries, energy = corpus, queries, 1.0
+        else:
+            compressor = VectorCompressor(path="").fit(sample, dimension, method)
+            projected_corpus, projected_queries = compressor.project(corpus), compressor.project(queries)
+            energy = compressor.explained_variance
+
+        for quantization in ("none", "int8"):
+            recall, query_ms, bytes_per_vector = evaluate(
+                projected_corpus, projected_queries, truth, args.k, quantization
+            )
+            print(f"  {method or 'full':<9} {dimension:>5} {quantization:>6} {energy:7.3f} {bytes_per_vector:10.0f} "
+                  f"{query_ms:9.3f} {recall:9.4f}")
+
+
+if __name__ == "__main__":
+    main()
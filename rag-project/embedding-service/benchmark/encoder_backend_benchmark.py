@@ -0,0 +1,98 @@
+"""
+임베딩 backend (torch / onnx / onnx-int8) 처리량 + 정확도 비교.
+torch 결과와의 행별 cosine 이 --min-cosine 보다 낮은 backend 가 있으면 exit code 1.
+
+    python -m benchmark.encoder_backend_benchmark --sentences 512 --threads 4
+    python -m benchmark.encoder_backend_benchmark --corpus ko_sentences.txt --backends torch,onnx-int8
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from model.model_registry import ModelRegistry, EMBEDDING_MODEL_NAME, EMBEDDING_BACKENDS
+
+KOREAN_WORDS = ["정부는", "오늘", "발표한", "경제", "정책에서", "금리를", "동결하기로", "했다", "시장은", "반응했다",
+                "전문가들은", "물가", "상승을", "우려하며", "추가", "조치가", "필요하다고", "밝혔다"]
+
+
+def synthetic_sentences(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(KOREAN_WORDS) for _ in range(rng.randint(5, 60))) + "." for _ in range(count)]
+
+
+def load_sentences(path: str, count: int) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    return sentences[:count]
+
+
+def measure(model, sentences: list, batch_size: int, repeat: int) -> tuple:
+    """
+    :return: (정규화된 임베딩 행렬, 가장 빠른 실행 시간)
+    """
+    best = float("inf")
+    embeddings = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        embeddings = model.encode(sentences, batch_size=batch_size, convert_to_numpy=True)
+        best = min(best, time.perf_counter() - started)
+    embeddings = embeddings.astype(np.float32, copy=False)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    return embeddings, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS),
+                        help="쉼표로 구분. 항상 torch 결과를 기준으로 비교")
+    parser.add_argument("--corpus", help="한 줄에 한 문장인 UTF-8 파일. 없으면 합성 문장 사용")
+    parser.add_argument("--sentences", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="torch / ONNX Runtime intra-op thread 수 (0 이면 기본값)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="torch 대비 허용하는 최소 행별 cosine")
+    args = parser.parse_args()
+
+    # 기준이 되는 torch 를 항상 먼저 실행
+    backends = ["torch"] + [backend.strip() for backend in args.backends.split(",")
+                            if backend.strip() and backend.strip() != "torch"]
+    sentences = load_sentences(args.corpus, args.sentences) if args.corpus else synthetic_sentences(args.sentences)
+
+    if args.threads > 0:
+        import torch
+        torch.set_num_threads(args.threads)
+    registry = ModelRegistry(onnx_threads=args.threads)
+
+    print(f"model={args.model} sentences={len(sentences)} batch_size={args.batch_size} threads={args.threads or 'default'}")
+    print(f"  {'backend':<10} {'load s':>8} {'best ms':>10} {'sent/s':>9} {'speedup':>8} {'mean cos':>9} {'min cos':>9}")
+
+    reference = None
+    reference_seconds = None
+    failed = []
+    for backend in backends:
+        model = registry.get(args.model, "cpu", backend)
+        model.encode(sentences[:args.batch_size], batch_size=args.batch_size)  # warm up
+        embeddings, seconds = measure(model, sentences, args.batch_size, args.repeat)
+
+        if backend == "torch":
+            reference, reference_seconds = embeddings, seconds
+        cosines = np.einsum("ij,ij->i", embeddings, reference)
+        if cosines.min() < args.min_cosine:
+            failed.append(backend)
+
+        load_seconds = next(stat["loadSeconds"] for stat in registry.stats() if stat["backend"] == backend)
+        print(f"  {backend:<10} {load_seconds:8.2f} {seconds * 1000:10.1f} {len(sentences) / seconds:9.1f} "
+              f"{reference_seconds / seconds:7.2f}x {cosines.mean():9.5f} {cosines.min():9.5f}")
+
+    if failed:
+        print(f"accuracy check failed (min cosine < {args.min_cosine}): {', '.join(failed)}")
+        sys.exit(1)
+    print(f"accuracy check passed (min cosine >= {args.min_cosine})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("uvicorn.error")
+
+UPSERT_BATCH_COUNT = int(os.getenv("UPSERT_BATCH_COUNT", "100"))
+UPSERT_BATCH_BYTES = int(os.getenv("UPSERT_BATCH_BYTES", str(2 * 1024 * 1024 - 64 * 1024)))  # Pinecone 요청 한도 2MB
+UPSERT_MAX_IN_FLIGHT = int(os.getenv("UPSERT_MAX_IN_FLIGHT", "4"))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "5"))
+
+
+class BulkUpserter:
+    """
+    벡터를 개수 / payload 크기 기준 batch 로 나눠서 병렬 upsert.
+    동시에 전송 중인 batch 수를 제한해서 입력 쪽에 backpressure 를 걸고,
+    실패한 batch 는 jitter 를 넣은 exponential backoff 로 재시도.
+    """
+
+    def __init__(self, index, max_batch_count: int = UPSERT_BATCH_COUNT, max_batch_bytes: int = UPSERT_BATCH_BYTES,
+                 max_in_flight: int = UPSERT_MAX_IN_FLIGHT, max_retries: int = UPSERT_MAX_RETRIES,
+                 backoff_base: float = 0.5, backoff_max: float = 10.0):
+        """
+        :param index: upsert(vectors=...) 를 가진 VectorStore (Pinecone, local, FakeIndex)
+        :param max_batch_count: batch 당 최대 벡터 수
+        :param max_batch_bytes: batch 당 최대 payload 크기 (JSON 기준 추정치)
+        :param max_in_flight: 동시에 전송할 수 있는 최대 batch 수
+        :param max_retries: batch 당 최대 재시도 횟수
+        """
+        self.index = index
+        self.max_batch_count = max_batch_count
+        self.max_batch_bytes = max_batch_bytes
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def run(self, vectors, on_batch_done=None) -> dict:
+        """
+        upsert 실행.
+        :param vectors: {"id", "values", "metadata"} dict 의 iterable (generator 권장)
+        :param on_batch_done: (batch 결과 dict, batch 벡터 리스트) 를 받는 callback
+        :return: batch 별 결과 요약
+        """
+        results = []
+        results_lock = threading.Lock()
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+
+        def send(batch_number: int, batch: list, payload_bytes: int):
+            try:
+                result = self._send_with_retry(batch_number, batch, payload_bytes)
+                if on_batch_done is not None:
+                    # worker thread 의 예외는 future 를 보지 않으면 사라지므로 여기서 실패로 기록
+                    try:
+                        on_batch_done(result, batch)
+                    except Exception as ex:
+                        logger.warning("Upsert batch %d callback failed", batch_number, exc_info=ex)
+                        result["success"] = False
+                        result["error"] = f"on_batch_done: {ex}"
+                with results_lock:
+                    results.append(result)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="bulk-upsert") as executor:
+            for batch_number, (batch, payload_bytes) in enumerate(self._iter_batches(vectors)):
+                # 전송 중인 batch 가 가득 차면 여기서 대기 (입력 읽기도 함께 멈춤)
+                in_flight.acquire()
+                executor.submit(send, batch_number, batch, payload_bytes)
+
+        results.sort(key=lambda result: result["batch"])
+        return {
+            "batches": len(results),
+            "succeeded": sum(1 for result in results if result["success"]),
+            "failed": sum(1 for result in results if not result["success"]),
+            "vectors": sum(result["count"] for result in results),
+            "upserted": sum(result["count"] for result in results if result["success"]),
+            "results": results,
+        }
+
+    def _iter_batches(self, vectors):
+        batch = []
+        batch_bytes = 0
+
+        for vector in vectors:
+            vector_bytes = self._estimate_bytes(vector)
+            if batch and (len(batch) >= self.max_batch_count or batch_bytes + vector_bytes > self.max_batch_bytes):
+                yield batch, batch_bytes
+                batch = []
+                batch_bytes = 0
+            batch.append(vector)
+            batch_bytes += vector_bytes
+
+        if batch:
+            yield batch, batch_bytes
+
+    def _send_with_retry(self, batch_number: int, batch: list, payload_bytes: int) -> dict:
+        started = time.perf_counter()
+        error = None
+        attempts = 0
+
+        while attempts <= self.max_retries:
+            attempts += 1
+            try:
+                self.index.upsert(vectors=batch)
+                error = None
+                break
+            except Exception as ex:
+                error = ex
+                if not self._is_retryable(ex) or attempts > self.max_retries:
+                    break
+                # full jitter backoff
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1))))
+                logger.warning("Upsert batch %d failed (attempt %d), retry in %.2fs: %s",
+                               batch_number, attempts, delay, ex)
+                time.sleep(delay)
+
+        if error is not None:
+            logger.warning("Upsert batch %d failed", batch_number, exc_info=error)
+
+        return {
+            "batch": batch_number,
+            "count": len(batch),
+            "bytes": payload_bytes,
+            "attempts": attempts,
+            "success": error is None,
+            "error": None if error is None else str(error),
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    @staticmethod
+    def _is_retryable(ex: Exception) -> bool:
+        # 429 를 제외한 4xx 는 재시도해도 결과가 같음
+        status = getattr(ex, "status", None)
+        if isinstance(status, int) and 400 <= status < 500 and status != 429:
+            return False
+        return True
+
+    @staticmethod
+    def _estimate_bytes(vector: dict) -> int:
+        return len(json.dumps(vector, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "ingest_manifest.sqlite3")
+
+
+class IngestManifest:
+    """
+    문서별로 index 에 올라가 있는 chunk ID / content hash / metadata 기록 (SQLite).
+    재수집 시 이전 기록과 비교해서 변경된 chunk 만 embed / upsert 하고, 사라진 chunk 는 삭제.
+    index 에 있는 chunk 와 항상 같으므로 chat-service 의 BM25 색인도 이 파일에서 만듦.
+    """
+
+    def __init__(self, path: str = INGEST_MANIFEST_PATH):
+        """
+        :param path: SQLite 파일 경로 (":memory:" 가능)
+        """
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        최초 사용 시 연결 / 테이블 생성. upsert worker thread 에서도 기록하므로 lock 으로 직렬화.
+        """
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    connection = sqlite3.connect(self.path, check_same_thread=False)
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute("PRAGMA synchronous=NORMAL")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS chunks ("
+                        " document_id TEXT NOT NULL,"
+                        " chunk_id TEXT NOT NULL,"
+                        " content_hash TEXT NOT NULL,"
+                        " metadata TEXT NOT NULL,"
+                        " updated_at INTEGER NOT NULL,"
+                        " PRIMARY KEY (document_id, chunk_id)"
+                        ") WITHOUT ROWID"
+                    )
+                    connection.commit()
+                    self._connection = connection
+        return self._connection
+
+    def get_chunks(self, document_id: str) -> dict:
+        """
+        :return: {chunk_id: content_hash}
+        """
+        connection = self.connection
+        with self._lock:
+            rows = connection.execute(
+                "SELECT chunk_id, content_hash FROM chunks WHERE document_id = ?", (document_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def record(self, rows: list):
+        """
+        upsert 에 성공한 chunk 기록.
+        :param rows: (document_id, chunk_id, content_hash, metadata dict) 리스트
+        """
+        if not rows:
+            return
+        now = int(time.time() * 1000)
+        connection = self.connection
+        with self._lock:
+            connection.executemany(
+                "INSERT OR REPLACE INTO chunks (document_id, chunk_id, content_hash, metadata, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (document_id, chunk_id, content_hash,
+                     json.dumps(metadata, ensure_ascii=False, separators=(",", ":")), now)
+                    for document_id, chunk_id, content_hash, metadata in rows
+                ],
+            )
+            connection.commit()
+
+    def remove(self, document_id: str, chunk_ids: list):
+        if not chunk_ids:
+            return
+        connection = self.connection
+        with self._lock:
+            connection.executemany(
+                "DELETE FROM chunks WHERE document_id = ? AND chunk_id = ?",
+                [(document_id, chunk_id) for chunk_id in chunk_ids],
+            )
+            connection.commit()
+
+    def stats(self) -> dict:
+        connection = self.connection
+        with self._lock:
+            documents, chunks = connection.execute(
+                "SELECT COUNT(DISTINCT document_id), COUNT(*) FROM chunks"
+            ).fetchone()
+        return {"path": self.path, "documents": documents, "chunks": chunks}
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+ingest_manifest = IngestManifest()
+
+__all__ = ["ingest_manifest", "IngestManifest"]
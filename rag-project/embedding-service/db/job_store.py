@@ -0,0 +1,267 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+# claim 한 process 가 이 시간 안에 renew 하지 않으면 다른 process 가 작업을 다시 대기열에 넣음
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobStore:
+    """
+    embedding / upsert 작업 queue (SQLite).
+    서버가 재시작되어도 대기 중인 작업이 남음. claim 한 process 는 claimed_by / lease 를 기록하고 renew 로 연장하며,
+    recover() 는 lease 가 만료된 (process 가 죽은) running 작업만 다시 대기열에 넣음.
+    문서 원문처럼 큰 입력은 params 가 아니라 payloads 테이블에 따로 저장 (작업 조회 / 목록에 포함되지 않음).
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, lease_seconds: float = JOB_LEASE_SECONDS):
+        """
+        :param path: SQLite 파일 경로 (":memory:" 가능)
+        :param lease_seconds: claim / renew 후 작업을 소유하는 시간
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # 같은 파일을 쓰는 process (uvicorn worker / 재시작 전후 process) 구분용
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        최초 사용 시 연결 / 테이블 생성. API / worker thread 가 함께 사용하므로 lock 으로 직렬화.
+        """
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    # 여러 process (uvicorn worker) 가 같은 파일을 쓰면 write lock 을 timeout 까지 기다림
+                    connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                    connection.row_factory = sqlite3.Row
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute("PRAGMA synchronous=NORMAL")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS jobs ("
+                        " id TEXT PRIMARY KEY,"
+                        " type TEXT NOT NULL,"
+                        " status TEXT NOT NULL,"
+                        " params TEXT NOT NULL,"
+                        " progress TEXT,"
+                        " result TEXT,"
+                        " error TEXT,"
+                        " attempts INTEGER NOT NULL DEFAULT 0,"
+                        " claimed_by TEXT,"
+                        " lease_expires_at INTEGER,"
+                        " created_at INTEGER NOT NULL,"
+                        " started_at INTEGER,"
+                        " finished_at INTEGER"
+                        ")"
+                    )
+                    connection.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+                    connection.execute("CREATE TABLE IF NOT EXISTS payloads (job_id TEXT PRIMARY KEY, payload BLOB NOT NULL)")
+                    connection.commit()
+                    self._connection = connection
+        return self._connection
+
+    def submit(self, job_type: str, params: dict = None, payload: str = None) -> dict:
+        """
+        :param payload: (선택) 문서 원문 등 큰 입력. params 에는 "payloadBytes" 만 기록하고 get_payload 로 조회
+        """
+        job_id = uuid.uuid4().hex
+        params = dict(params or {})
+        if payload is not None:
+            payload = payload.encode("utf-8")
+            params["payloadBytes"] = len(payload)
+
+        connection = self.connection
+        with self._lock:
+            # 작업과 payload 를 같은 transaction 으로 기록 (payload 없이 claim 되지 않도록)
+            with connection:
+                connection.execute(
+                    "INSERT INTO jobs (id, type, status, params, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                    (job_id, job_type, self._dumps(params), self._now()),
+                )
+                if payload is not None:
+                    connection.execute("INSERT INTO payloads (job_id, payload) VALUES (?, ?)", (job_id, payload))
+        return self.get(job_id)
+
+    def get_payload(self, job_id: str) -> str:
+        connection = self.connection
+        with self._lock:
+            row = connection.execute("SELECT payload FROM payloads WHERE job_id = ?", (job_id,)).fetchone()
+        return None if row is None else bytes(row["payload"]).decode("utf-8")
+
+    def claim(self) -> dict:
+        """
+        가장 오래된 대기 작업을 running 으로 바꾸고 (claimed_by / lease 기록) 반환. 없으면 None.
+        다른 process 가 먼저 가져간 작업은 UPDATE 가 0 행이 되므로 (queued 조건) 다음 작업을 다시 찾음.
+        """
+        connection = self.connection
+        while True:
+            with self._lock:
+                row = connection.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                now = self._now()
+                claimed = connection.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1,"
+                    " claimed_by = ?, lease_expires_at = ?"
+                    " WHERE id = ? AND status = 'queued'",
+                    (now, self.owner, now + self._lease_ms(), row["id"]),
+                ).rowcount
+                connection.commit()
+                if claimed:
+                    row = connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                    return self._to_dict(row)
+
+    def renew(self, job_ids: list) -> int:
+        """
+        이 process 가 실행 중인 작업의 lease 연장 (worker pool 이 주기적으로 호출).
+        :return: 연장된 작업 수. 적으면 lease 가 만료되어 다른 process 가 가져간 작업이 있음
+        """
+        if not job_ids:
+            return 0
+        placeholders = ",".join("?" * len(job_ids))
+        return self._execute(
+            f"UPDATE jobs SET lease_expires_at = ? WHERE id IN ({placeholders}) AND status = 'running' AND claimed_by = ?",
+            (self._now() + self._lease_ms(), *job_ids, self.owner),
+        )
+
+    def update_progress(self, job_id: str, progress: dict):
+        self._execute("UPDATE jobs SET progress = ? WHERE id = ? AND claimed_by = ?",
+                      (self._dumps(progress), job_id, self.owner))
+
+    def finish(self, job_id: str, status: str, result: dict = None, error: str = None) -> bool:
+        """
+        :param status: succeeded / failed / cancelled
+        :return: False 면 lease 가 만료되어 다른 process 가 다시 가져간 작업 (결과를 기록하지 않음)
+        """
+        connection = self.connection
+        with self._lock:
+            with connection:
+                finished = connection.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL"
+                    " WHERE id = ? AND status = 'running' AND claimed_by = ?",
+                    (status, self._dumps(result), error, self._now(), job_id, self.owner),
+                ).rowcount
+                if finished:
+                    # 끝난 작업은 다시 실행되지 않으므로 payload 삭제
+                    connection.execute("DELETE FROM payloads WHERE job_id = ?", (job_id,))
+        return bool(finished)
+
+    def release(self, job_id: str) -> bool:
+        """
+        서버 종료로 중단한 작업을 바로 대기열에 되돌림 (lease 만료를 기다리지 않음).
+        """
+        return bool(self._execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, claimed_by = NULL, lease_expires_at = NULL"
+            " WHERE id = ? AND status = 'running' AND claimed_by = ?",
+            (job_id, self.owner),
+        ))
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        대기 중인 작업은 바로 cancelled 로 변경. 실행 중인 작업은 worker 가 다음 확인 지점에서 중단.
+        """
+        connection = self.connection
+        with self._lock:
+            with connection:
+                cancelled = connection.execute(
+                    "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                    (self._now(), job_id),
+                ).rowcount
+                if cancelled:
+                    connection.execute("DELETE FROM payloads WHERE job_id = ?", (job_id,))
+        return self.get(job_id)
+
+    def recover(self) -> int:
+        """
+        lease 가 만료된 running 작업 (실행하던 process 가 죽은 작업) 을 다시 대기열에 넣음.
+        다른 process 가 renew 하고 있는 작업은 건드리지 않음. (worker pool 이 시작 시 / 주기적으로 호출)
+        """
+        return self._execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, claimed_by = NULL, lease_expires_at = NULL"
+            " WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+            (self._now(),),
+        )
+
+    def get(self, job_id: str) -> dict:
+        connection = self.connection
+        with self._lock:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, status: str = None, limit: int = 50) -> list:
+        connection = self.connection
+        with self._lock:
+            if status:
+                rows = connection.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = connection.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def stats(self) -> dict:
+        connection = self.connection
+        with self._lock:
+            rows = connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        connection = self.connection
+        with self._lock:
+            cursor = connection.execute(sql, params)
+            connection.commit()
+            return cursor.rowcount
+
+    def _lease_ms(self) -> int:
+        return int(self.lease_seconds * 1000)
+
+    @staticmethod
+    def _now() -> int:
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return None if value is None else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        return {
+            "id": row["id"],
+            "type": row["type"],
+            "status": row["status"],
+            "params": json.loads(row["params"]),
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "claimedBy": row["claimed_by"],
+            "leaseExpiresAt": row["lease_expires_at"],
+            "createdAt": row["created_at"],
+            "startedAt": row["started_at"],
+            "finishedAt": row["finished_at"],
+        }
+
+
+job_store = JobStore()
+
+__all__ = ["job_store", "JobStore", "FINISHED_STATUSES"]
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+logger = logging.getLogger("uvicorn.error")
+
+# 켜면 이미 색인된 chunk (다른 문서 포함) 와 거의 같은 chunk 는 embed / upsert 하지 않음 (버린 chunk 는 그 문서로
+# 검색되지 않고, survivor 가 삭제될 때만 복구됨). 문서 간 중복 제거는 명시적으로 켤 때만 동작하도록 기본값 off
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "false").lower() == "true"
+NEAR_DUPLICATE_INDEX_PATH = os.getenv("NEAR_DUPLICATE_INDEX_PATH", "near_duplicate_index.sqlite3")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))  # 추정 Jaccard 유사도
+NEAR_DUPLICATE_NUM_PERM = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", "128"))
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", "16"))
+NEAR_DUPLICATE_SHINGLE_SIZE = int(os.getenv("NEAR_DUPLICATE_SHINGLE_SIZE", "5"))  # 문자 n-gram
+
+_SHINGLE_BASE = np.uint64(1099511628211)
+_MIX_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class NearDuplicateIndex:
+    """
+    chunk 텍스트의 MinHash signature 를 band 단위로 나눠 저장하는 LSH 색인 (SQLite).
+    band 하나라도 같은 chunk 만 후보로 가져와서 signature 로 Jaccard 유사도를 추정하므로,
+    색인 크기와 상관없이 chunk 당 조회 비용이 거의 일정. 수집이 끝나도 유지되어 다음 수집과도 비교.
+    버린 chunk 는 남긴 chunk (survivor) 기준으로 기록해두고, survivor 가 삭제되면 release 로 돌려줌.
+    """
+
+    def __init__(self, path: str = NEAR_DUPLICATE_INDEX_PATH, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 num_perm: int = NEAR_DUPLICATE_NUM_PERM, bands: int = NEAR_DUPLICATE_BANDS,
+                 shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE):
+        """
+        :param path: SQLite 파일 경로 (":memory:" 면 프로세스 내에서만 유지)
+        :param threshold: 이 값 이상이면 near-duplicate (0 ~ 1)
+        :param num_perm: MinHash permutation 수 (signature 길이)
+        :param bands: LSH band 수. num_perm 의 약수. 많을수록 낮은 유사도 쌍도 후보가 됨
+        :param shingle_size: shingle 로 사용할 문자 n-gram 길이
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # 프로세스가 바뀌어도 같은 signature 가 나오도록 고정 seed
+        rng = np.random.default_rng(1)
+        self._multipliers = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._offsets = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+        # metrics
+        self._query_count = 0
+        self._duplicate_count = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        최초 사용 시 연결 / 테이블 생성. signature 설정이 바뀌었으면 기존 색인 / 버린 chunk 기록은 비교할 수 없으므로 비움.
+        """
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    connection = sqlite3.connect(self.path, check_same_thread=False)
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute("PRAGMA synchronous=NORMAL")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS signatures ("
+                        " chunk_id TEXT PRIMARY KEY,"
+                        " document_id TEXT NOT NULL,"
+                        " signature BLOB NOT NULL"
+                        ") WITHOUT ROWID"
+                    )
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS bands ("
+                        " band_key INTEGER NOT NULL,"
+                        " chunk_id TEXT NOT NULL,"
+                        " PRIMARY KEY (band_key, chunk_id)"
+                        ") WITHOUT ROWID"
+                    )
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS duplicates ("
+                        " chunk_id TEXT PRIMARY KEY,"
+                        " document_id TEXT NOT NULL,"
+                        " survivor_id TEXT NOT NULL,"
+                        " content_hash TEXT NOT NULL,"
+                        " metadata TEXT NOT NULL"
+                        ")"
+                    )
+                    connection.execute("CREATE INDEX IF NOT EXISTS duplicates_survivor ON duplicates (survivor_id)")
+                    connection.execute("CREATE INDEX IF NOT EXISTS duplicates_document ON duplicates (document_id)")
+                    connection.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)")
+
+                    settings = f"{self.num_perm}:{self.bands}:{self.shingle_size}"
+                    stored = connection.execute("SELECT value FROM settings WHERE name = 'minhash'").fetchone()
+                    if stored is not None and stored[0] != settings:
+                        (dropped,) = connection.execute("SELECT COUNT(*) FROM duplicates").fetchone()
+                        logger.warning("Near-duplicate index settings changed (%s -> %s), clearing %s "
+                                       "(%d dropped chunks are re-checked when their documents are re-ingested)",
+                                       stored[0], settings, self.path, dropped)
+                    # 이전 설정으로 계산한 survivor 기록이 복구 / 제거 판단에 쓰이지 않도록 색인과 같은 transaction 으로 비움
+                    with connection:
+                        if stored is not None and stored[0] != settings:
+                            connection.execute("DELETE FROM signatures")
+                            connection.execute("DELETE FROM bands")
+                            connection.execute("DELETE FROM duplicates")
+                        connection.execute("INSERT OR REPLACE INTO settings VALUES ('minhash', ?)", (settings,))
+                    self._connection = connection
+        return self._connection
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        공백 / 대소문자를 정규화한 문자 shingle 의 MinHash signature.
+        :return: (num_perm,) uint32
+        """
+        normalized = " ".join(text.lower().split())
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        count = max(1, len(codes) - self.shingle_size + 1)
+
+        # shingle 별 polynomial hash (uint64 overflow 는 mod 2^64 로 동작)
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(min(self.shingle_size, len(codes))):
+            shingles = shingles * _SHINGLE_BASE + codes[offset:offset + count]
+        shingles = np.unique(shingles) * _MIX_MULTIPLIER
+        shingles ^= shingles >> np.uint64(31)
+
+        # permutation 마다 multiply-shift hash 의 최솟값
+        hashed = self._multipliers[:, None] * shingles[None, :] + self._offsets[:, None]
+        return (hashed >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+    def query(self, signature: np.ndarray) -> list:
+        """
+        threshold 이상인 색인된 chunk.
+        :return: [(chunk_id, document_id, 추정 유사도)] 유사도 내림차순
+        """
+        keys = self._band_keys(signature)
+        placeholders = ",".join("?" * len(keys))
+        connection = self.connection
+        with self._lock:
+            rows = connection.execute(
+                "SELECT s.chunk_id, s.document_id, s.signature FROM signatures s"
+                f" WHERE s.chunk_id IN (SELECT DISTINCT chunk_id FROM bands WHERE band_key IN ({placeholders}))",
+                keys,
+            ).fetchall()
+        self._query_count += 1
+
+        matches = []
+        for chunk_id, document_id, blob in rows:
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+            if similarity >= self.threshold:
+                matches.append((chunk_id, document_id, similarity))
+        matches.sort(key=lambda match: match[2], reverse=True)
+        return matches
+
+    def add(self, chunk_id: str, document_id: str, signature: np.ndarray):
+        """
+        색인에 추가. 같은 connection 에서는 commit 전에도 query 결과에 포함됨.
+        """
+        connection = self.connection
+        with self._lock:
+            connection.execute(
+                "INSERT OR REPLACE INTO signatures (chunk_id, document_id, signature) VALUES (?, ?, ?)",
+                (chunk_id, document_id, signature.astype(np.uint32).tobytes()),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO bands (band_key, chunk_id) VALUES (?, ?)",
+                [(key, chunk_id) for key in self._band_keys(signature)],
+            )
+
+    def remove(self, chunk_ids: list):
+        if not chunk_ids:
+            return
+        connection = self.connection
+        with self._lock:
+            for chunk_id in chunk_ids:
+                row = connection.execute("SELECT signature FROM signatures WHERE chunk_id = ?", (chunk_id,)).fetchone()
+                if row is None:
+                    continue
+                keys = self._band_keys(np.frombuffer(row[0], dtype=np.uint32))
+                connection.executemany(
+                    "DELETE FROM bands WHERE band_key = ? AND chunk_id = ?", [(key, chunk_id) for key in keys]
+                )
+                connection.execute("DELETE FROM signatures WHERE chunk_id = ?", (chunk_id,))
+
+    def record_dropped(self, chunk_id: str, document_id: str, survivor_id: str, content_hash: str, metadata: dict):
+        """
+        survivor_id 의 near-duplicate 라서 embed / upsert 하지 않은 chunk 기록.
+        """
+        connection = self.connection
+        with self._lock:
+            connection.execute(
+                "INSERT OR REPLACE INTO duplicates (chunk_id, document_id, survivor_id, content_hash, metadata)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (chunk_id, document_id, survivor_id, content_hash,
+                 json.dumps(metadata, ensure_ascii=False, separators=(",", ":"))),
+            )
+
+    def forget_document(self, document_id: str):
+        """
+        문서를 다시 수집하기 전에 호출. 버린 chunk 는 manifest 에 없으므로 수집 중에 다시 판단해서 기록됨.
+        """
+        connection = self.connection
+        with self._lock:
+            connection.execute("DELETE FROM duplicates WHERE document_id = ?", (document_id,))
+
+    def release(self, survivor_ids: list) -> list:
+        """
+        삭제된 (또는 저장에 실패한) survivor 기준으로 버렸던 chunk 를 기록에서 빼서 반환. 다시 embed / upsert 해야 함.
+        :return: [(chunk_id, document_id, content_hash, metadata dict)]
+        """
+        if not survivor_ids:
+            return []
+        connection = self.connection
+        released = []
+        with self._lock:
+            for start in range(0, len(survivor_ids), 500):
+                batch = list(survivor_ids[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    "SELECT chunk_id, document_id, content_hash, metadata FROM duplicates"
+                    f" WHERE survivor_id IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                connection.execute(f"DELETE FROM duplicates WHERE survivor_id IN ({placeholders})", batch)
+                released.extend(
+                    (chunk_id, document_id, content_hash, json.loads(metadata))
+                    for chunk_id, document_id, content_hash, metadata in rows
+                )
+        return released
+
+    def commit(self):
+        connection = self.connection
+        with self._lock:
+            connection.commit()
+
+    def record_duplicate(self, count: int = 1):
+        self._duplicate_count += count
+
+    def deduplicate(self, texts: list, document_id: str = "") -> tuple:
+        """
+        색인과 비교하지 않고 texts 안에서만 near-duplicate 제거 (":memory:" 색인으로 사용).
+        :return: (남은 text 리스트, 제거한 수)
+        """
+        kept = []
+        for i, text in enumerate(texts):
+            signature = self.signature(text)
+            if self.query(signature):
+                continue
+            self.add(str(i), document_id, signature)
+            kept.append(text)
+        self.record_duplicate(len(texts) - len(kept))
+        return kept, len(texts) - len(kept)
+
+    def stats(self) -> dict:
+        connection = self.connection
+        with self._lock:
+            (chunks,) = connection.execute("SELECT COUNT(*) FROM signatures").fetchone()
+            (dropped,) = connection.execute("SELECT COUNT(*) FROM duplicates").fetchone()
+        return {
+            "path": self.path,
+            "threshold": self.threshold,
+            "numPerm": self.num_perm,
+            "bands": self.bands,
+            "chunks": chunks,
+            "droppedChunks": dropped,
+            "queries": self._query_count,
+            "duplicatesDropped": self._duplicate_count,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        """
+        band 별 (band 번호 + band 값) hash. SQLite INTEGER 범위의 signed 64bit.
+        """
+        data = signature.astype(np.uint32).tobytes()
+        band_bytes = self.rows * 4
+        return [
+            int.from_bytes(
+                hashlib.blake2b(bytes([band]) + data[band * band_bytes:(band + 1) * band_bytes], digest_size=8).digest(),
+                "little",
+                signed=True,
+            )
+            for band in range(self.bands)
+        ]
+
+
+near_duplicate_index = NearDuplicateIndex()
+
+__all__ = ["near_duplicate_index", "NearDuplicateIndex", "NEAR_DUPLICATE_ENABLED"]
@@ -1,25 +1,135 @@
-from pinecone import Pinecone, ServerlessSpec
+import asyncio
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger("uvicorn.error")
+
 api_key = os.getenv("PINECONE_API_KEY")
 index_name = os.getenv("PINECONE_INDEX_NAME")
+max_concurrency = int(os.getenv("PINECONE_MAX_CONCURRENCY", "32"))
+timeout_seconds = float(os.getenv("PINECONE_TIMEOUT_SECONDS", "10"))
+health_check_interval = float(os.getenv("PINECONE_HEALTH_CHECK_INTERVAL", "60"))
+
+
+class AsyncPineconeClient:
+    """
+    Pinecone Index 를 처음 사용할 때 연결하는 async wrapper.
+    blocking 호출은 전용 thread pool 에서 실행하고, 동시 요청 수 / timeout 을 제한.
+    thread pool 크기와 Index 의 HTTP connection pool 크기를 맞춰서 연결을 재사용.
+    """
+
+    def __init__(self, max_concurrency: int = max_concurrency, timeout_seconds: float = timeout_seconds):
+        """
+        :param max_concurrency: 동시에 실행할 최대 Pinecone 요청 수
+        :param timeout_seconds: 요청당 timeout
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+
+        self._index = None
+        self._index_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="pinecone")
+        self._semaphore = None
+        self._health_task = None
+
+        self.healthy = None
+        self.last_health_check = None
+        self.in_flight = 0
+
+    @property
+    def index(self):
+        """
+        동기 Index 객체. 최초 접근 시 연결 (import 시점에는 네트워크 호출 없음).
+        """
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    from pinecone import Pinecone
+
+                    pc = Pinecone(api_key=api_key)
+                    self._index = pc.Index(
+                        index_name,
+                        pool_threads=self.max_concurrency,
+                        connection_pool_maxsize=self.max_concurrency,
+                    )
+                    logger.info("Pinecone Index 객체 준비 완료: %s", index_name)
+        return self._index
+
+    async def query(self, **kwargs):
+        return await self._call("query", **kwargs)
+
+    async def upsert(self, **kwargs):
+        return await self._call("upsert", **kwargs)
+
+    async def delete(self, **kwargs):
+        return await self._call("delete", **kwargs)
+
+    async def describe_index_stats(self, **kwargs):
+        return await self._call("describe_index_stats", **kwargs)
+
+    def start_health_check(self, interval: float = health_check_interval):
+        """
+        index 상태 확인을 background task 로 실행 (lifespan 에서 호출).
+        """
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_check_loop(interval))
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "indexName": index_name,
+            "connected": self._index is not None,
+            "healthy": self.healthy,
+            "lastHealthCheck": self.last_health_check,
+            "inFlight": self.in_flight,
+            "maxConcurrency": self.max_concurrency,
+        }
 
-pc = Pinecone(api_key = api_key)
+    async def _call(self, method: str, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
 
-all_indexes = pc.list_indexes()
-print("현재 사용 가능한 Index 목록:", all_indexes)
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                call = loop.run_in_executor(self._executor, lambda: getattr(self.index, method)(**kwargs))
+                return await asyncio.wait_for(call, timeout=self.timeout_seconds)
+            finally:
+                self.in_flight -= 1
 
-index = pc.Index(index_name)
-print(f"Index 객체 준비 완료: {index_name}")
+    async def _health_check_loop(self, interval: float):
+        while True:
+            try:
+                await self.describe_index_stats()
+                if self.healthy is not True:
+                    logger.info("'%s' index 연결 및 상태 확인 완료!", index_name)
+                self.healthy = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.warning("Index 연결 상태 확인 실패: %s", ex)
+                self.healthy = False
+            self.last_health_check = int(time.time() * 1000)
+            await asyncio.sleep(interval)
 
 
-try:
-    stats = index.describe_index_stats()
-    print(f"'{index_name}' index 연결 및 상태 확인 완료!")
-except Exception as e:
-    print(f"Index 연결 상태 확인 실패: {e}")
+pinecone_client = AsyncPineconeClient()
 
-__all__ = ["index"]
\ No newline at end of file
+__all__ = ["pinecone_client", "AsyncPineconeClient"]
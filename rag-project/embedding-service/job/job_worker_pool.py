@@ -0,0 +1,237 @@
+import logging
+import os
+import threading
+import time
+
+from db.job_store import JobStore
+
+logger = logging.getLogger("uvicorn.error")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "0.5"))
+
+
+class JobCancelledException(Exception):
+    pass
+
+
+class JobContext:
+    """
+    실행 중인 작업에 넘겨주는 context. 단계별 진행 상황 기록 / 취소 확인.
+    """
+
+    def __init__(self, job: dict, store: JobStore, progress_interval: float = JOB_PROGRESS_INTERVAL):
+        self.job_id = job["id"]
+        self.store = store
+        self.progress_interval = progress_interval
+        self.progress = {"stage": None, "stages": {}}
+        self._cancel_event = threading.Event()
+        self._last_saved = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def payload(self) -> str:
+        """
+        submit 때 params 와 따로 저장한 입력 (ex. 문서 원문). 없으면 None.
+        """
+        return self.store.get_payload(self.job_id)
+
+    def check_cancelled(self):
+        """
+        긴 작업의 batch 사이에서 호출. 취소 요청이 있으면 JobCancelledException.
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelledException(f"Job {self.job_id} cancelled")
+
+    def report(self, stage: str, done: int = None, total: int = None):
+        """
+        단계 진행 상황 기록. DB 쓰기는 단계가 바뀌거나 progress_interval 이 지났을 때만.
+        """
+        stage_changed = self.progress["stage"] != stage
+        self.progress["stage"] = stage
+        entry = self.progress["stages"].setdefault(stage, {})
+        if done is not None:
+            entry["done"] = done
+        if total is not None:
+            entry["total"] = total
+
+        now = time.monotonic()
+        if stage_changed or now - self._last_saved >= self.progress_interval or (total is not None and done == total):
+            self._last_saved = now
+            self.store.update_progress(self.job_id, self.progress)
+
+
+class JobWorkerPool:
+    """
+    JobStore 의 대기 작업을 가져와서 실행하는 worker thread pool.
+    작업 종류별 handler(params, context) -> result dict 를 등록해서 사용.
+    embedding 계산 / upsert 전송은 GIL 을 놓고 실행되므로 thread 로도 여러 코어를 사용.
+    """
+
+    def __init__(self, store: JobStore, concurrency: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        """
+        :param store: 작업 queue
+        :param concurrency: 동시에 실행할 작업 수 (worker thread 수)
+        :param poll_interval: 대기 작업이 없을 때 다시 확인하는 간격
+        """
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.validators = {}
+
+        self._running = {}
+        self._running_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._lease_thread = None
+
+    def register(self, job_type: str, handler, validator=None):
+        """
+        :param handler: handler(params: dict, context: JobContext) -> dict
+        :param validator: (선택) validator(params: dict, payload: str). 잘못된 요청이면 ValueError (submit 시 호출)
+        """
+        self.handlers[job_type] = handler
+        if validator is not None:
+            self.validators[job_type] = validator
+
+    def submit(self, job_type: str, params: dict = None, payload: str = None) -> dict:
+        """
+        :param payload: (선택) params 와 따로 저장할 큰 입력. handler 에서 context.payload() 로 조회
+        잘못된 작업 종류 / params 는 대기열에 넣지 않고 ValueError.
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        validator = self.validators.get(job_type)
+        if validator is not None:
+            validator(params or {}, payload)
+        job = self.store.submit(job_type, params, payload)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        대기 중이면 바로 취소, 실행 중이면 handler 의 다음 check_cancelled() 에서 중단.
+        """
+        with self._running_lock:
+            context = self._running.get(job_id)
+        if context is not None:
+            context.cancel()
+        return self.store.cancel(job_id)
+
+    def start(self):
+        if self._threads:
+            return
+        self._recover()
+
+        self._stop_event.clear()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._lease_thread = threading.Thread(target=self._lease_loop, name="job-lease", daemon=True)
+        self._lease_thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        새 작업은 가져오지 않고, 실행 중인 작업에는 취소 요청 (중단된 작업은 대기열로 되돌림).
+        timeout 안에 끝나지 않은 작업은 lease 가 만료된 뒤 다른 process 의 recover 로 다시 실행됨.
+        """
+        self._stop_event.set()
+        with self._running_lock:
+            contexts = list(self._running.values())
+        for context in contexts:
+            context.cancel()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        if self._lease_thread is not None:
+            self._lease_thread.join(timeout=timeout)
+            self._lease_thread = None
+
+    def stats(self) -> dict:
+        with self._running_lock:
+            running = list(self._running)
+        return {
+            "concurrency": self.concurrency,
+            "running": running,
+            "jobs": self.store.stats(),
+        }
+
+    def _lease_loop(self):
+        """
+        실행 중인 작업의 lease 를 만료 전에 연장하고, 다른 process 가 죽으면서 남긴 작업을 다시 대기열에 넣음.
+        """
+        interval = self.store.lease_seconds / 3
+        while not self._stop_event.wait(interval):
+            with self._running_lock:
+                running = list(self._running)
+            try:
+                renewed = self.store.renew(running)
+                if renewed < len(running):
+                    logger.warning("Lost the lease on %d running jobs", len(running) - renewed)
+                self._recover()
+            except Exception as ex:
+                logger.warning("Job lease renewal failed", exc_info=ex)
+
+    def _recover(self):
+        recovered = self.store.recover()
+        if recovered:
+            logger.info("Re-queued %d jobs with an expired lease", recovered)
+            with self._wakeup:
+                self._wakeup.notify_all()
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            job = self.store.claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job: dict):
+        context = JobContext(job, self.store)
+        with self._running_lock:
+            self._running[job["id"]] = context
+
+        started = time.perf_counter()
+        try:
+            handler = self.handlers.get(job["type"])
+            if handler is None:
+                raise ValueError(f"Unknown job type: {job['type']}")
+            result = handler(job["params"], context)
+            self.store.update_progress(job["id"], context.progress)
+            if self.store.finish(job["id"], "succeeded", result=result):
+                logger.info("Job %s (%s) succeeded in %.2fs", job["id"], job["type"], time.perf_counter() - started)
+            else:
+                logger.warning("Job %s (%s) finished after its lease expired; result discarded", job["id"], job["type"])
+        except JobCancelledException:
+            self.store.update_progress(job["id"], context.progress)
+            if self._stop_event.is_set():
+                # 서버 종료로 중단된 작업은 대기열로 되돌려서 (다른 process 또는 다음 시작 시) 다시 실행
+                self.store.release(job["id"])
+                logger.info("Job %s (%s) interrupted by shutdown", job["id"], job["type"])
+            else:
+                self.store.finish(job["id"], "cancelled")
+                logger.info("Job %s (%s) cancelled", job["id"], job["type"])
+        except Exception as ex:
+            logger.warning("Job %s (%s) failed", job["id"], job["type"], exc_info=ex)
+            self.store.update_progress(job["id"], context.progress)
+            self.store.finish(job["id"], "failed", error=str(ex))
+        finally:
+            with self._running_lock:
+                self._running.pop(job["id"], None)
+
+
+__all__ = ["JobWorkerPool", "JobContext", "JobCancelledException"]
@@ -1,18 +1,66 @@
-import json
-import uuid
+import asyncio
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sentence_transformers import SentenceTransformer
+from pydantic import BaseModel
 
+from cache.embedding_cache import EmbeddingCache
 from common.service_type_enum import ServiceTypeEnum
 from exception.exception_handler import add_exception_handlers
+from job.job_worker_pool import JobWorkerPool, JobContext
+from model.chunk_encoder import ChunkEncoder
+from model.model_registry import model_registry, EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+from model.vector_compressor import vector_compressor
+from response.error_response import ErrorResponse
+from response.fast_json_response import FastJSONResponse, FastResponseRoute
 from response.success_response import SuccessResponse
 from security.security_config import GlobalAuthMiddleware
-from db.pinecone_client import index
-from utils.document_util import DocumentUtil
+from db.ingest_manifest import ingest_manifest
+from db.near_duplicate_index import near_duplicate_index, NearDuplicateIndex, NEAR_DUPLICATE_ENABLED
+from db.job_store import job_store
+from db.vector_store import vector_store
+from utils.content_id_util import ContentIdUtil
+from utils.document_util import DocumentUtil, SENTENCE_SPLIT_MODE
+from utils.ingest_pipeline import IngestPipeline, NDJSON_CONTENT_TYPES
+from utils.vector_spool import VectorSpool
 
-app = FastAPI()
+# onnx-int8 벡터는 torch 결과와 조금 다르므로 backend 별로 캐시 key 분리 (torch 는 기존 key 유지)
+embedding_cache = EmbeddingCache(
+    model_name=EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"
+)
+chunk_encoder = ChunkEncoder(cache=embedding_cache, compressor=vector_compressor)
+
+JOB_ENCODE_BATCH_SIZE = int(os.getenv("JOB_ENCODE_BATCH_SIZE", "256"))
+# GET /embedding 의 예시 문서 ID
+EMBEDDING_SAMPLE_DOCUMENT_ID = "embedding-sample"
+# 같은 spool 을 쓰는 작업끼리만 순서대로 실행
+spool_locks = defaultdict(threading.Lock)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 임베딩 모델은 서버 시작 시 1회만 로드
+    model_registry.warm_up()
+    await vector_store.start()
+    job_worker_pool.start()
+    yield
+    await asyncio.to_thread(job_worker_pool.stop)
+    chunk_encoder.shutdown()
+    DocumentUtil.close()
+    await vector_store.close()
+    ingest_manifest.close()
+    near_duplicate_index.close()
+    job_store.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.router.route_class = FastResponseRoute
 add_exception_handlers(app)
 app.add_middleware(GlobalAuthMiddleware)
 
@@ -25,56 +73,264 @@ app.add_middleware(
 )
 
 
-@app.get("/upsert")
-async def upsert(request: Request):
-    # vector_chunks.json 파일 읽기
-    with open("vector_chunks.json", "r", encoding="utf-8") as f:
-        vectors = json.load(f)
+class JobSubmitRequest(BaseModel):
+    type: Literal["embedding", "upsert"]
+    params: dict = {}
 
-    # Pinecone에 upsert
-    index.upsert(vectors=vectors)
-    return SuccessResponse.with_message(
+
+@app.get("/metrics")
+async def metrics():
+    return SuccessResponse.with_data(
         service_type=ServiceTypeEnum.SERVER,
-        message="vector_chunks.json 기반 벡터 upsert 완료!"
+        data={
+            "models": model_registry.stats(),
+            "vectorCompressor": vector_compressor.stats(),
+            "embeddingCache": embedding_cache.stats(),
+            "vectorStore": vector_store.stats(),
+            "ingestManifest": ingest_manifest.stats(),
+            "nearDuplicates": near_duplicate_index.stats() if NEAR_DUPLICATE_ENABLED else None,
+            "jobs": job_worker_pool.stats(),
+        }
     )
 
 
-@app.get("/embedding")
-async def embedding(request: Request):
-    # 1. 문서 원문
-    document_text = """
+@app.post("/ingest")
+async def ingest(request: Request, category: str = "news", max_tokens: int = 50,
+                 split_mode: Literal["kss", "parallel", "regex"] = SENTENCE_SPLIT_MODE,
+                 document_id: Optional[str] = None):
+    # document_id 는 text/plain 이면 필수 (NDJSON 은 줄마다 "id" 필수).
+    # 파일 이름 / 원본 URL 처럼 내용이 바뀌어도 유지되는 값을 써야 수정된 문서의 이전 chunk 가 삭제됨
+    content_type = request.headers.get("content-type", "text/plain").split(";")[0].strip()
+    if content_type not in NDJSON_CONTENT_TYPES and not document_id:
+        return bad_request("document_id 가 필요합니다.")
+
+    suffix = ".ndjson" if content_type in NDJSON_CONTENT_TYPES else ".txt"
+    upload_path = None
+    try:
+        # 1. 업로드 본문을 임시 파일로 스트리밍 (메모리에 전체를 올리지 않음)
+        #    client 연결이 끊겨서 stream 이 실패해도 finally 에서 임시 파일 삭제
+        with tempfile.NamedTemporaryFile("wb", suffix=suffix, delete=False) as f:
+            upload_path = f.name
+            async for block in request.stream():
+                await asyncio.to_thread(f.write, block)
+
+        # 2. clean -> split -> chunk -> (manifest 비교 / near-duplicate 제거) -> embed -> upsert 파이프라인 실행
+        #    같은 document_id 로 다시 보내면 변경된 chunk 만 upsert 되고 사라진 chunk 는 삭제됨
+        pipeline = IngestPipeline(
+            preprocessor=DocumentUtil(max_tokens=max_tokens, split_mode=split_mode),
+            chunk_encoder=chunk_encoder,
+            vector_store=vector_store,
+            manifest=ingest_manifest,
+            category=category,
+            near_duplicates=near_duplicate_index if NEAR_DUPLICATE_ENABLED else None,
+        )
+        progress = await asyncio.to_thread(pipeline.run, upload_path, content_type, document_id)
+    except ValueError as ex:
+        # NDJSON 형식 오류 / id 없는 줄 (그 전 줄의 문서까지는 반영됨)
+        return bad_request(f"잘못된 요청 본문입니다: {ex}")
+    finally:
+        if upload_path is not None:
+            os.remove(upload_path)
+
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data={**progress.to_dict(), "upsert": pipeline.upsert_summary}
+    )
+
+
+def validate_upsert_params(params: dict, payload: str = None):
+    VectorSpool.from_name(params.get("spool"))
+
+
+def run_upsert_job(params: dict, context: JobContext) -> dict:
     """
+    spool -> vector store upsert 작업. /ingest 와 같은 manifest 로 비교해서 변경된 chunk 만 upsert 하고,
+    문서에서 사라진 chunk 는 삭제.
+    :param params: {"spool": VECTOR_SPOOL_DIR 안의 spool 이름 (기본 VECTOR_SPOOL_PATH)}
+    """
+    spool = VectorSpool.from_name(params.get("spool"))
+    with spool_locks[spool.path]:
+        # 이전 포맷(vector_chunks.json)만 있으면 spool 로 변환
+        if not spool.exists() and os.path.exists("vector_chunks.json"):
+            context.report("import")
+            spool = VectorSpool.import_json("vector_chunks.json", spool.path)
+
+        total = len(spool)
+        pipeline = IngestPipeline(
+            preprocessor=None,
+            chunk_encoder=chunk_encoder,
+            vector_store=vector_store,
+            manifest=ingest_manifest,
+            # 중복 제거는 하지 않고, 삭제된 chunk 를 survivor 로 해서 버렸던 chunk 복구에만 사용
+            near_duplicates=near_duplicate_index if NEAR_DUPLICATE_ENABLED else None,
+        )
+
+        def iter_vectors():
+            # batch 를 만드는 사이사이 취소 확인 (취소되면 BulkUpserter 가 전송 중인 batch 까지만 보내고 종료)
+            for vector in spool.iter_vectors():
+                context.check_cancelled()
+                yield vector
+
+        def on_batch_done(result: dict, batch: list):
+            counters = pipeline.progress.counters
+            context.report("upsert", done=counters["upsert"] + counters["unchanged"], total=total)
+
+        # memmap 에서 한 행씩 읽으면서 변경된 벡터만 batch 병렬 upsert
+        context.report("upsert", done=0, total=total)
+        summary = pipeline.run_vectors(iter_vectors(), on_batch_done=on_batch_done)
+
+    progress = pipeline.progress.to_dict()
+    return {**summary, "unchangedChunks": progress["unchangedChunks"], "deletedChunks": progress["deletedChunks"]}
+
 
-    # 2. DocumentUtil을 사용한 청크 분리
-    preprocessor = DocumentUtil(max_tokens=50)  # 원하는 token 크기
+def validate_embedding_params(params: dict, payload: str = None):
+    """
+    submit 시 호출. 잘못된 작업은 대기열에 넣지 않고 400 으로 응답.
+    """
+    # /ingest 와 같이 내용이 바뀌어도 유지되는 문서 ID 가 있어야 upsert 때 이전 chunk 와 비교 가능
+    document_id = params.get("documentId")
+    if not isinstance(document_id, str) or not document_id:
+        raise ValueError("documentId is required")
+    max_tokens = params.get("maxTokens", 50)
+    if not isinstance(max_tokens, int) or isinstance(max_tokens, bool) or max_tokens <= 0:
+        raise ValueError(f"maxTokens must be a positive integer: {max_tokens!r}")
+    VectorSpool.from_name(params.get("spool"))
+
+
+def run_embedding_job(params: dict, context: JobContext) -> dict:
+    """
+    문서 -> chunk -> 임베딩 -> spool 저장 작업.
+    :param params: {"documentId": 문서 ID (필수), "category", "maxTokens", "spool"}. 문서 원문은 작업 payload
+    """
+    # submit 때 검사하지만, JobWorkerPool 을 거치지 않고 JobStore 에 직접 넣은 작업도 실행 전에 확인
+    validate_embedding_params(params)
+    document_id = params["documentId"]
+    document_text = context.payload() or ""
+    category = params.get("category", "news")
+    spool = VectorSpool.from_name(params.get("spool"))
+
+    # 1. DocumentUtil을 사용한 청크 분리
+    context.report("preprocess")
+    preprocessor = DocumentUtil(max_tokens=params.get("maxTokens", 50))  # 원하는 token 크기
     chunks = preprocessor.preprocess(document_text)
+    context.report("preprocess", done=len(chunks), total=len(chunks))
 
-    # 3. 모델 로드
-    model = SentenceTransformer('jhgan/ko-sroberta-multitask')  # 한국어 예시
+    # spool 은 작업마다 새로 쓰므로 문서 안에서만 near-duplicate 제거
+    duplicates = 0
+    if NEAR_DUPLICATE_ENABLED:
+        chunks, duplicates = NearDuplicateIndex(path=":memory:").deduplicate(chunks)
+        near_duplicate_index.record_duplicate(duplicates)
 
-    # 4. 각 청크에 대해 임베딩 생성 및 JSON 데이터 준비
-    vectors = []
-    document_id = str(uuid.uuid4())
+    with spool_locks[spool.path]:
+        # 2. 청크 batch 임베딩 결과를 spool 행렬(memmap)에 바로 기록
+        matrix = spool.allocate(len(chunks), chunk_encoder.dimension)
+        for start in range(0, len(chunks), JOB_ENCODE_BATCH_SIZE):
+            context.check_cancelled()
+            end = min(start + JOB_ENCODE_BATCH_SIZE, len(chunks))
+            chunk_encoder.encode(chunks[start:end], out=matrix[start:end])
+            context.report("encode", done=end, total=len(chunks))
+        matrix.flush()
 
-    for i, chunk in enumerate(chunks):
-        embedding = model.encode(chunk)
+        # 3. id / metadata sidecar 저장 (내용 기반 chunk ID 라서 다시 upsert 해도 중복 벡터가 생기지 않음)
+        seen = set()
+        spool.write_metadata(
+            ids=[ContentIdUtil.unique_chunk_id(document_id, chunk, seen) for chunk in chunks],
+            metadatas=[{"text": chunk, "category": category, "documentId": document_id} for chunk in chunks]
+        )
+        context.report("write", done=len(chunks), total=len(chunks))
+
+    return {"documentId": document_id, "chunks": len(chunks), "duplicateChunks": duplicates, "spool": spool.name}
 
-        vector_data = {
-            "id": f"{document_id}#chunk{i}",
-            "values": embedding.tolist(),
-            "metadata": {
-                "text": chunk,
-                "category": "news"
-            }
-        }
 
-        vectors.append(vector_data)
+job_worker_pool = JobWorkerPool(job_store)
+job_worker_pool.register("upsert", run_upsert_job, validate_upsert_params)
+job_worker_pool.register("embedding", run_embedding_job, validate_embedding_params)
 
-    # 5. JSON 파일로 저장
-    with open("vector_chunks.json", "w", encoding="utf-8") as f:
-        json.dump(vectors, f, ensure_ascii=False, indent=2)
 
-    return SuccessResponse.with_message(
+@app.post("/jobs")
+async def submit_job(job_request: JobSubmitRequest):
+    # 문서 원문은 params 와 따로 저장 (GET /jobs 응답에 포함되지 않음)
+    params = dict(job_request.params)
+    text = params.pop("text", None)
+    try:
+        job = await asyncio.to_thread(job_worker_pool.submit, job_request.type, params, text)
+    except ValueError as ex:
+        # 알 수 없는 작업 종류 / 필수 params 누락은 worker 에서 실패하기 전에 거절
+        return bad_request(f"잘못된 작업 요청입니다: {ex}")
+    return SuccessResponse.with_data(
         service_type=ServiceTypeEnum.SERVER,
-        message="vector_chunks.json 파일이 성공적으로 생성되었습니다."
-    )
\ No newline at end of file
+        data=job
+    )
+
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    jobs = await asyncio.to_thread(job_store.list, status, limit)
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data=jobs
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        return job_not_found(job_id)
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data=job
+    )
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await asyncio.to_thread(job_worker_pool.cancel, job_id)
+    if job is None:
+        return job_not_found(job_id)
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data=job
+    )
+
+
+def bad_request(message: str) -> FastJSONResponse:
+    error_response = ErrorResponse.with_message(
+        service_type=ServiceTypeEnum.SERVER,
+        message=message
+    )
+    return FastJSONResponse(status_code=400, content=error_response)
+
+
+def job_not_found(job_id: str) -> FastJSONResponse:
+    error_response = ErrorResponse.with_message(
+        service_type=ServiceTypeEnum.SERVER,
+        message=f"작업을 찾을 수 없습니다: {job_id}"
+    )
+    return FastJSONResponse(status_code=404, content=error_response)
+
+
+@app.get("/upsert")
+async def upsert(request: Request):
+    # upsert 는 worker pool 에서 실행하고 작업 ID 만 바로 반환 (GET /jobs/{id} 로 진행 상황 확인)
+    job = await asyncio.to_thread(job_worker_pool.submit, "upsert", {})
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data=job
+    )
+
+
+@app.get("/embedding")
+async def embedding(request: Request):
+    # 1. 문서 원문
+    document_text = """
+    """
+
+    # 2. 청크 분리 / 임베딩 / spool 저장은 worker pool 에서 실행하고 작업 ID 만 바로 반환
+    job = await asyncio.to_thread(
+        job_worker_pool.submit, "embedding", {"documentId": EMBEDDING_SAMPLE_DOCUMENT_ID, "maxTokens": 50}, document_text
+    )
+    return SuccessResponse.with_data(
+        service_type=ServiceTypeEnum.SERVER,
+        data=job
+    )
@@ -0,0 +1,171 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model.model_registry import model_registry, EMBEDDING_MODEL_NAME, EMBEDDING_DEVICE, EMBEDDING_BACKEND
+
+logger = logging.getLogger("uvicorn.error")
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))  # 0 이면 process pool 미사용
+
+
+def _init_worker(model_name: str, device: str, backend: str, threads: int):
+    """
+    process pool worker 초기화. worker 마다 모델을 1회 로드.
+    """
+    import torch
+    torch.set_num_threads(threads)
+    if not model_registry.onnx_threads:
+        model_registry.onnx_threads = threads
+    model_registry.get(model_name, device, backend)
+
+
+def _encode_in_worker(texts: list, model_name: str, device: str, backend: str) -> np.ndarray:
+    model = model_registry.get(model_name, device, backend)
+    return model.encode(texts, batch_size=len(texts), convert_to_numpy=True).astype(np.float32, copy=False)
+
+
+class ChunkEncoder:
+    """
+    chunk 리스트를 batch 단위로 임베딩하는 클래스.
+    길이순 정렬 후 batch 를 구성해서 padding 낭비를 줄이고,
+    결과는 미리 할당한 float32 행렬에 바로 기록.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, device: str = EMBEDDING_DEVICE,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, workers: int = EMBEDDING_WORKERS, cache=None,
+                 backend: str = EMBEDDING_BACKEND, compressor=None):
+        """
+        :param batch_size: 한 번의 forward 에 넣을 chunk 수
+        :param workers: CPU 전용 호스트에서 사용할 process 수 (0 이면 현재 프로세스에서 실행)
+        :param cache: (선택) EmbeddingCache. 캐시에 있는 chunk 는 encode 생략
+        :param backend: torch / onnx / onnx-int8
+        :param compressor: (선택) VectorCompressor. fit 되어 있으면 결과를 축소 차원으로 투영 (캐시는 원본 차원 그대로)
+        """
+        self.model_name = model_name
+        self.device = device
+        self.backend = backend
+        self.batch_size = batch_size
+        self.workers = workers
+        self.cache = cache
+        self.compressor = compressor
+        self._pool = None
+        # 여러 job worker thread 가 동시에 encode 해도 pool 은 1개만 생성
+        self._pool_lock = threading.Lock()
+
+    @property
+    def compressed(self) -> bool:
+        return self.compressor is not None and self.compressor.enabled
+
+    @property
+    def model_dimension(self) -> int:
+        return model_registry.get(self.model_name, self.device, self.backend).get_sentence_embedding_dimension()
+
+    @property
+    def dimension(self) -> int:
+        """
+        encode 결과 차원 (압축 사용 시 축소 차원).
+        """
+        return self.compressor.dimension if self.compressed else self.model_dimension
+
+    @property
+    def vector_space(self) -> str:
+        """
+        결과 벡터 공간 식별자. 압축 설정이 바뀌면 달라짐 (압축 미사용이면 빈 문자열).
+        """
+        return self.compressor.fingerprint if self.compressed else ""
+
+    def encode(self, chunks: list, out: np.ndarray = None) -> np.ndarray:
+        """
+        chunk 임베딩 실행.
+        :param chunks: chunk 문자열 리스트
+        :param out: 결과를 기록할 (len(chunks), dimension) float32 행렬 (ex. VectorSpool.allocate 의 memmap)
+        :return: (len(chunks), dimension) float32 행렬. 행 순서는 입력 순서와 동일
+        """
+        if not self.compressed:
+            return self._encode_raw(chunks, out=out)
+
+        projected = self.compressor.project(self._encode_raw(chunks))
+        if out is None:
+            return projected
+        out[:] = projected
+        return out
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _encode_raw(self, chunks: list, out: np.ndarray = None) -> np.ndarray:
+        """
+        모델 원본 차원 임베딩. 캐시 hit 은 바로 기록하고 miss 난 chunk 만 encode.
+        """
+        matrix = np.empty((len(chunks), self.model_dimension), dtype=np.float32) if out is None else out
+        if not chunks:
+            return matrix
+
+        if self.cache is None:
+            return self._encode_uncached(chunks, out=matrix)
+
+        missing = []
+        for i, vector in enumerate(self.cache.get_many(chunks)):
+            if vector is None:
+                missing.append(i)
+            else:
+                matrix[i] = vector
+
+        if missing:
+            missing_chunks = [chunks[i] for i in missing]
+            encoded = self._encode_uncached(missing_chunks)
+            matrix[missing] = encoded
+            self.cache.put_many(missing_chunks, encoded)
+        return matrix
+
+    def _encode_uncached(self, chunks: list, out: np.ndarray = None) -> np.ndarray:
+        matrix = np.empty((len(chunks), self.model_dimension), dtype=np.float32) if out is None else out
+        batches = self._length_sorted_batches(chunks)
+
+        if self.workers > 0:
+            pool = self._get_pool()
+            futures = [
+                (indices, pool.submit(
+                    _encode_in_worker, [chunks[i] for i in indices], self.model_name, self.device, self.backend
+                ))
+                for indices in batches
+            ]
+            for indices, future in futures:
+                matrix[indices] = future.result()
+        else:
+            model = model_registry.get(self.model_name, self.device, self.backend)
+            for indices in batches:
+                texts = [chunks[i] for i in indices]
+                matrix[indices] = model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+        return matrix
+
+    def _length_sorted_batches(self, chunks: list) -> list:
+        """
+        길이가 비슷한 chunk 끼리 묶어서 batch 내 padding 을 최소화.
+        """
+        order = np.argsort(np.fromiter((len(chunk) for chunk in chunks), dtype=np.int64, count=len(chunks)))
+        return [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                # torch 는 fork 이후 deadlock 가능성이 있어서 spawn 사용
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.device, self.backend, threads),
+                )
+                logger.info("ChunkEncoder process pool started: %d workers x %d threads", self.workers, threads)
+            return self._pool
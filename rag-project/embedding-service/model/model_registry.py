@@ -0,0 +1,168 @@
+import logging
+import os
+import resource
+import threading
+import time
+
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger("uvicorn.error")
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "jhgan/ko-sroberta-multitask")  # 한국어 예시 모델
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch / onnx / onnx-int8
+# export 한 ONNX 모델 저장 위치. 없으면 최초 로드 시 export
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "onnx_models")
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))  # intra-op thread 수. 0 이면 ONNX Runtime 기본값
+# dynamic int8 quantization 대상 CPU 명령어 세트 (arm64 / avx2 / avx512 / avx512_vnni)
+EMBEDDING_QUANTIZATION_CONFIG = os.getenv("EMBEDDING_QUANTIZATION_CONFIG", "avx2")
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _current_rss_bytes() -> int:
+    """
+    현재 프로세스의 resident memory (bytes).
+    /proc 를 읽을 수 없는 환경이면 peak RSS 로 대체.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss : Linux 는 KB 단위
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """
+    프로세스 전역 SentenceTransformer 레지스트리.
+    (model_name, device, backend) 당 하나의 인스턴스만 로드해서 공유.
+    backend 가 onnx / onnx-int8 이면 ONNX Runtime 으로 실행하고, encode 등 사용하는 쪽 인터페이스는 동일.
+    """
+
+    def __init__(self, onnx_dir: str = EMBEDDING_ONNX_DIR, onnx_threads: int = EMBEDDING_ONNX_THREADS,
+                 quantization_config: str = EMBEDDING_QUANTIZATION_CONFIG):
+        """
+        :param onnx_dir: export 한 ONNX 모델 저장 위치
+        :param onnx_threads: ONNX Runtime intra-op thread 수 (0 이면 기본값)
+        :param quantization_config: onnx-int8 의 quantization 대상 명령어 세트
+        """
+        self.onnx_dir = onnx_dir
+        self.onnx_threads = onnx_threads
+        self.quantization_config = quantization_config
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str = EMBEDDING_MODEL_NAME, device: str = EMBEDDING_DEVICE,
+            backend: str = EMBEDDING_BACKEND) -> SentenceTransformer:
+        """
+        로드된 모델 반환. 없으면 최초 1회 로드.
+        :param model_name: HuggingFace 모델 이름
+        :param device: cpu / cuda / mps
+        :param backend: torch / onnx / onnx-int8
+        """
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+        key = (model_name, device, backend)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # 다른 스레드가 먼저 로드했을 수 있음
+            model = self._models.get(key)
+            if model is None:
+                model = self._load(model_name, device, backend)
+                self._models[key] = model
+        return model
+
+    def warm_up(self, model_name: str = EMBEDDING_MODEL_NAME, device: str = EMBEDDING_DEVICE,
+                backend: str = EMBEDDING_BACKEND) -> SentenceTransformer:
+        """
+        lifespan 에서 호출. 모델 로드 + 더미 encode 1회로 첫 요청 지연 제거.
+        """
+        model = self.get(model_name, device, backend)
+        model.encode(["warm up"])
+        return model
+
+    def stats(self) -> list:
+        """
+        로드된 모델별 로드 시간과 메모리 사용량.
+        """
+        return [dict(stat) for stat in self._stats.values()]
+
+    def _load(self, model_name: str, device: str, backend: str) -> SentenceTransformer:
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+
+        if backend == "torch":
+            model = SentenceTransformer(model_name, device=device)
+        else:
+            model = self._load_onnx(model_name, device, quantized=backend == "onnx-int8")
+
+        load_seconds = time.perf_counter() - started
+        rss_after = _current_rss_bytes()
+
+        self._stats[(model_name, device, backend)] = {
+            "modelName": model_name,
+            "device": device,
+            "backend": backend,
+            "loadSeconds": round(load_seconds, 3),
+            "rssBeforeBytes": rss_before,
+            "rssAfterBytes": rss_after,
+            "rssDeltaBytes": rss_after - rss_before,
+        }
+        logger.info(
+            "Model loaded: %s (%s, %s) in %.2fs, rss +%.1fMB",
+            model_name, device, backend, load_seconds, (rss_after - rss_before) / 1024 / 1024
+        )
+        return model
+
+    def _load_onnx(self, model_name: str, device: str, quantized: bool) -> SentenceTransformer:
+        """
+        onnx_dir 에 export 해둔 모델을 ONNX Runtime 으로 로드. 없으면 먼저 export (+ int8 quantization).
+        """
+        import onnxruntime
+
+        export_dir = os.path.join(self.onnx_dir, model_name.replace("/", "__"))
+        file_suffix = f"int8_{self.quantization_config}" if quantized else None
+        file_name = f"onnx/model_{file_suffix}.onnx" if quantized else "onnx/model.onnx"
+        if not os.path.exists(os.path.join(export_dir, file_name)):
+            self._export_onnx(model_name, export_dir, file_suffix)
+
+        session_options = onnxruntime.SessionOptions()
+        if self.onnx_threads > 0:
+            session_options.intra_op_num_threads = self.onnx_threads
+        provider = "CUDAExecutionProvider" if device.startswith("cuda") else "CPUExecutionProvider"
+        return SentenceTransformer(
+            export_dir,
+            device=device,
+            backend="onnx",
+            model_kwargs={"file_name": file_name, "provider": provider, "session_options": session_options},
+        )
+
+    def _export_onnx(self, model_name: str, export_dir: str, file_suffix: str = None):
+        """
+        HuggingFace 모델을 ONNX 로 export. file_suffix 가 있으면 dynamic int8 quantization 모델도 같이 저장.
+        """
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        started = time.perf_counter()
+        onnx_path = os.path.join(export_dir, "onnx", "model.onnx")
+        if os.path.exists(onnx_path):
+            model = SentenceTransformer(export_dir, device="cpu", backend="onnx")
+        else:
+            # 저장소에 onnx 파일이 없으면 sentence-transformers 가 로드하면서 export
+            model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+            model.save(export_dir)
+        if file_suffix is not None:
+            export_dynamic_quantized_onnx_model(model, self.quantization_config, export_dir, file_suffix=file_suffix)
+        logger.info("ONNX model exported: %s -> %s in %.2fs", model_name, export_dir, time.perf_counter() - started)
+
+
+model_registry = ModelRegistry()
+
+__all__ = ["model_registry", "ModelRegistry", "EMBEDDING_MODEL_NAME", "EMBEDDING_DEVICE", "EMBEDDING_BACKEND"]
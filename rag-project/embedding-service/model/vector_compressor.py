@@ -0,0 +1,160 @@
+import argparse
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("uvicorn.error")
+
+# embedding-service / chat-service 가 같은 파일을 사용해야 문서와 질문이 같은 공간으로 투영됨
+VECTOR_COMPRESSOR_PATH = os.getenv("VECTOR_COMPRESSOR_PATH", "")  # 빈 문자열이면 압축 미사용
+VECTOR_COMPRESSION_DIM = int(os.getenv("VECTOR_COMPRESSION_DIM", "256"))
+VECTOR_COMPRESSION_METHOD = os.getenv("VECTOR_COMPRESSION_METHOD", "pca")  # pca / truncate
+VECTOR_COMPRESSION_SAMPLE = int(os.getenv("VECTOR_COMPRESSION_SAMPLE", "20000"))
+
+COMPRESSION_METHODS = ("pca", "truncate")
+
+
+class VectorCompressor:
+    """
+    임베딩 차원 축소 (PCA / 앞쪽 차원 truncation). corpus sample 로 fit 해서 .npz 로 저장하고,
+    문서 임베딩과 질문 임베딩에 같은 투영을 적용. 결과는 L2 정규화된 float32.
+    저장 파일이 없으면 project 는 입력을 그대로 반환.
+    """
+
+    def __init__(self, path: str = VECTOR_COMPRESSOR_PATH):
+        """
+        :param path: fit 결과 .npz 경로. 파일이 있으면 바로 로드
+        """
+        self.path = path
+        self.method = None
+        self.components = None
+        self.source_dimension = None
+        self.dimension = None
+        self.explained_variance = None
+        self.fingerprint = ""
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.method is not None
+
+    def fit(self, sample: np.ndarray, dimension: int = VECTOR_COMPRESSION_DIM,
+            method: str = VECTOR_COMPRESSION_METHOD) -> "VectorCompressor":
+        """
+        :param sample: (N, source_dimension) 압축 전 임베딩 sample
+        :param dimension: 축소 후 차원
+        :param method: pca / truncate
+        """
+        if method not in COMPRESSION_METHODS:
+            raise ValueError(f"Unknown compression method: {method}")
+        sample = self._normalize(np.asarray(sample, dtype=np.float32))
+        if not 0 < dimension <= sample.shape[1]:
+            raise ValueError(f"dimension must be in 1..{sample.shape[1]}: {dimension}")
+
+        if method == "pca":
+            # 저장소 점수가 내적(cosine)이므로 평균을 빼지 않고 (uncentered) 내적을 가장 잘 보존하는 축을 사용
+            _, singular_values, vt = np.linalg.svd(sample.astype(np.float64), full_matrices=False)
+            energy = singular_values ** 2
+            self.components = np.ascontiguousarray(vt[:dimension].T, dtype=np.float32)
+            self.explained_variance = float(energy[:dimension].sum() / energy.sum())
+        else:
+            self.components = None
+            self.explained_variance = float((sample[:, :dimension] ** 2).sum() / (sample ** 2).sum())
+
+        self.method = method
+        self.source_dimension = sample.shape[1]
+        self.dimension = dimension
+        self.fingerprint = self._fingerprint()
+        logger.info("VectorCompressor fitted: %s %d -> %d (%.1f%% energy kept)",
+                    method, self.source_dimension, dimension, self.explained_variance * 100)
+        return self
+
+    def project(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        :param matrix: (N, source_dimension) 임베딩
+        :return: (N, dimension) L2 정규화된 float32 행렬
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if not self.enabled:
+            return matrix
+        if matrix.shape[1] != self.source_dimension:
+            raise ValueError(f"Expected {self.source_dimension}-dim embeddings, got {matrix.shape[1]}")
+        if self.method == "pca":
+            return self._normalize(matrix @ self.components)
+        return self._normalize(matrix[:, :self.dimension])
+
+    def save(self, path: str = None):
+        path = path or self.path
+        # 읽는 쪽이 쓰는 중인 파일을 보지 않도록 rename 으로 교체
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                method=np.array(self.method),
+                components=np.zeros((0, 0), dtype=np.float32) if self.components is None else self.components,
+                source_dimension=np.array(self.source_dimension),
+                dimension=np.array(self.dimension),
+                explained_variance=np.array(self.explained_variance),
+            )
+        os.replace(path + ".tmp", path)
+        self.path = path
+
+    def load(self, path: str = None):
+        path = path or self.path
+        with np.load(path) as data:
+            self.method = str(data["method"])
+            self.components = data["components"] if self.method == "pca" else None
+            self.source_dimension = int(data["source_dimension"])
+            self.dimension = int(data["dimension"])
+            self.explained_variance = float(data["explained_variance"])
+        self.path = path
+        self.fingerprint = self._fingerprint()
+        logger.info("VectorCompressor loaded: %s (%s %d -> %d)", path, self.method, self.source_dimension, self.dimension)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "method": self.method,
+            "sourceDimension": self.source_dimension,
+            "dimension": self.dimension,
+            "explainedVariance": None if self.explained_variance is None else round(self.explained_variance, 4),
+            "fingerprint": self.fingerprint,
+        }
+
+    def _fingerprint(self) -> str:
+        digest = hashlib.blake2b(f"{self.method}:{self.source_dimension}:{self.dimension}".encode("utf-8"), digest_size=8)
+        if self.components is not None:
+            digest.update(self.components.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+vector_compressor = VectorCompressor()
+
+__all__ = ["vector_compressor", "VectorCompressor", "VECTOR_COMPRESSOR_PATH"]
+
+
+if __name__ == "__main__":
+    # python -m model.vector_compressor vector_chunks.npy --dimension 256 --output vector_compressor.npz
+    parser = argparse.ArgumentParser(description="압축 전 임베딩 행렬(.npy) sample 로 VectorCompressor fit")
+    parser.add_argument("matrix_path", help="압축 전 (N, dim) float32 .npy (ex. vector spool)")
+    parser.add_argument("--dimension", type=int, default=VECTOR_COMPRESSION_DIM)
+    parser.add_argument("--method", choices=COMPRESSION_METHODS, default=VECTOR_COMPRESSION_METHOD)
+    parser.add_argument("--sample", type=int, default=VECTOR_COMPRESSION_SAMPLE)
+    parser.add_argument("--output", default=VECTOR_COMPRESSOR_PATH or "vector_compressor.npz")
+    args = parser.parse_args()
+
+    source = np.load(args.matrix_path, mmap_mode="r")
+    rows = np.random.default_rng(42).choice(len(source), min(args.sample, len(source)), replace=False)
+    compressor = VectorCompressor(path="").fit(source[np.sort(rows)], args.dimension, args.method)
+    compressor.save(args.output)
+    print(f"{args.output} 생성 완료: {compressor.method} {compressor.source_dimension} -> {compressor.dimension}, "
+          f"energy {compressor.explained_variance:.4f} (sample {len(rows)})")
@@ -0,0 +1,106 @@
+import functools
+import inspect
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from common.service_type_enum import ServiceTypeEnum
+from response.common_response import CommonResponse
+from response.error_response import ErrorResponse
+from utils.time_util import TimeUtil
+
+try:
+    # (선택) 설치되어 있으면 dict / list 직렬화에 사용
+    import orjson
+except ImportError:
+    orjson = None
+
+_TIMESTAMP_PLACEHOLDER = "__timestamp__"
+
+
+def dumps(content) -> bytes:
+    """
+    JSON bytes 직렬화. pydantic 모델은 pydantic-core 가 바로 직렬화하고,
+    dict / list 는 orjson 이 있으면 orjson (모르는 타입이 섞여 있으면 pydantic-core) 사용.
+    """
+    if isinstance(content, bytes):
+        return content
+    if orjson is not None and not isinstance(content, BaseModel):
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    jsonable_encoder / json.dumps 대신 dumps 로 바로 bytes 를 만드는 JSONResponse.
+    FastAPI(default_response_class=FastJSONResponse) 로 지정.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class PrerenderedErrorResponse:
+    """
+    message 가 고정된 ErrorResponse (ex. "Token empty.") body 를 한 번만 직렬화해두고,
+    요청마다 timestamp 만 끼워 넣어서 반환.
+    """
+
+    def __init__(self, status_code: int, service_type: ServiceTypeEnum, message: str):
+        error_response = ErrorResponse.with_message(service_type=service_type, message=message)
+        error_response.timestamp = _TIMESTAMP_PLACEHOLDER
+        body = to_json(error_response)
+        self.status_code = status_code
+        self._prefix, self._suffix = body.split(f'"{_TIMESTAMP_PLACEHOLDER}"'.encode("utf-8"), 1)
+
+    def __call__(self) -> FastJSONResponse:
+        timestamp = f'"{TimeUtil.get_unix_timestamp_ms()}"'.encode("utf-8")
+        return FastJSONResponse(status_code=self.status_code, content=self._prefix + timestamp + self._suffix)
+
+
+class FastResponseRoute(APIRoute):
+    """
+    endpoint 가 SuccessResponse / ErrorResponse 를 반환하면 FastAPI 의 jsonable_encoder 단계를 건너뛰고
+    바로 FastJSONResponse 로 만드는 route. app.router.route_class 로 지정 (route 등록 전에).
+    response_model 을 지정한 route 는 FastAPI 기본 처리(검증 / 필터링)를 그대로 사용.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        if response_model is None or isinstance(response_model, DefaultPlaceholder):
+            endpoint = _wrap_endpoint(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _wrap_endpoint(endpoint, status_code: int = None):
+    # FastAPI 가 원래 함수의 signature 로 parameter 를 해석하도록 functools.wraps 사용
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            return _to_response(await endpoint(*args, **kwargs), kwargs, status_code)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            return _to_response(endpoint(*args, **kwargs), kwargs, status_code)
+    return wrapper
+
+
+def _to_response(content, kwargs: dict, status_code: int = None):
+    if not isinstance(content, CommonResponse):
+        return content
+
+    response = FastJSONResponse(content=content, status_code=status_code or 200)
+    # endpoint 가 주입받은 Response 에 설정한 status / header 반영 (FastAPI 기본 처리와 동일)
+    for value in kwargs.values():
+        if isinstance(value, Response):
+            if value.status_code:
+                response.status_code = value.status_code
+            response.raw_headers.extend(value.raw_headers)
+    return response
@@ -1,9 +1,10 @@
-from fastapi.responses import JSONResponse
-
 from common.service_type_enum import ServiceTypeEnum
-from response.error_response import ErrorResponse
+from response.fast_json_response import PrerenderedErrorResponse
+
+_role_empty_response = PrerenderedErrorResponse(
+    status_code=480, service_type=ServiceTypeEnum.SECURITY_LOGIN, message="Role empty."
+)
 
 
 def forbidden_response():
-    content = ErrorResponse.with_message(service_type=ServiceTypeEnum.SECURITY_LOGIN, message="Role empty.")
-    return JSONResponse(status_code=480, content=content.dict())
+    return _role_empty_response()
@@ -0,0 +1,4 @@
+import os
+
+# 테스트는 Pinecone / 로컬 파일 대신 메모리 전용 fake index 사용 (db.vector_store import 전에 설정)
+os.environ.setdefault("VECTOR_STORE_BACKEND", "fake")
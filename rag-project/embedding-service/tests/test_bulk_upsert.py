@@ -0,0 +1,59 @@
+from db.bulk_upsert import BulkUpserter
+from db.vector_store import FakeIndex, create_vector_store
+
+
+def _vectors(count: int, text: str = "본문"):
+    for i in range(count):
+        yield {"id": f"doc#{i}", "values": [float(i), 1.0, 0.0, 0.5], "metadata": {"text": text}}
+
+
+def test_fake_backend_is_registered():
+    assert isinstance(create_vector_store("fake"), FakeIndex)
+
+
+def test_batches_by_count_and_bytes():
+    index = FakeIndex()
+    summary = BulkUpserter(index, max_batch_count=100).run(_vectors(250))
+
+    assert summary["batches"] == 3
+    assert [result["count"] for result in summary["results"]] == [100, 100, 50]
+    assert summary["upserted"] == 250
+    assert len(index.vectors) == 250
+
+    index = FakeIndex()
+    summary = BulkUpserter(index, max_batch_count=100, max_batch_bytes=1024).run(_vectors(50))
+
+    assert summary["batches"] > 1
+    assert all(result["bytes"] <= 1024 for result in summary["results"])
+    assert len(index.vectors) == 50
+
+
+def test_retries_transient_failures():
+    index = FakeIndex(fail_calls=2)
+    upserter = BulkUpserter(index, max_in_flight=1, max_retries=3, backoff_base=0.0)
+    summary = upserter.run(_vectors(10))
+
+    assert summary["failed"] == 0
+    assert summary["results"][0]["attempts"] == 3
+    assert index.upsert_calls == 3
+    assert len(index.vectors) == 10
+
+
+def test_partial_failure_is_reported_per_batch():
+    """
+    index 요청 한도를 넘는 batch 는 400 (재시도하지 않음) 으로 실패하고, 나머지 batch 는 저장됨.
+    """
+    index = FakeIndex(max_request_bytes=4096)
+    vectors = list(_vectors(4)) + [{"id": "doc#big", "values": [1.0, 0.0, 0.0, 0.0], "metadata": {"text": "x" * 8192}}]
+    done = []
+    summary = BulkUpserter(index, max_batch_count=1, max_retries=3, backoff_base=0.0).run(
+        vectors, on_batch_done=lambda result, batch: done.append((result["success"], batch[0]["id"]))
+    )
+
+    assert summary["succeeded"] == 4
+    assert summary["failed"] == 1
+    failed = [result for result in summary["results"] if not result["success"]]
+    assert failed[0]["attempts"] == 1
+    assert sorted(done) == [(False, "doc#big")] + [(True, f"doc#{i}") for i in range(4)]
+    assert "doc#big" not in index.vectors
+    assert len(index.vectors) == 4
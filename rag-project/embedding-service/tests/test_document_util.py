@@ -0,0 +1,35 @@
+import re
+
+import pytest
+
+from utils.document_util import DocumentUtil
+
+TEXTS = [
+    '그는 "안녕하세요." 라고 말했다.',
+    '(참고: 추가 정보.) 다음 문장입니다.',
+    "기자가 '정말요?' 하고 물었다. [속보!] 오늘 발표가 있었다…  그리고 “끝났다.”) 마지막 문장.",
+]
+
+
+def _non_whitespace(text: str) -> str:
+    return re.sub(r"\s+", "", text)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_regex_split_keeps_every_character(text):
+    """
+    regex 분할은 공백에서만 잘라야 함. 닫는 따옴표 / 괄호가 구분자로 빠지면 안 됨.
+    """
+    util = DocumentUtil(max_tokens=8, split_mode="regex")
+    sentences = util.split_into_sentences(text)
+    chunks = util.chunk_sentences(sentences)
+
+    assert _non_whitespace("".join(sentences)) == _non_whitespace(text)
+    assert _non_whitespace("".join(chunks)) == _non_whitespace(text)
+
+
+def test_regex_split_attaches_closers_to_sentence():
+    util = DocumentUtil(split_mode="regex")
+
+    assert util.split_into_sentences(TEXTS[0]) == ['그는 "안녕하세요."', '라고 말했다.']
+    assert util.split_into_sentences(TEXTS[1]) == ['(참고: 추가 정보.)', '다음 문장입니다.']
@@ -0,0 +1,34 @@
+import json
+import logging
+import os
+import urllib.request
+
+logger = logging.getLogger("uvicorn.error")
+
+CHAT_SERVICE_URL = os.getenv("CHAT_SERVICE_URL", "")
+
+
+class CacheInvalidationUtil:
+
+    @staticmethod
+    def notify(categories: list, timeout: float = 3.0) -> bool:
+        """
+        upsert 된 category 의 chat-service semantic cache 무효화 요청.
+        CHAT_SERVICE_URL 이 없으면 아무것도 하지 않음. 실패해도 upsert 결과에는 영향 없음.
+        """
+        if not CHAT_SERVICE_URL:
+            return False
+
+        body = json.dumps({"categories": sorted(categories)}).encode("utf-8")
+        request = urllib.request.Request(
+            f"{CHAT_SERVICE_URL.rstrip('/')}/cache/invalidate",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout):
+                return True
+        except Exception as ex:
+            logger.warning("Semantic cache invalidation failed", exc_info=ex)
+            return False
@@ -0,0 +1,47 @@
+import hashlib
+import json
+
+
+class ContentIdUtil:
+    """
+    내용 기반 chunk ID (문서 ID 는 호출하는 쪽에서 지정).
+    같은 내용이면 실행할 때마다 같은 ID 가 나오므로 재수집 시 변경된 chunk 만 골라낼 수 있음.
+    """
+
+    @staticmethod
+    def digest(text: str, size: int = 16) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=size).hexdigest()
+
+    @staticmethod
+    def chunk_id(document_id: str, text: str, occurrence: int = 0) -> str:
+        """
+        :param occurrence: 같은 문서에 같은 텍스트의 chunk 가 여러 개일 때 몇 번째인지
+        """
+        chunk_id = f"{document_id}#{ContentIdUtil.digest(text, size=8)}"
+        if occurrence:
+            chunk_id += f"-{occurrence}"
+        return chunk_id
+
+    @staticmethod
+    def unique_chunk_id(document_id: str, text: str, seen: set) -> str:
+        """
+        문서 안에서 이미 사용한 ID(seen) 와 겹치지 않는 chunk ID. 반환한 ID 는 seen 에 추가.
+        """
+        occurrence = 0
+        chunk_id = ContentIdUtil.chunk_id(document_id, text)
+        while chunk_id in seen:
+            occurrence += 1
+            chunk_id = ContentIdUtil.chunk_id(document_id, text, occurrence)
+        seen.add(chunk_id)
+        return chunk_id
+
+    @staticmethod
+    def content_hash(text: str, metadata: dict, vector_space: str = "") -> str:
+        """
+        chunk 텍스트 + metadata hash. 값이 바뀌면 같은 ID 라도 다시 upsert.
+        :param vector_space: 벡터 공간 식별자 (ex. 압축 fingerprint). 바뀌면 모든 chunk 를 다시 upsert
+        """
+        payload = json.dumps(metadata, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        if vector_space:
+            payload += "\x00" + vector_space
+        return ContentIdUtil.digest(text + "\x00" + payload)
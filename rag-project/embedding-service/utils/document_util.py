@@ -1,70 +1,303 @@
+import multiprocessing
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
 import tiktoken
 import kss
 
+from utils.text_cleaner import TextCleaner
+
+SPLIT_MODES = ("kss", "parallel", "regex")
+SENTENCE_SPLIT_MODE = os.getenv("SENTENCE_SPLIT_MODE", "kss")
+SENTENCE_SPLIT_WORKERS = int(os.getenv("SENTENCE_SPLIT_WORKERS", str(os.cpu_count() or 1)))
+
+_HANGUL_PATTERN = re.compile(r'[가-힣]')
+_ENGLISH_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+# 문장 부호(닫는 따옴표 / 괄호 2개까지 포함) 뒤 공백. kss 보다 부정확하지만 훨씬 빠름
+# 닫는 따옴표 / 괄호는 앞 문장에 남도록 lookbehind 안에 둠 (split 구분자는 공백만)
+_SENTENCE_CLOSERS = r'[\'"”’)\]]'
+_FAST_SENTENCE_BOUNDARY = re.compile(
+    rf'(?:(?<=[.!?。…])|(?<=[.!?。…]{_SENTENCE_CLOSERS})|(?<=[.!?。…]{_SENTENCE_CLOSERS}{_SENTENCE_CLOSERS}))\s+'
+)
+# 병렬 분할 시 segment 를 자를 안전한 경계 (문단 > 문장 부호 뒤 공백)
+_SEGMENT_BOUNDARIES = (re.compile(r'\n\s*\n'), re.compile(r'(?<=[.!?。])\s+'))
+
+_split_pool = None
+_split_pool_lock = threading.Lock()
+
+
+def _get_split_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    kss 병렬 분할용 process pool (프로세스 전역 1개).
+    """
+    global _split_pool
+    with _split_pool_lock:
+        if _split_pool is None:
+            _split_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _split_pool
+
+
+@dataclass
+class TextChunk:
+    """
+    chunk 텍스트와 원문(clean_text 결과) 기준 문자 / 토큰 위치.
+    """
+    text: str
+    char_start: int
+    char_end: int
+    token_start: int
+    token_end: int
+
+    @property
+    def token_count(self) -> int:
+        return self.token_end - self.token_start
+
 
 class DocumentUtil:
     """
     문서 전처리 및 chunking 담당 클래스.
     """
 
-    def __init__(self, max_tokens: int = 500, encoding_name: str = "cl100k_base"):
+    def __init__(self, max_tokens: int = 500, encoding_name: str = "cl100k_base", overlap_tokens: int = 0,
+                 split_mode: str = SENTENCE_SPLIT_MODE, split_workers: int = SENTENCE_SPLIT_WORKERS,
+                 split_segment_chars: int = 20_000):
         """
         초기화 메서드.
         :param max_tokens: 각 chunk의 최대 토큰 수
         :param encoding_name: 사용할 tokenizer 이름 (기본: cl100k_base, OpenAI 최신 tokenizer)
+        :param overlap_tokens: 이전 chunk 끝 문장을 다음 chunk 앞에 겹쳐 넣을 최대 토큰 수
+        :param split_mode: 한글 문장 분할 방식. kss / parallel (kss 를 process pool 에서 병렬 실행) / regex (빠른 근사)
+        :param split_workers: parallel 모드 process 수
+        :param split_segment_chars: parallel 모드에서 한 process 에 넘길 segment 크기 (문자 수)
         """
+        if split_mode not in SPLIT_MODES:
+            raise ValueError(f"split_mode must be one of {SPLIT_MODES}: {split_mode}")
+
         self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.split_mode = split_mode
+        self.split_workers = split_workers
+        self.split_segment_chars = split_segment_chars
         self.tokenizer = tiktoken.get_encoding(encoding_name)
 
+    @staticmethod
+    def close():
+        """
+        parallel 분할용 process pool 종료 (서버 종료 시). 다음 parallel 분할에서 다시 생성됨.
+        """
+        global _split_pool
+        with _split_pool_lock:
+            if _split_pool is not None:
+                _split_pool.shutdown(wait=True, cancel_futures=True)
+                _split_pool = None
+
     def clean_text(self, text: str) -> str:
         """
         기본적인 전처리 함수.
-        HTML 태그, 여러 공백 제거 등.
+        HTML 태그 / entity / script, style 제거, 여러 공백을 하나로.
+        """
+        return TextCleaner.clean(text)
+
+    def clean_blocks(self, blocks):
         """
-        text = re.sub(r'<[^>]+>', '', text)  # HTML 태그 제거
-        text = re.sub(r'\s+', ' ', text)     # 여러 공백을 하나로
-        text = text.strip()
-        return text
+        clean_text 의 streaming 버전.
+        :param blocks: text block iterable (파일 read 등)
+        :return: 정리된 텍스트 조각 generator (이어붙이면 clean_text 결과와 같음)
+        """
+        return TextCleaner().iter_clean(blocks)
 
-    def split_into_sentences(self, text: str) -> list:
+    def split_into_sentences(self, text: str, mode: str = None) -> list:
         """
         문장을 기준으로 분할.
-        한글 포함 시 kss를 사용하고, 그렇지 않으면 기본 영어 분할 패턴 사용.
+        한글 포함 시 split_mode 에 따라 kss / 병렬 kss / 정규식을 사용하고, 그렇지 않으면 기본 영어 분할 패턴 사용.
+        :param mode: 이번 호출에만 적용할 split_mode
         """
+        mode = mode or self.split_mode
+
         # 한글이 포함되어 있으면 kss 사용
-        if re.search(r'[가-힣]', text):
-            sentences = kss.split_sentences(text)
+        if _HANGUL_PATTERN.search(text):
+            if mode == "regex":
+                sentences = [sentence for sentence in _FAST_SENTENCE_BOUNDARY.split(text) if sentence]
+            elif mode == "parallel" and len(text) > self.split_segment_chars:
+                sentences = self._split_parallel(text)
+            else:
+                sentences = kss.split_sentences(text)
         else:
             # 영어 기준 기본 패턴
-            sentences = re.split(r'(?<=[.!?])\s+', text)
+            sentences = _ENGLISH_SENTENCE_BOUNDARY.split(text)
         return sentences
 
+    def _split_parallel(self, text: str) -> list:
+        """
+        안전한 경계에서 segment 로 나눈 뒤 process pool 에서 kss 실행, 순서대로 이어붙임.
+        """
+        segments = self._segment_text(text)
+        if len(segments) == 1:
+            return kss.split_sentences(text)
+
+        pool = _get_split_pool(self.split_workers)
+        sentences = []
+        for segment_sentences in pool.map(kss.split_sentences, segments):
+            sentences.extend(sentence for sentence in segment_sentences if sentence.strip())
+        return sentences
+
+    def _segment_text(self, text: str) -> list:
+        """
+        split_segment_chars 근처의 문단 / 문장 부호 경계에서 text 를 자름.
+        경계를 찾지 못하면 해당 구간은 자르지 않음 (문장이 중간에 잘리지 않도록).
+        """
+        segments = []
+        start = 0
+        while len(text) - start > self.split_segment_chars:
+            limit = start + self.split_segment_chars
+            cut = None
+            for boundary in _SEGMENT_BOUNDARIES:
+                # limit 이전의 마지막 경계, 없으면 limit 이후의 첫 경계
+                last = None
+                for match in boundary.finditer(text, start + self.split_segment_chars // 2, limit):
+                    last = match
+                if last is None:
+                    last = boundary.search(text, limit)
+                if last is not None:
+                    cut = last.end()
+                    break
+            if cut is None:
+                break
+            segments.append(text[start:cut])
+            start = cut
+
+        segments.append(text[start:])
+        return [segment for segment in segments if segment.strip()]
+
     def chunk_sentences(self, sentences: list) -> list:
         """
         여러 문장을 합쳐서 chunk를 생성.
         각 chunk의 토큰 개수가 max_tokens를 넘지 않도록 제한.
         """
+        return [chunk.text for chunk in self.chunk_with_spans(sentences)]
+
+    def chunk_with_spans(self, sentences: list, text: str = None) -> list:
+        """
+        chunk_sentences 와 같은 규칙으로 chunk 를 만들고 문자 / 토큰 위치를 함께 반환.
+        문장 토큰화는 encode_batch 로 한 번에 처리하고, max_tokens 를 넘는 문장은 토큰 단위로 잘라냄.
+        :param sentences: split_into_sentences 결과
+        :param text: 문장들이 나온 원문. 없으면 문장을 공백으로 이은 문자열 기준 위치
+        :return: TextChunk 리스트
+        """
+        if text is None:
+            text = " ".join(sentences)
+
+        token_lists = self.tokenizer.encode_batch(sentences)
+        pieces = self._sentence_pieces(sentences, token_lists, text)
+
         chunks = []
-        current_chunk = ""
+        current = []
         current_tokens = 0
 
-        for sentence in sentences:
-            sentence_tokens = len(self.tokenizer.encode(sentence))
+        for piece in pieces:
+            if current and current_tokens + piece.token_count > self.max_tokens:
+                chunks.append(self._build_chunk(current))
+                current = self._overlap_tail(current, piece.token_count)
+                current_tokens = sum(item.token_count for item in current)
+            current.append(piece)
+            current_tokens += piece.token_count
+
+        if current:
+            chunks.append(self._build_chunk(current))
+
+        return [chunk for chunk in chunks if chunk.text]
 
-            if current_tokens + sentence_tokens <= self.max_tokens:
-                current_chunk += " " + sentence
-                current_tokens += sentence_tokens
+    def _sentence_pieces(self, sentences: list, token_lists: list, text: str) -> list:
+        """
+        문장별 TextChunk 목록.
+        max_tokens 보다 긴 문장은 max_tokens 단위 조각으로 분리.
+        """
+        pieces = []
+        char_cursor = 0
+        token_cursor = 0
+
+        for sentence, tokens in zip(sentences, token_lists):
+            stripped = sentence.strip()
+            if not stripped:
+                token_cursor += len(tokens)
+                continue
+
+            char_start = text.find(stripped, char_cursor)
+            if char_start < 0:
+                char_start = char_cursor
+            char_cursor = char_start + len(stripped)
+
+            if len(tokens) <= self.max_tokens:
+                pieces.append(TextChunk(stripped, char_start, char_cursor, token_cursor, token_cursor + len(tokens)))
             else:
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-                current_tokens = sentence_tokens
+                for piece_text, offset, token_offset, token_count in self._hard_split(sentence, tokens):
+                    piece_start = char_start + max(0, offset - (len(sentence) - len(sentence.lstrip())))
+                    pieces.append(TextChunk(piece_text, piece_start, piece_start + len(piece_text),
+                                            token_cursor + token_offset, token_cursor + token_offset + token_count))
+            token_cursor += len(tokens)
 
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        return pieces
 
-        return chunks
+    def _hard_split(self, sentence: str, tokens: list) -> list:
+        """
+        긴 문장을 max_tokens 단위로 자름. UTF-8 문자 중간에서 잘리지 않도록 경계를 조정.
+        :return: (text, char_offset, token_offset, token_count) 리스트
+        """
+        token_bytes = [self.tokenizer.decode_single_token_bytes(token) for token in tokens]
+        sentence_bytes = b"".join(token_bytes)
+
+        byte_offsets = [0]
+        for piece in token_bytes:
+            byte_offsets.append(byte_offsets[-1] + len(piece))
+
+        pieces = []
+        start = 0
+        char_offset = 0
+        while start < len(tokens):
+            end = min(start + self.max_tokens, len(tokens))
+            # 한글 등 multi-byte 문자가 토큰 경계에서 나뉘면 문자 시작 위치까지 뒤로 이동
+            while end < len(tokens) and end > start + 1 and (sentence_bytes[byte_offsets[end]] & 0xC0) == 0x80:
+                end -= 1
+
+            piece_bytes = sentence_bytes[byte_offsets[start]:byte_offsets[end]]
+            piece_text = piece_bytes.decode("utf-8", errors="ignore")
+            if piece_text.strip():
+                leading = len(piece_text) - len(piece_text.lstrip())
+                pieces.append((piece_text.strip(), char_offset + leading, start, end - start))
+            char_offset += len(piece_text)
+            start = end
+
+        return pieces
+
+    def _overlap_tail(self, pieces: list, next_tokens: int) -> list:
+        """
+        다음 chunk 앞에 겹쳐 넣을 이전 chunk 의 끝 문장들.
+        """
+        if self.overlap_tokens <= 0:
+            return []
+
+        tail = []
+        tail_tokens = 0
+        for piece in reversed(pieces):
+            tokens = tail_tokens + piece.token_count
+            if tokens > self.overlap_tokens or tokens + next_tokens > self.max_tokens:
+                break
+            tail.insert(0, piece)
+            tail_tokens = tokens
+        return tail
+
+    @staticmethod
+    def _build_chunk(pieces: list) -> TextChunk:
+        return TextChunk(
+            text=" ".join(piece.text for piece in pieces).strip(),
+            char_start=pieces[0].char_start,
+            char_end=pieces[-1].char_end,
+            token_start=pieces[0].token_start,
+            token_end=pieces[-1].token_end,
+        )
 
     def preprocess(self, document_text: str) -> list:
         """
@@ -75,4 +308,12 @@ class DocumentUtil:
         cleaned = self.clean_text(document_text)
         sentences = self.split_into_sentences(cleaned)
         chunks = self.chunk_sentences(sentences)
-        return chunks
\ No newline at end of file
+        return chunks
+
+    def preprocess_with_spans(self, document_text: str) -> list:
+        """
+        preprocess 와 같지만 chunk 별 위치 정보(TextChunk)를 반환.
+        """
+        cleaned = self.clean_text(document_text)
+        sentences = self.split_into_sentences(cleaned)
+        return self.chunk_with_spans(sentences, cleaned)
\ No newline at end of file
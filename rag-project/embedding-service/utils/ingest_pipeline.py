@@ -0,0 +1,422 @@
+import json
+import logging
+import threading
+import time
+
+from db.bulk_upsert import BulkUpserter
+from utils.cache_invalidation_util import CacheInvalidationUtil
+from utils.content_id_util import ContentIdUtil
+from utils.document_util import DocumentUtil
+
+logger = logging.getLogger("uvicorn.error")
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+DELETE_BATCH_COUNT = 1000  # Pinecone delete 요청당 최대 ID 수
+RESTORE_PASS_COUNT = 3  # survivor 삭제로 되살린 chunk 가 다시 survivor 삭제를 일으킬 때 반복할 최대 횟수
+
+
+class IngestProgress:
+    """
+    ingest 단계별 진행 상황 카운터.
+    """
+
+    STAGES = ("read", "clean", "split", "chunk", "unchanged", "duplicate", "restore", "embed", "upsert", "delete")
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.documents = 0
+        self.categories = set()
+        self.counters = {stage: 0 for stage in self.STAGES}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, amount: int = 1):
+        with self._lock:
+            self.counters[stage] += amount
+
+    def add_document(self, category: str):
+        with self._lock:
+            self.documents += 1
+            self.categories.add(category)
+
+    def add_category(self, category: str):
+        with self._lock:
+            self.categories.add(category)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "readBytes": self.counters["read"],
+                "cleanedChars": self.counters["clean"],
+                "sentences": self.counters["split"],
+                "chunks": self.counters["chunk"],
+                "unchangedChunks": self.counters["unchanged"],
+                "duplicateChunks": self.counters["duplicate"],
+                "restoredChunks": self.counters["restore"],
+                "encodesSaved": self.counters["unchanged"] + self.counters["duplicate"],
+                "embedded": self.counters["embed"],
+                "upserted": self.counters["upsert"],
+                "deletedChunks": self.counters["delete"],
+                "elapsedSeconds": round(time.time() - self.started_at, 3),
+            }
+
+
+class IngestPipeline:
+    """
+    업로드 파일을 read/clean -> split -> chunk -> embed -> upsert generator 파이프라인으로 처리.
+    문서 전체를 메모리에 올리지 않고 segment / batch 단위로 흘려보냄.
+    manifest 가 있으면 내용 기반 chunk ID 로 이전 수집 결과와 비교해서 변경된 chunk 만 embed / upsert 하고,
+    문서에서 사라진 chunk 는 index 에서 삭제.
+    near_duplicates 가 있으면 이미 색인된 chunk (이전 수집 포함) 와 거의 같은 chunk 는 embed / upsert 하지 않음.
+    버린 chunk 는 남긴 chunk (survivor) 기준으로 기록하고, survivor 가 삭제되면 원래 문서의 chunk 로 다시 embed / upsert.
+    """
+
+    def __init__(self, preprocessor: DocumentUtil, chunk_encoder, vector_store, manifest=None, category: str = "news",
+                 batch_size: int = 100, segment_chars: int = 200_000, read_block_size: int = 1 << 20,
+                 near_duplicates=None):
+        """
+        :param preprocessor: DocumentUtil 인스턴스
+        :param chunk_encoder: ChunkEncoder 인스턴스
+        :param vector_store: upsert 대상 VectorStore
+        :param manifest: IngestManifest 인스턴스. None 이면 비교 없이 모든 chunk 를 upsert
+        :param category: metadata 에 기록할 기본 category
+        :param batch_size: embed / upsert 한 번에 처리할 chunk 수
+        :param segment_chars: 텍스트 문서를 나눠서 처리할 segment 크기 (문자 수)
+        :param read_block_size: 파일 읽기 단위
+        :param near_duplicates: NearDuplicateIndex 인스턴스. None 이면 near-duplicate 제거 안 함
+        """
+        self.preprocessor = preprocessor
+        self.chunk_encoder = chunk_encoder
+        self.vector_store = vector_store
+        self.manifest = manifest
+        self.near_duplicates = near_duplicates
+        self.upserter = BulkUpserter(vector_store)
+        self.category = category
+        self.batch_size = batch_size
+        self.segment_chars = segment_chars
+        self.read_block_size = read_block_size
+        self.progress = IngestProgress()
+        self.upsert_summary = None
+        # upsert 전송 중인 chunk 의 manifest 기록 대기분 {chunk_id: (document_id, content_hash, metadata)}
+        self._pending = {}
+        # 삭제된 survivor 때문에 다시 embed / upsert 해야 하는 chunk [(chunk_id, document_id, content_hash, metadata)]
+        self._released = []
+        self._released_lock = threading.Lock()
+
+    def run(self, path: str, content_type: str = "text/plain", document_id: str = None) -> IngestProgress:
+        """
+        파이프라인 실행.
+        :param path: 업로드된 본문이 저장된 파일 경로
+        :param content_type: text/plain 또는 NDJSON (문서 1개당 1줄, 줄마다 "id" 필수)
+        :param document_id: text/plain 문서의 ID (필수). 파일 이름 / 원본 URL 처럼 내용이 바뀌어도 유지되는 값
+        """
+        if content_type in NDJSON_CONTENT_TYPES:
+            documents = self._iter_ndjson_documents(path)
+        elif document_id:
+            documents = self._iter_text_documents(path, document_id)
+        else:
+            # 내용 hash 를 ID 로 쓰면 수정된 문서가 새 문서가 되어 이전 chunk 가 index 에 계속 남음
+            raise ValueError("document_id is required")
+
+        chunks = self._iter_chunks(documents)
+        vectors = self._iter_vectors(self._iter_batches(chunks))
+        self._upsert(vectors)
+        return self.progress
+
+    def run_vectors(self, vectors, on_batch_done=None) -> dict:
+        """
+        이미 임베딩된 벡터 (ex. vector spool) 를 manifest 와 비교해서 변경된 벡터만 upsert 하고,
+        문서에서 사라진 chunk 는 삭제. 같은 문서의 벡터는 연속해서 들어와야 함.
+        :param vectors: {"id", "values", "metadata": {"documentId", "text", ...}} iterable
+        :param on_batch_done: (batch 결과 dict, batch 벡터 리스트) 를 받는 callback
+        :return: upsert 요약
+        """
+        return self._upsert(self._iter_changed_vectors(vectors), on_batch_done)
+
+    def _upsert(self, vectors, on_batch_done=None) -> dict:
+        def on_upsert_done(result: dict, batch: list):
+            self._on_upsert_done(result, batch)
+            if on_batch_done is not None:
+                on_batch_done(result, batch)
+
+        # upsert 전송이 밀리면 generator 소비도 멈춰서 메모리가 일정하게 유지됨
+        summary = self.upserter.run(vectors, on_batch_done=on_upsert_done)
+        for _ in range(RESTORE_PASS_COUNT):
+            with self._released_lock:
+                released, self._released = self._released, []
+            if not released:
+                break
+            restored = self._iter_vectors(self._iter_batches(self._iter_released(released)))
+            summary = self._merge_summary(summary, self.upserter.run(restored, on_batch_done=on_upsert_done))
+        if self._released:
+            logger.warning("%d near-duplicate chunks lost their survivor and were not restored",
+                           len(self._released))
+        self.vector_store.flush()
+        if self.near_duplicates is not None:
+            self.near_duplicates.commit()
+        # 대용량 ingest 는 batch 수가 많으므로 실패한 batch 결과만 유지
+        summary["results"] = [result for result in summary["results"] if not result["success"]]
+        self.upsert_summary = summary
+
+        # chat-service 의 semantic cache 에서 해당 category 결과 제거
+        if summary["upserted"] or self.progress.counters["delete"]:
+            CacheInvalidationUtil.notify(self.progress.categories)
+
+        return summary
+
+    @staticmethod
+    def _merge_summary(summary: dict, other: dict) -> dict:
+        merged = {key: summary[key] + other[key] for key in ("batches", "succeeded", "failed", "vectors", "upserted")}
+        merged["results"] = summary["results"] + other["results"]
+        return merged
+
+    def _iter_text_documents(self, path: str, document_id: str):
+        """
+        텍스트 파일 1개 = 문서 1개.
+        파일 block 을 읽는 대로 정리(clean)하고, 정리된 텍스트를 문장 / 공백 경계에서 segment 단위로 잘라서 반환.
+        (원문에서 자르면 태그 / entity 중간이 잘릴 수 있으므로 정리 후에 자름)
+        """
+        self.progress.add_document(self.category)
+        buffer = ""
+
+        for cleaned in self.preprocessor.clean_blocks(self._iter_file_blocks(path)):
+            self.progress.add("clean", len(cleaned))
+            buffer += cleaned
+
+            while len(buffer) >= self.segment_chars:
+                cut = self._find_segment_boundary(buffer)
+                yield document_id, buffer[:cut].strip(), {"category": self.category}
+                buffer = buffer[cut:]
+
+        if buffer.strip():
+            yield document_id, buffer.strip(), {"category": self.category}
+
+    def _iter_file_blocks(self, path: str):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                block = f.read(self.read_block_size)
+                if not block:
+                    break
+                self.progress.add("read", len(block.encode("utf-8")))
+                yield block
+
+    def _iter_ndjson_documents(self, path: str):
+        """
+        NDJSON 1줄 = 문서 1개. {"text": "...", "id": "...", "category": "..."}
+        id 가 없는 줄이 나오면 ValueError (그 전 줄의 문서까지는 반영됨).
+        """
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line_number, line in enumerate(f, start=1):
+                self.progress.add("read", len(line.encode("utf-8")))
+                if not line.strip():
+                    continue
+
+                document = json.loads(line)
+                if not document.get("id"):
+                    raise ValueError(f"NDJSON line {line_number} has no id")
+                category = document.get("category", self.category)
+                self.progress.add_document(category)
+                text = document.get("text", "")
+                document_id = str(document["id"])
+                cleaned = self.preprocessor.clean_text(text)
+                self.progress.add("clean", len(cleaned))
+                yield document_id, cleaned, {"category": category}
+
+    def _find_segment_boundary(self, buffer: str) -> int:
+        """
+        segment_chars 이전의 마지막 문장 부호 / 공백 경계. 없으면 segment_chars 에서 자름.
+        (정리된 텍스트에는 줄바꿈이 남아 있지 않음)
+        """
+        cut = max(buffer.rfind(separator, 0, self.segment_chars) for separator in (". ", "? ", "! "))
+        if cut <= 0:
+            cut = buffer.rfind(" ", 0, self.segment_chars)
+        if cut > 0:
+            return cut + 1
+        return self.segment_chars
+
+    def _iter_chunks(self, documents):
+        current_document_id = None
+        previous = {}
+        seen = set()
+
+        for document_id, cleaned, metadata in documents:
+            # 같은 문서의 segment 들은 연속해서 들어오므로 문서가 바뀔 때 이전 문서의 사라진 chunk 삭제
+            if document_id != current_document_id:
+                if current_document_id is not None:
+                    self._delete_removed(current_document_id, previous, seen)
+                current_document_id = document_id
+                previous = self.manifest.get_chunks(document_id) if self.manifest is not None else {}
+                seen = set()
+                self._forget_duplicates(document_id)
+
+            sentences = self.preprocessor.split_into_sentences(cleaned)
+            self.progress.add("split", len(sentences))
+
+            chunks = self.preprocessor.chunk_sentences(sentences)
+            self.progress.add("chunk", len(chunks))
+
+            for chunk in chunks:
+                chunk_metadata = {**metadata, "documentId": document_id, "text": chunk}
+                chunk_id = ContentIdUtil.unique_chunk_id(document_id, chunk, seen)
+
+                content_hash = ContentIdUtil.content_hash(chunk, chunk_metadata, self.chunk_encoder.vector_space)
+                if previous.get(chunk_id) == content_hash:
+                    self.progress.add("unchanged")
+                    continue
+
+                if self.near_duplicates is not None:
+                    signature = self.near_duplicates.signature(chunk)
+                    survivor_id = self._find_survivor(signature, chunk_id, document_id, seen)
+                    if survivor_id is not None:
+                        self.progress.add("duplicate")
+                        self.near_duplicates.record_duplicate()
+                        self.near_duplicates.record_dropped(chunk_id, document_id, survivor_id, content_hash,
+                                                            chunk_metadata)
+                        continue
+                    self.near_duplicates.add(chunk_id, document_id, signature)
+
+                self._pending[chunk_id] = (document_id, content_hash, chunk_metadata)
+                yield {"id": chunk_id, "metadata": chunk_metadata}
+
+        if current_document_id is not None:
+            self._delete_removed(current_document_id, previous, seen)
+
+    def _iter_changed_vectors(self, vectors):
+        """
+        _iter_chunks 의 manifest 비교를 임베딩된 벡터에 적용. documentId 가 없는 벡터는 비교 없이 upsert.
+        """
+        current_document_id = None
+        previous = {}
+        seen = set()
+
+        for vector in vectors:
+            metadata = vector.get("metadata", {})
+            document_id = metadata.get("documentId")
+            if document_id != current_document_id:
+                if current_document_id is not None:
+                    self._delete_removed(current_document_id, previous, seen)
+                current_document_id = document_id
+                previous = self.manifest.get_chunks(document_id) if self.manifest is not None and document_id else {}
+                seen = set()
+                self.progress.add_document(metadata.get("category", self.category))
+                if document_id is not None:
+                    self._forget_duplicates(document_id)
+
+            self.progress.add("chunk")
+            if document_id is None:
+                yield vector
+                continue
+
+            seen.add(vector["id"])
+            content_hash = ContentIdUtil.content_hash(metadata.get("text", ""), metadata, self.chunk_encoder.vector_space)
+            if previous.get(vector["id"]) == content_hash:
+                self.progress.add("unchanged")
+                continue
+
+            self._pending[vector["id"]] = (document_id, content_hash, metadata)
+            yield vector
+
+        if current_document_id is not None:
+            self._delete_removed(current_document_id, previous, seen)
+
+    def _find_survivor(self, signature, chunk_id: str, document_id: str, seen: set):
+        """
+        같은 문서의 이전 버전 chunk (이번 수집에서 아직 보지 못한 chunk) 는 곧 삭제될 수 있으므로 비교 대상에서 제외.
+        :return: 거의 같은 chunk 의 ID. 없으면 None
+        """
+        for match_id, match_document_id, _ in self.near_duplicates.query(signature):
+            if match_id != chunk_id and (match_document_id != document_id or match_id in seen):
+                return match_id
+        return None
+
+    def _forget_duplicates(self, document_id: str):
+        """
+        문서를 다시 처리하기 전에 이전 수집에서 버린 chunk 기록 제거. 이번 수집에서 다시 판단함.
+        """
+        if self.near_duplicates is None:
+            return
+        self.near_duplicates.forget_document(document_id)
+        with self._released_lock:
+            self._released = [entry for entry in self._released if entry[1] != document_id]
+
+    def _release_dependents(self, survivor_ids: list):
+        """
+        삭제된 (또는 저장에 실패한) chunk 를 survivor 로 해서 버렸던 chunk 를 다시 embed / upsert 대상으로 등록.
+        """
+        if self.near_duplicates is None:
+            return
+        released = self.near_duplicates.release(survivor_ids)
+        if released:
+            with self._released_lock:
+                self._released.extend(released)
+
+    def _iter_released(self, released: list):
+        """
+        survivor 가 사라진 chunk 를 원래 문서의 chunk 로 반환. 다른 survivor 가 있으면 그 기준으로 다시 기록.
+        """
+        for chunk_id, document_id, content_hash, metadata in released:
+            signature = self.near_duplicates.signature(metadata["text"])
+            survivor_id = self._find_survivor(signature, chunk_id, document_id, set())
+            if survivor_id is not None:
+                self.near_duplicates.record_dropped(chunk_id, document_id, survivor_id, content_hash, metadata)
+                continue
+            self.near_duplicates.add(chunk_id, document_id, signature)
+
+            self.progress.add("restore")
+            self.progress.add_category(metadata.get("category", self.category))
+            self._pending[chunk_id] = (document_id, content_hash, metadata)
+            yield {"id": chunk_id, "metadata": metadata}
+
+    def _delete_removed(self, document_id: str, previous: dict, seen: set):
+        """
+        이전 수집 때 있었지만 이번에는 없는 chunk 를 index / manifest 에서 bulk 삭제.
+        실패하면 manifest 에 남겨둬서 다음 수집 때 다시 삭제.
+        """
+        if self.manifest is None:
+            return
+        removed = [chunk_id for chunk_id in previous if chunk_id not in seen]
+        for start in range(0, len(removed), DELETE_BATCH_COUNT):
+            batch = removed[start:start + DELETE_BATCH_COUNT]
+            try:
+                self.vector_store.delete(ids=batch)
+            except Exception as ex:
+                logger.warning("Delete of %d stale chunks failed: %s", len(batch), document_id, exc_info=ex)
+                continue
+            self.manifest.remove(document_id, batch)
+            if self.near_duplicates is not None:
+                self.near_duplicates.remove(batch)
+                self._release_dependents(batch)
+            self.progress.add("delete", len(batch))
+
+    def _iter_batches(self, chunks):
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _iter_vectors(self, batches):
+        for batch in batches:
+            matrix = self.chunk_encoder.encode([chunk["metadata"]["text"] for chunk in batch])
+            self.progress.add("embed", len(batch))
+            for chunk, values in zip(batch, matrix.tolist()):
+                yield {"id": chunk["id"], "values": values, "metadata": chunk["metadata"]}
+
+    def _on_upsert_done(self, result: dict, batch: list):
+        pending = [(vector["id"], self._pending.pop(vector["id"], None)) for vector in batch]
+        if result["success"]:
+            self.progress.add("upsert", result["count"])
+            # 실패한 batch 는 manifest 에 기록하지 않으므로 다음 수집 때 다시 upsert
+            if self.manifest is not None:
+                self.manifest.record([(entry[0], chunk_id, entry[1], entry[2]) for chunk_id, entry in pending if entry])
+        elif self.near_duplicates is not None:
+            # 저장되지 않은 chunk 와 비교해서 다른 chunk 를 버리지 않도록 색인에서도 제거하고, 이 chunk 때문에 버린 chunk 는 복구
+            failed_ids = [chunk_id for chunk_id, _ in pending]
+            self.near_duplicates.remove(failed_ids)
+            self._release_dependents(failed_ids)
+        if self.near_duplicates is not None:
+            self.near_duplicates.commit()
+        logger.info("Ingest progress: %s", self.progress.to_dict())
@@ -0,0 +1,48 @@
+import json
+
+
+class JsonStreamUtil:
+
+    @staticmethod
+    def iter_json_array(path: str, block_size: int = 1 << 20):
+        """
+        JSON 배열 파일을 전체 로드하지 않고 원소 단위로 반환.
+        :param path: [ {...}, {...} ] 형태의 JSON 파일 경로
+        :param block_size: 한 번에 읽을 문자 수
+        """
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        started = False
+        eof = False
+
+        with open(path, "r", encoding="utf-8") as f:
+            while True:
+                # 구분자 / 공백 건너뛰기
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+
+                if not started and position < len(buffer):
+                    if buffer[position] != "[":
+                        raise ValueError(f"{path} is not a JSON array.")
+                    started = True
+                    position += 1
+                    continue
+
+                if started and position < len(buffer) and buffer[position] == "]":
+                    return
+
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # 원소가 아직 다 읽히지 않음
+                    if eof:
+                        raise
+                    block = f.read(block_size)
+                    eof = not block
+                    buffer = buffer[position:] + block
+                    position = 0
+                    continue
+
+                yield item
+                position = end
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class MetadataFilterUtil:
+    """
+    로컬 검색 (LocalVectorStore, BM25Index) 용 Pinecone metadata filter.
+    """
+
+    @staticmethod
+    def column(metadata: list, field: str) -> np.ndarray:
+        """
+        metadata 리스트에서 field 값만 모은 object 배열 (호출하는 쪽에서 field 별로 cache).
+        """
+        column = np.empty(len(metadata), dtype=object)
+        column[:] = [entry.get(field) for entry in metadata]
+        return column
+
+    @staticmethod
+    def mask(filter: dict, column, size: int) -> np.ndarray:
+        """
+        $eq / $ne / $in / $nin 과 단순 equality 지원.
+        :param column: field 이름 -> 길이 size 의 값 배열을 반환하는 함수
+        :return: 조건에 맞는 row 의 boolean mask
+        """
+        mask = np.ones(size, dtype=bool)
+        for field, condition in filter.items():
+            values = column(field)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, operand in condition.items():
+                if operator == "$eq":
+                    mask &= values == operand
+                elif operator == "$ne":
+                    mask &= values != operand
+                elif operator == "$in":
+                    mask &= np.isin(values, list(operand))
+                elif operator == "$nin":
+                    mask &= ~np.isin(values, list(operand))
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
@@ -0,0 +1,151 @@
+import html
+import re
+
+# 내용 자체를 버리는 태그
+SKIP_TAGS = ("script", "style", "noscript", "template")
+# 앞뒤 텍스트가 붙지 않도록 공백으로 바꾸는 block 태그
+BLOCK_TAGS = (
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+)
+
+_ATTRIBUTES = r'''(?:[^>"']|"[^"]*"|'[^']*')*'''
+_TAG = re.compile(r'<!--.*?-->|<[a-zA-Z/!?]' + _ATTRIBUTES + '>', re.S)
+_TAG_START = re.compile(r'<(?:[a-zA-Z/!?]|$)')
+_BLOCK_TAG = re.compile(r'</?(?:' + '|'.join(BLOCK_TAGS) + r')\b' + _ATTRIBUTES + '>', re.I)
+_SKIP_OPEN = re.compile(r'<(' + '|'.join(SKIP_TAGS) + r')\b' + _ATTRIBUTES + '>', re.I)
+_SKIP_CLOSE = {tag: re.compile(r'</' + tag + r'\s*>', re.I) for tag in SKIP_TAGS}
+_PARTIAL_ENTITY = re.compile(r'&#?\w{0,32}')
+_WHITESPACE = re.compile(r'\s+')
+
+# block 끝에서 다음 block 으로 넘길 수 있는 미완성 태그 최대 길이 (넘으면 일반 텍스트로 처리)
+_MAX_TAIL_CHARS = 64 * 1024
+# skip 태그 안에서는 닫는 태그가 block 경계에 걸친 경우만 대비해서 끝부분만 보관
+_SKIP_TAIL_CHARS = 32
+
+
+class TextCleaner:
+    """
+    HTML 제거 + 공백 정리를 text block 단위로 처리하는 streaming cleaner.
+    precompile 한 정규식으로 태그를 제거하고, entity 변환 / script, style 내용 제거까지 처리.
+    block 끝에 걸친 태그 / entity 는 다음 block 과 이어서 처리하므로, 문서 크기와 상관없이 block 크기만큼의 메모리만 사용.
+    """
+
+    def __init__(self):
+        self._tail = ""
+        self._skip_close = None
+        self._started = False
+        self._pending_space = False
+
+    def feed(self, block: str) -> str:
+        """
+        block 을 입력하고 지금까지 확정된 정리 결과를 반환.
+        """
+        return self._process(self._tail + block, final=False)
+
+    def close(self) -> str:
+        """
+        남아 있는 입력을 처리하고 마지막 결과를 반환. 끝의 공백은 버림.
+        """
+        return self._process(self._tail, final=True)
+
+    def iter_clean(self, blocks):
+        """
+        text block iterable (파일 read 등) 을 정리된 텍스트 조각으로 변환.
+        """
+        for block in blocks:
+            cleaned = self.feed(block)
+            if cleaned:
+                yield cleaned
+        cleaned = self.close()
+        if cleaned:
+            yield cleaned
+
+    @classmethod
+    def clean(cls, text: str) -> str:
+        """
+        문자열 전체를 한 번에 정리.
+        """
+        return "".join(cls().iter_clean((text,)))
+
+    def _process(self, data: str, final: bool) -> str:
+        self._tail = ""
+        pieces = []
+        pos = 0
+
+        while pos < len(data):
+            if self._skip_close is not None:
+                match = self._skip_close.search(data, pos)
+                if match is None:
+                    if not final:
+                        self._tail = data[max(pos, len(data) - _SKIP_TAIL_CHARS):]
+                    break
+                self._skip_close = None
+                pieces.append(" ")
+                pos = match.end()
+                continue
+
+            match = _SKIP_OPEN.search(data, pos)
+            region = data[pos:match.start() if match else len(data)]
+            if match is None and not final:
+                cut = self._safe_end(region)
+                self._tail = region[cut:]
+                region = region[:cut]
+            pieces.append(self._strip_markup(region))
+
+            if match is None:
+                break
+            self._skip_close = _SKIP_CLOSE[match.group(1).lower()]
+            pieces.append(" ")
+            pos = match.end()
+
+        return self._normalize("".join(pieces))
+
+    @staticmethod
+    def _safe_end(region: str) -> int:
+        """
+        다음 block 과 이어야 하는 미완성 태그 / 주석 / entity 를 제외한 위치.
+        """
+        cut = len(region)
+        lt = region.rfind("<")
+        if lt >= 0 and _TAG_START.match(region, lt) and not _TAG.match(region, lt):
+            cut = lt
+        comment = region.rfind("<!--", 0, cut)
+        if comment >= 0 and region.find("-->", comment) < 0:
+            cut = comment
+        amp = region.rfind("&", max(0, cut - 34), cut)
+        if amp >= 0 and _PARTIAL_ENTITY.fullmatch(region, amp, cut):
+            cut = amp
+
+        if len(region) - cut > _MAX_TAIL_CHARS:
+            return len(region)
+        return cut
+
+    @staticmethod
+    def _strip_markup(region: str) -> str:
+        if "<" in region:
+            region = _BLOCK_TAG.sub(" ", region)
+            region = _TAG.sub("", region)
+        if "&" in region:
+            region = html.unescape(region)
+        return region
+
+    def _normalize(self, text: str) -> str:
+        """
+        연속 공백을 하나로 줄이고, 조각 사이 공백은 다음 내용이 나올 때 붙임 (전체 결과의 앞뒤 공백 제거).
+        """
+        if not text:
+            return ""
+        text = _WHITESPACE.sub(" ", text)
+        if text == " ":
+            self._pending_space = self._pending_space or self._started
+            return ""
+
+        prefix = " " if (self._pending_space or text[0] == " ") and self._started else ""
+        self._pending_space = text[-1] == " "
+        self._started = True
+        return prefix + text.strip(" ")
+
+
+__all__ = ["TextCleaner"]
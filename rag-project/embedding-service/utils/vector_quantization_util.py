@@ -0,0 +1,21 @@
+import numpy as np
+
+
+class VectorQuantizationUtil:
+
+    @staticmethod
+    def quantize_int8(matrix: np.ndarray) -> tuple:
+        """
+        행(벡터)마다 scale 을 따로 두는 대칭 int8 scalar quantization. 원래 값 ≈ codes * scales[:, None]
+        :param matrix: (N, dim) float 행렬
+        :return: ((N, dim) int8 codes, (N,) float32 scales)
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        scales = np.abs(matrix).max(axis=1) / 127 if matrix.size else np.zeros(len(matrix), dtype=np.float32)
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    @staticmethod
+    def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * scales[:, None]
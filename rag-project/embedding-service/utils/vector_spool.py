@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from utils.json_stream_util import JsonStreamUtil
+
+VECTOR_SPOOL_PATH = os.getenv("VECTOR_SPOOL_PATH", "vector_chunks")
+# 작업 요청에서 이름으로 지정하는 spool 이 만들어지는 디렉토리 (이 밖의 경로는 사용할 수 없음)
+VECTOR_SPOOL_DIR = os.getenv("VECTOR_SPOOL_DIR", os.path.dirname(VECTOR_SPOOL_PATH) or ".")
+
+
+class VectorSpool:
+    """
+    임베딩 결과 저장 포맷.
+    {path}.npy       : (N, dim) float32 행렬 (np.memmap 으로 zero-copy 읽기)
+    {path}.meta.jsonl: 행 순서대로 {"id", "metadata"} 한 줄씩
+    """
+
+    def __init__(self, path: str = VECTOR_SPOOL_PATH):
+        """
+        :param path: 확장자를 제외한 spool 경로
+        """
+        self.path = path
+        self.matrix_path = f"{path}.npy"
+        self.meta_path = f"{path}.meta.jsonl"
+
+    @classmethod
+    def from_name(cls, name: str = None) -> "VectorSpool":
+        """
+        클라이언트가 지정한 spool 이름을 VECTOR_SPOOL_DIR 안의 경로로 변환. 이름이 없으면 기본 spool.
+        경로 구분자 / ".." 가 들어간 이름은 ValueError.
+        """
+        if name is None:
+            return cls(VECTOR_SPOOL_PATH)
+        separators = [separator for separator in (os.sep, os.altsep, "/") if separator]
+        if not isinstance(name, str) or not name or ".." in name or "\x00" in name \
+                or any(separator in name for separator in separators):
+            raise ValueError(f"Invalid spool name: {name!r}")
+        return cls(os.path.join(VECTOR_SPOOL_DIR, name))
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.matrix_path) and os.path.exists(self.meta_path)
+
+    def allocate(self, count: int, dimension: int) -> np.memmap:
+        """
+        파일에 매핑된 float32 행렬 할당. 인코더가 결과를 바로 기록할 수 있음.
+        """
+        return np.lib.format.open_memmap(self.matrix_path, mode="w+", dtype=np.float32, shape=(count, dimension))
+
+    def write_metadata(self, ids, metadatas):
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            for vector_id, metadata in zip(ids, metadatas):
+                f.write(json.dumps({"id": vector_id, "metadata": metadata}, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+
+    def write(self, ids: list, matrix: np.ndarray, metadatas: list):
+        """
+        메모리에 있는 행렬 저장.
+        """
+        np.save(self.matrix_path, np.ascontiguousarray(matrix, dtype=np.float32))
+        self.write_metadata(ids, metadatas)
+
+    def load_matrix(self) -> np.memmap:
+        """
+        읽기 전용 memmap. 전체 행렬을 메모리에 올리지 않음.
+        """
+        return np.load(self.matrix_path, mmap_mode="r")
+
+    def iter_metadata(self):
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_vectors(self):
+        """
+        upsert 용 {"id", "values", "metadata"} dict 를 한 건씩 반환.
+        """
+        matrix = self.load_matrix()
+        for row, meta in zip(matrix, self.iter_metadata()):
+            yield {"id": meta["id"], "values": row.tolist(), "metadata": meta["metadata"]}
+
+    def __len__(self) -> int:
+        return self.load_matrix().shape[0]
+
+    @classmethod
+    def import_json(cls, json_path: str, path: str = VECTOR_SPOOL_PATH) -> "VectorSpool":
+        """
+        기존 vector_chunks.json ([{"id", "values", "metadata"}, ...]) 을 spool 로 변환.
+        1차로 개수 / 차원만 세고, 2차로 memmap 에 바로 기록해서 메모리 사용을 일정하게 유지.
+        """
+        count = 0
+        dimension = 0
+        for vector in JsonStreamUtil.iter_json_array(json_path):
+            count += 1
+            dimension = dimension or len(vector["values"])
+
+        spool = cls(path)
+        matrix = spool.allocate(count, dimension)
+        with open(spool.meta_path, "w", encoding="utf-8") as f:
+            for i, vector in enumerate(JsonStreamUtil.iter_json_array(json_path)):
+                matrix[i] = vector["values"]
+                f.write(json.dumps({"id": vector["id"], "metadata": vector.get("metadata", {})},
+                                   ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+        matrix.flush()
+        del matrix
+        return spool
+
+
+if __name__ == "__main__":
+    # python -m utils.vector_spool vector_chunks.json --output vector_chunks
+    parser = argparse.ArgumentParser(description="vector_chunks.json -> vector spool 변환")
+    parser.add_argument("json_path")
+    parser.add_argument("--output", default=VECTOR_SPOOL_PATH)
+    args = parser.parse_args()
+
+    converted = VectorSpool.import_json(args.json_path, args.output)
+    print(f"{converted.matrix_path} ({len(converted)} vectors) 생성 완료")
@@ -0,0 +1,135 @@
+"""
+GlobalAuthMiddleware 처리량 비교 (requests/sec).
+같은 endpoint 를 middleware 없음 / 기존 BaseHTTPMiddleware 구현 / pure ASGI 구현(security_config) 으로 올리고,
+서버 / 네트워크 없이 ASGI app 을 직접 호출. JSON 응답과 StreamingResponse(chunk 여러 개) 둘 다 측정.
+
+    python -m benchmark.auth_middleware_benchmark --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from common.service_type_enum import ServiceTypeEnum
+from response.fast_json_response import FastJSONResponse, FastResponseRoute
+from response.success_response import SuccessResponse
+from security.auth_entry_point import unauthorized_response
+from security.security_config import GlobalAuthMiddleware
+
+
+class BaseHTTPAuthMiddleware(BaseHTTPMiddleware):
+    """
+    비교용: pure ASGI 로 바꾸기 전의 GlobalAuthMiddleware.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path.startswith("/login"):
+            return await call_next(request)
+
+        user_id = request.headers.get("X-User-Id", "test-user")
+        user_role = request.headers.get("X-User-Role", "test-role")
+
+        if not user_id or not user_role:
+            return unauthorized_response()
+
+        request.state.user = {"user_id": user_id, "user_role": user_role}
+        return await call_next(request)
+
+
+def build_app(middleware, stream_chunks: int) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = FastResponseRoute
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/profile")
+    async def profile(request: Request):
+        user = getattr(request.state, "user", {"user_id": "-", "user_role": "-"})
+        return SuccessResponse.with_message(
+            service_type=ServiceTypeEnum.SERVER,
+            message=f"Hello {user['user_id']} with role {user['user_role']}"
+        )
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(stream_chunks):
+                yield f"data: {i}\n\n".encode("utf-8")
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode("utf-8"), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"x-user-id", b"user-1"), (b"x-user-role", b"admin")],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 80),
+    }
+
+
+async def request_once(app: FastAPI, path: str) -> int:
+    """
+    :return: 응답 status
+    """
+    status = 0
+    received = False
+
+    async def receive():
+        # 본문은 한 번만 주고, 이후에는 (StreamingResponse 의 disconnect 감시) 응답이 끝날 때까지 대기
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(make_scope(path), receive, send)
+    return status
+
+
+async def requests_per_second(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    assert await request_once(app, path) == 200
+    for _ in range(min(200, total)):
+        await request_once(app, path)
+
+    async def worker(count: int):
+        for _ in range(count):
+            await request_once(app, path)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    return (total // concurrency) * concurrency / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--stream-chunks", type=int, default=50, help="/stream 응답의 chunk 수")
+    args = parser.parse_args()
+
+    variants = [
+        ("none", None),
+        ("BaseHTTPMiddleware", BaseHTTPAuthMiddleware),
+        ("pure ASGI", GlobalAuthMiddleware),
+    ]
+    print(f"requests={args.requests} concurrency={args.concurrency} stream_chunks={args.stream_chunks}")
+    print(f"  {'middleware':<20} {'/profile req/s':>15} {'/stream req/s':>14}")
+    for name, middleware in variants:
+        app = build_app(middleware, args.stream_chunks)
+        profile = asyncio.run(requests_per_second(app, "/profile", args.requests, args.concurrency))
+        stream = asyncio.run(requests_per_second(app, "/stream", args.requests, args.concurrency))
+        print(f"  {name:<20} {profile:15.0f} {stream:14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+응답 직렬화 비용 비교 (요청 1건당 µs).
+- 기존: SuccessResponse -> jsonable_encoder -> JSONResponse(json.dumps) / ErrorResponse.dict() -> JSONResponse
+- 변경: FastJSONResponse (pydantic-core / orjson 로 바로 bytes) / 미리 직렬화한 고정 에러 body
+- ASGI: 같은 endpoint 를 기본 APIRoute 와 FastResponseRoute 에 올려서 앱 단위로 비교
+
+    python -m benchmark.response_benchmark --iterations 20000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from common.service_type_enum import ServiceTypeEnum
+from response.error_response import ErrorResponse
+from response.fast_json_response import FastJSONResponse, FastResponseRoute, PrerenderedErrorResponse, orjson
+from response.success_response import SuccessResponse
+
+
+def sample_data(matches: int) -> dict:
+    """
+    검색 결과와 비슷한 모양의 data (id / score / metadata 리스트).
+    """
+    return {
+        "matches": [
+            {"id": f"doc-{i}#chunk-{i}", "score": 0.5 + i / 1000,
+             "metadata": {"text": "한국어 문서 chunk 본문 " * 8, "category": "news", "chunk_index": i}}
+            for i in range(matches)
+        ],
+        "count": matches,
+    }
+
+
+def measure(fn, iterations: int) -> float:
+    """
+    :return: 1회 평균 µs
+    """
+    for _ in range(min(1000, iterations)):
+        fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+def build_app(route_class, data: dict) -> FastAPI:
+    if route_class is None:
+        app = FastAPI()
+    else:
+        app = FastAPI(default_response_class=FastJSONResponse)
+        app.router.route_class = route_class
+
+    @app.get("/success")
+    async def success():
+        return SuccessResponse.with_data(service_type=ServiceTypeEnum.SERVER, data=data)
+
+    return app
+
+
+def measure_asgi(app: FastAPI, iterations: int) -> float:
+    """
+    서버 / 네트워크 없이 ASGI app 을 직접 호출해서 요청 1건 처리 시간 측정.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/success", "raw_path": b"/success", "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run() -> float:
+        for _ in range(min(500, iterations)):
+            await app(dict(scope), receive, send)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await app(dict(scope), receive, send)
+        return (time.perf_counter() - started) * 1e6 / iterations
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--matches", type=int, default=10, help="success 응답 data 의 match 수")
+    args = parser.parse_args()
+
+    data = sample_data(args.matches)
+    token_empty = PrerenderedErrorResponse(
+        status_code=480, service_type=ServiceTypeEnum.SECURITY_LOGIN, message="Token empty."
+    )
+
+    def success_before():
+        content = SuccessResponse.with_data(service_type=ServiceTypeEnum.SERVER, data=data)
+        return JSONResponse(content=jsonable_encoder(content))
+
+    def success_after():
+        return FastJSONResponse(content=SuccessResponse.with_data(service_type=ServiceTypeEnum.SERVER, data=data))
+
+    def error_before():
+        error_response = ErrorResponse.with_message(service_type=ServiceTypeEnum.SECURITY_LOGIN, message="Token empty.")
+        return JSONResponse(status_code=480, content=error_response.model_dump())
+
+    def error_after():
+        return token_empty()
+
+    # 같은 내용을 만드는지 먼저 확인 (timestamp 제외)
+    assert len(success_before().body) > 0 and success_after().body.startswith(b'{"success":true')
+    assert error_after().body.startswith(b'{"success":false,"serviceType":"SECURITY_LOGIN","message":"Token empty."')
+
+    print(f"iterations={args.iterations} matches={args.matches} orjson={'yes' if orjson else 'no'} "
+          f"body={len(success_after().body)}B")
+    print(f"  {'case':<28} {'before µs':>10} {'after µs':>10} {'speedup':>8}")
+    rows = [
+        ("success (serialize)", measure(success_before, args.iterations), measure(success_after, args.iterations)),
+        ("error Token empty.", measure(error_before, args.iterations), measure(error_after, args.iterations)),
+        ("success (ASGI request)",
+         measure_asgi(build_app(None, data), args.iterations // 4),
+         measure_asgi(build_app(FastResponseRoute, data), args.iterations // 4)),
+    ]
+    for name, before, after in rows:
+        print(f"  {name:<28} {before:10.1f} {after:10.1f} {before / after:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
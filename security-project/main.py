@@ -3,11 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from common.service_type_enum import ServiceTypeEnum
 from exception.business_exception import BusinessException
 from exception.exception_handler import add_exception_handlers
+from response.fast_json_response import FastJSONResponse, FastResponseRoute
 from response.success_response import SuccessResponse
 from security.security_config import GlobalAuthMiddleware
 
 # middleware
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+app.router.route_class = FastResponseRoute
 add_exception_handlers(app)
 app.add_middleware(GlobalAuthMiddleware)
 
@@ -1,9 +1,10 @@
-from fastapi.responses import JSONResponse
-
 from common.service_type_enum import ServiceTypeEnum
-from response.error_response import ErrorResponse
+from response.fast_json_response import PrerenderedErrorResponse
+
+_token_empty_response = PrerenderedErrorResponse(
+    status_code=480, service_type=ServiceTypeEnum.SECURITY_LOGIN, message="Token empty."
+)
 
 
 def unauthorized_response():
-    content = ErrorResponse.with_message(service_type=ServiceTypeEnum.SECURITY_LOGIN, message="Token empty.")
-    return JSONResponse(status_code=480, content=content.dict())
\ No newline at end of file
+    return _token_empty_response()